@@ -0,0 +1,266 @@
+"""
+Kairo 簽到壓力測試
+
+離線模擬大量成員在短時間內按下簽到按鈕：以假的 Interaction/Member/Guild
+驅動真正的 AttendanceCog 程式碼，寫入暫存的 tenant.db，並回報延遲分位數、
+資料庫排隊（鎖）等待時間，以及遺失或重複的簽到紀錄。
+
+用法: python -m kairo.bench_signin --users 500 --seconds 1
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from kairo.utils.tenant import tenant_db
+from kairo.utils.ratelimit import RouteLimiter
+from kairo.cogs.attendance import AttendanceCog, SigninButton
+
+GUILD_ID = 1000
+CHANNEL_ID = 2000
+
+
+# --- Fakes: just enough of discord.py's surface for the sign-in flow ---
+class FakeMember:
+    def __init__(self, user_id: int, name: str, edit_latency: float = 0.0):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.nick = None
+        self.bot = False
+        self.roles = []
+        self.mention = f"<@{user_id}>"
+        self._edit_latency = edit_latency
+
+    async def edit(self, nick: Optional[str] = None):
+        await asyncio.sleep(self._edit_latency)
+        self.nick = nick
+        self.display_name = nick or self.name
+
+
+class FakeChannel:
+    id = CHANNEL_ID
+
+    async def send(self, **kwargs):
+        return FakeMessage()
+
+
+class FakeMessage:
+    async def edit(self, **kwargs):
+        pass
+
+
+class FakeGuild:
+    def __init__(self, members: List[FakeMember]):
+        self.id = GUILD_ID
+        self.name = "Bench Guild"
+        self.members = members
+        self.chunked = True
+        self.filesize_limit = 25 * 1024 * 1024
+
+    def get_role(self, role_id: int):
+        return None
+
+    def get_member(self, user_id: int):
+        return next((member for member in self.members if member.id == user_id), None)
+
+
+class FakeResponse:
+    async def defer(self, **kwargs):
+        pass
+
+    async def send_message(self, **kwargs):
+        pass
+
+
+class FakeFollowup:
+    async def send(self, **kwargs):
+        return FakeMessage()
+
+
+class FakeBot:
+    def __init__(self):
+        self.cog = None
+        self.channel = FakeChannel()
+
+    def get_cog(self, name: str):
+        return self.cog
+
+    def get_channel(self, channel_id: int):
+        return self.channel
+
+    def add_dynamic_items(self, *items):
+        pass
+
+    def remove_dynamic_items(self, *items):
+        pass
+
+
+class FakeInteraction:
+    def __init__(self, bot: FakeBot, guild: FakeGuild, user: FakeMember):
+        self.client = bot
+        self.guild = guild
+        self.user = user
+        self.channel = bot.channel
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+        self.result: Optional[str] = None
+
+    async def edit_original_response(self, **kwargs):
+        embed = kwargs.get('embed')
+        self.result = embed.title if embed else kwargs.get('content')
+
+
+# --- Benchmark ---
+@dataclass
+class BenchResult:
+    clicks: int
+    users: int
+    latencies: List[float] = field(default_factory=list)
+    db_waits: List[float] = field(default_factory=list)
+    acknowledged: Dict[int, int] = field(default_factory=dict)
+    stored: int = 0
+    stored_ids: Set[int] = field(default_factory=set)
+    elapsed: float = 0.0
+
+    @staticmethod
+    def percentile(values: List[float], pct: int) -> float:
+        if len(values) < 2:
+            return values[0] if values else 0.0
+        return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
+
+    @property
+    def lost(self) -> int:
+        """Users told they signed in whose record is not in the database."""
+        return len(set(self.acknowledged) - self.stored_ids)
+
+    @property
+    def duplicates(self) -> int:
+        """Extra success acknowledgements plus extra stored rows for the same user."""
+        extra_acks = sum(count - 1 for count in self.acknowledged.values())
+        return extra_acks + (self.stored - len(self.stored_ids))
+
+    def report(self) -> str:
+        ms = lambda seconds: f"{seconds * 1000:.2f} ms"
+        return "\n".join([
+            f"clicks: {self.clicks} from {self.users} users in {self.elapsed:.2f}s",
+            f"latency p50/p95/p99: {ms(self.percentile(self.latencies, 50))} / "
+            f"{ms(self.percentile(self.latencies, 95))} / {ms(self.percentile(self.latencies, 99))}",
+            f"DB queue wait p50/p99/total: {ms(self.percentile(self.db_waits, 50))} / "
+            f"{ms(self.percentile(self.db_waits, 99))} / {ms(sum(self.db_waits))} over {len(self.db_waits)} jobs",
+            f"records stored: {self.stored} (distinct users {len(self.stored_ids)})",
+            f"lost: {self.lost}  duplicates: {self.duplicates}",
+        ])
+
+
+async def run_benchmark(users: int = 500, seconds: float = 1.0, repeat_rate: float = 0.1,
+                        rename: bool = False, edit_latency: float = 0.0, edit_rate: Optional[float] = None,
+                        seed: int = 0) -> BenchResult:
+    """Simulate ``users`` members clicking the sign-in button within ``seconds``.
+
+    Uses whatever database tenant_db currently points at; main() points it at a temp file.
+    """
+    rng = random.Random(seed)
+    members = [FakeMember(user_id, f"user{user_id}", edit_latency) for user_id in range(1, users + 1)]
+    guild = FakeGuild(members)
+    bot = FakeBot()
+    cog = AttendanceCog(bot)
+    bot.cog = cog
+    if edit_rate:
+        cog.signin_rename_limiter = RouteLimiter(edit_rate, max(1, int(edit_rate)))
+
+    await tenant_db.run(tenant_db.set_attendance_setting, GUILD_ID, 'attendance_rename_enabled', rename)
+    if rename:
+        # Every fake member starts non-compliant, so each first click renames
+        await tenant_db.run(tenant_db.set_attendance_setting, GUILD_ID, 'attendance_rename_format_member', '社員 | {name}')
+    await cog.cog_load()
+
+    # Time how long each DB job waits for the single DB thread
+    db_waits: List[float] = []
+    original_run = tenant_db.run
+
+    async def timed_run(func, *args, **kwargs):
+        submitted = time.perf_counter()
+        started = []
+
+        def job():
+            started.append(time.perf_counter())
+            return func(*args, **kwargs)
+
+        try:
+            return await original_run(job)
+        finally:
+            if started:
+                db_waits.append(started[0] - submitted)
+
+    tenant_db.run = timed_run
+    try:
+        await cog.signin_start.callback(cog, FakeInteraction(bot, guild, members[0]), minutes=30)
+        session_id = cog.active_sessions.latest_for_guild(GUILD_ID).session_id
+
+        clicks = [member for member in members]
+        clicks += [member for member in members if rng.random() < repeat_rate]
+        result = BenchResult(clicks=len(clicks), users=users)
+
+        async def click(member: FakeMember, delay: float):
+            await asyncio.sleep(delay)
+            interaction = FakeInteraction(bot, guild, member)
+            start = time.perf_counter()
+            await SigninButton(session_id).callback(interaction)
+            result.latencies.append(time.perf_counter() - start)
+            if interaction.result == "✅ 簽到成功":
+                result.acknowledged[member.id] = result.acknowledged.get(member.id, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(click(member, rng.uniform(0, seconds)) for member in clicks))
+        await cog.cog_unload()  # flushes the write-behind queue like a shutdown would
+        result.elapsed = time.perf_counter() - started
+    finally:
+        tenant_db.run = original_run
+
+    rows = await tenant_db.fetchall("SELECT user_id FROM records WHERE session_id = ?", (session_id,))
+    result.stored = len(rows)
+    result.stored_ids = {row[0] for row in rows}
+    result.db_waits = db_waits
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline sign-in button storm benchmark")
+    parser.add_argument('--users', type=int, default=500, help="number of members clicking")
+    parser.add_argument('--seconds', type=float, default=1.0, help="window the clicks are spread over")
+    parser.add_argument('--repeat-rate', type=float, default=0.1, help="fraction of members who click twice")
+    parser.add_argument('--rename', action='store_true', help="enable nickname enforcement during sign-in")
+    parser.add_argument('--edit-latency', type=float, default=0.05, help="simulated member.edit latency (s)")
+    parser.add_argument('--edit-rate', type=float, default=None, help="override the sign-in rename rate limit (/s)")
+    parser.add_argument('--max-p99-ms', type=float, default=None, help="fail if p99 latency exceeds this")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tenant_db.db_path = os.path.join(tmpdir, "tenant.db")
+        tenant_db.init_db()
+        try:
+            result = asyncio.run(run_benchmark(
+                args.users, args.seconds, args.repeat_rate, args.rename, args.edit_latency, args.edit_rate, args.seed
+            ))
+        finally:
+            tenant_db.close()
+
+    print(result.report())
+    failed = result.lost or result.duplicates
+    if args.max_p99_ms is not None and result.percentile(result.latencies, 99) * 1000 > args.max_p99_ms:
+        print(f"p99 latency above {args.max_p99_ms} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
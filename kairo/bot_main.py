@@ -8,6 +8,7 @@ import logging
 load_dotenv()
 
 from kairo.utils.visibility import get_visible_commands_for_guild, is_super_admin, get_super_admin_commands
+from kairo.utils.tenant import tenant_db
 
 ADMIN_GUILD_ID = int(os.getenv('ADMIN_GUILD_ID', '1405176396158079076'))
 
@@ -21,17 +22,25 @@ class KairoBot(commands.Bot):
         intents.message_content = True
         intents.guilds = True
         intents.guild_messages = True
+        # Needed for complete member lists (signin_summary, nickname jobs);
+        # members are chunked on demand rather than for every guild at startup
+        intents.members = True
 
         super().__init__(
             command_prefix='!',
             intents=intents,
-            help_command=None
+            help_command=None,
+            chunk_guilds_at_startup=False
         )
+        self.backfill_task = None
 
     async def setup_hook(self):
         """Called when the bot is starting up"""
         logger.info("Setting up Kairo bot...")
 
+        # Data written by older versions to a working-directory-relative tenant.db
+        await tenant_db.run(tenant_db.adopt_legacy_database)
+
         # Load all cogs
         cogs = [
             'kairo.cogs.register',
@@ -53,9 +62,27 @@ class KairoBot(commands.Bot):
             except Exception as e:
                 logger.error(f"Failed to load cog {cog}: {e}")
 
+        # 遷移回填在背景分批執行，不阻塞啟動
+        self.backfill_task = asyncio.create_task(self.run_migration_backfills())
+        self.backfill_task.add_done_callback(self._log_backfill_result)
+
         # 管理員指令將在 on_ready 中同步，確保所有 guild 都已載入
         logger.info("Bot setup complete!")
 
+    async def run_migration_backfills(self):
+        """Run pending schema migration backfills in small batches"""
+        processed = await tenant_db.run_backfills()
+        if processed:
+            logger.info(f"Migration backfills processed {processed} rows")
+
+    def _log_backfill_result(self, task: asyncio.Task):
+        """Done-callback for the backfill task; cancellation at shutdown is expected"""
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.error("Migration backfill failed", exc_info=error)
+
     async def sync_super_admin_commands_for_admin_guild(self):
         """只在管理員 guild 中同步超級管理員指令"""
         # 使用常數定義的管理員 guild ID
@@ -105,7 +132,7 @@ class KairoBot(commands.Bot):
             self.tree.clear_commands(guild=guild)
 
             # Get visible commands for this guild
-            visible_commands = get_visible_commands_for_guild(guild_id)
+            visible_commands = await tenant_db.run(get_visible_commands_for_guild, guild_id)
             logger.info(f"Guild {guild_id} should see commands: {visible_commands}")
 
             # Add visible commands
@@ -184,6 +211,21 @@ class KairoBot(commands.Bot):
             except:
                 pass  # Ignore if we can't send
 
+    async def close(self):
+        """Called when the bot shuts down"""
+        # Stop the backfill before the DB closes; a batch already on the DB thread finishes first
+        if self.backfill_task is not None:
+            self.backfill_task.cancel()
+            try:
+                await self.backfill_task
+            except asyncio.CancelledError:
+                pass
+            except Exception:
+                pass  # already logged by _log_backfill_result
+            self.backfill_task = None
+        await super().close()
+        tenant_db.close()
+
     async def on_guild_remove(self, guild):
         """Called when bot leaves a guild"""
         logger.info(f"Left guild: {guild.name} (ID: {guild.id})")
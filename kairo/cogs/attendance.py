@@ -3,52 +3,84 @@ from discord.ext import commands
 from discord import app_commands
 from ..utils.brand import create_brand_embed, create_success_embed, create_error_embed
 from ..utils.tenant import tenant_db, AttendanceSettings
-from datetime import datetime, timedelta
-import sqlite3
+from ..utils.signin import ActiveSession, ActiveSessions, ExpiryScheduler, SigninQueue, split_attendance
+from ..utils.paginator import EmbedPaginator, chunk
+from ..utils.excel import AttendanceExportWriter
+from ..utils.ratelimit import (
+    RouteLimiter, SlidingWindowLimiter, MEMBER_EDIT_RATE, MEMBER_EDIT_BURST,
+    SIGNIN_RENAME_RATE, SIGNIN_RENAME_BURST, SIGNIN_RENAME_MAX_WAIT,
+)
+from ..utils.bulk import BulkMemberEditor, BulkProgress
+from ..utils.nickname import NicknamePolicies, NicknamePolicy
+from datetime import datetime, timedelta, timezone
 import io
-import secrets
-import string
+import csv
+import os
+import tempfile
 import asyncio
-from typing import Optional, Literal
+import time
+from typing import Callable, Dict, List, Optional, Literal, Tuple
 
+EXPORT_PAGE_SIZE = 500
+# Wrong sign-in codes allowed per user before signin_in is paused
+SIGNIN_CODE_MAX_FAILURES = 5
+SIGNIN_CODE_WINDOW = 60
+# Interaction tokens (and so followup edits) expire after 15 minutes; keep a margin
+FOLLOWUP_TOKEN_LIFETIME = 14 * 60
+
+
+class SigninButton(discord.ui.DynamicItem[discord.ui.Button], template=r'kairo:signin:(?P<session_id>[0-9]+)'):
+    """Persistent sign-in button; the session id lives in the custom_id so it survives restarts."""
 
-class SigninView(discord.ui.View):
     def __init__(self, session_id: int):
-        super().__init__(timeout=None)
+        super().__init__(
+            discord.ui.Button(
+                label="簽到",
+                style=discord.ButtonStyle.primary,
+                emoji="✅",
+                custom_id=f"kairo:signin:{session_id}"
+            )
+        )
         self.session_id = session_id
 
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(int(match['session_id']))
+
+    @staticmethod
+    def view_for(session_id: int) -> discord.ui.View:
+        view = discord.ui.View(timeout=None)
+        view.add_item(SigninButton(session_id))
+        return view
+
     async def check_and_rename_nickname(self, interaction: discord.Interaction) -> bool:
         """Checks nickname against guild settings and renames if necessary."""
         member = interaction.user
         guild = interaction.guild
+        cog = interaction.client.get_cog("AttendanceCog")
 
-        settings = tenant_db.get_attendance_settings(guild.id)
-
-        # 1. If renaming is disabled, pass the check
-        if not settings.rename_enabled:
+        # 1. The compiled policy lives in memory; settings are only read after a change or restart
+        policy = await cog.nickname_policy(guild.id)
+        if not policy.enabled:
             return True
 
-        # 2. Determine user's role and target format
-        is_staff = False
-        if settings.staff_role_id:
-            staff_role = guild.get_role(settings.staff_role_id)
-            if staff_role and staff_role in member.roles:
-                is_staff = True
-
-        target_format = settings.rename_format_staff if is_staff else settings.rename_format_member
-
-        # 3. Construct the new nickname
-        # Use member.name as a fallback if display_name is weird
-        base_name = member.name 
-        new_nickname = target_format.format(name=base_name)
+        # 2. Repeat attendees already verified under this format skip the format step
+        if cog.nickname_policies.is_compliant(policy, member):
+            return True
 
-        # 4. If nickname is already correct, pass the check
+        # 3. Construct the new nickname from member.name and pass if it already matches
+        new_nickname = policy.target_for(member)
         if member.display_name == new_nickname:
+            cog.nickname_policies.mark_compliant(policy, member)
             return True
 
-        # 5. Attempt to rename
+        # 4. Attempt to rename, unless the sign-in rename bucket is backed up: the sign-in
+        # then goes ahead and the member stays non-compliant, so the next sign-in retries
+        if not await cog.signin_rename_limiter.acquire_within(('signin_rename', guild.id), SIGNIN_RENAME_MAX_WAIT):
+            return True
         try:
             await member.edit(nick=new_nickname)
+            cog.nickname_policies.mark_compliant(policy, member, new_nickname)
             # Send a quiet confirmation
             await interaction.followup.send(
                 embed=create_success_embed("✅ 暱稱已自動更新", f"您的暱稱已更新為 `{new_nickname}` 以符合伺服器規範。" ),
@@ -68,8 +100,7 @@ class SigninView(discord.ui.View):
             )
             return False
 
-    @discord.ui.button(label="簽到", style=discord.ButtonStyle.primary, emoji="✅")
-    async def signin_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+    async def callback(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True, thinking=True)
 
         # Nickname check is the first step
@@ -83,48 +114,33 @@ class SigninView(discord.ui.View):
         await self.handle_signin(interaction)
 
     async def handle_signin(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog("AttendanceCog")
         guild_id = interaction.guild.id
         user_id = interaction.user.id
         # Use the updated display_name
         username = interaction.user.display_name
 
-        with sqlite3.connect("data/tenant.db") as conn:
-            cursor = conn.cursor()
-            # Check if session is still active
-            cursor.execute(
-                "SELECT active, canva_url, outline FROM sessions WHERE id = ? AND guild_id = ?",
-                (self.session_id, guild_id)
-            )
-            session = cursor.fetchone()
+        # Check if session is still active (in-memory, no DB round-trip)
+        session = cog.active_sessions.get(self.session_id, guild_id) if cog else None
 
-            if not session or not session[0]:
-                embed = create_error_embed("❌ 簽到已結束", "此簽到場次已經結束。" )
-                await interaction.edit_original_response(embed=embed, view=None)
-                return
-
-            # Check if already signed in
-            cursor.execute(
-                "SELECT 1 FROM records WHERE session_id = ? AND user_id = ?",
-                (self.session_id, user_id)
-            )
-            if cursor.fetchone():
-                embed = create_error_embed("⚠️ 已簽到", "您已經簽到過了。" )
-                await interaction.edit_original_response(embed=embed, view=None)
-                return
+        if not session:
+            embed = create_error_embed("❌ 簽到已結束", "此簽到場次已經結束。" )
+            await interaction.edit_original_response(embed=embed, view=None)
+            return
 
-            # Record attendance
-            cursor.execute(
-                "INSERT INTO records (session_id, user_id, username) VALUES (?, ?, ?)",
-                (self.session_id, user_id, username)
-            )
-            conn.commit()
+        # Reject a second sign-in, then queue the record for the next batch write
+        if not cog.active_sessions.mark_signed_in(self.session_id, user_id):
+            embed = create_error_embed("⚠️ 已簽到", "您已經簽到過了。" )
+            await interaction.edit_original_response(embed=embed, view=None)
+            return
+        cog.signin_queue.submit(self.session_id, user_id, username)
 
         # Success response
         success_embed = create_success_embed(
             title="✅ 簽到成功",
             description=f"**{username}** 簽到成功！"
         )
-        canva_url, outline = session[1], session[2]
+        canva_url, outline = session.canva_url, session.outline
         if canva_url or outline:
             extra_info = []
             if canva_url:
@@ -139,6 +155,65 @@ class SigninView(discord.ui.View):
 class AttendanceCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.signin_queue = SigninQueue(tenant_db)
+        self.active_sessions = ActiveSessions()
+        self.expiry = ExpiryScheduler(self.expire_session)
+        # Bulk jobs share one per-guild bucket; sign-in renames have their own so neither waits on the other
+        self.member_edit_limiter = RouteLimiter(MEMBER_EDIT_RATE, MEMBER_EDIT_BURST)
+        self.signin_rename_limiter = RouteLimiter(SIGNIN_RENAME_RATE, SIGNIN_RENAME_BURST)
+        self.bulk_editor = BulkMemberEditor(tenant_db, self.member_edit_limiter)
+        self.code_failures = SlidingWindowLimiter(SIGNIN_CODE_MAX_FAILURES, SIGNIN_CODE_WINDOW)
+        self.nickname_policies = NicknamePolicies()
+        # Running bulk jobs by (guild_id, kind); a rerun reports on these instead of starting another worker
+        self.bulk_jobs: Dict[Tuple[int, str], Tuple[asyncio.Task, BulkProgress]] = {}
+
+    async def cog_load(self):
+        # One query restores every open session and its sign-ins; the dynamic
+        # button handler then serves all existing sign-in messages
+        self.active_sessions.load(await tenant_db.run(tenant_db.get_active_sessions))
+        for session in self.active_sessions:
+            self.expiry.schedule(session.session_id, session.expire_at)
+        self.signin_queue.start()
+        self.expiry.start()
+        self.bot.add_dynamic_items(SigninButton)
+
+    async def cog_unload(self):
+        self.bot.remove_dynamic_items(SigninButton)
+        # Runs on bot shutdown as well; writes out every queued sign-in
+        await self.expiry.stop()
+        await self.signin_queue.stop()
+        # Interrupted bulk jobs keep their checkpoint and resume on the next run
+        tasks = [task for task, _ in self.bulk_jobs.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def nickname_policy(self, guild_id: int) -> NicknamePolicy:
+        policy = self.nickname_policies.get(guild_id)
+        if policy is None:
+            settings = await tenant_db.run(tenant_db.get_attendance_settings, guild_id)
+            policy = self.nickname_policies.load(guild_id, settings)
+        return policy
+
+    async def close_session(self, session_id: int) -> Optional[int]:
+        """Close an open session and return its final count (None if already closed)."""
+        # Stop accepting clicks first, then write out what is still queued
+        if not self.active_sessions.remove(session_id):
+            return None
+        self.expiry.cancel(session_id)
+        await self.signin_queue.flush()
+        return await tenant_db.run(tenant_db.end_session, session_id)
+
+    async def expire_session(self, session_id: int):
+        session = self.active_sessions.get(session_id)
+        count = await self.close_session(session_id)
+        if count is None:
+            return
+
+        channel = self.bot.get_channel(session.channel_id)
+        if channel:
+            embed = create_success_embed("🏁 簽到已結束", f"簽到時間已到，共有 **{count}** 人簽到。" )
+            await channel.send(embed=embed)
 
     # --- Settings Command Group ---
     attendance_settings = app_commands.Group(name="attendance_settings", description="設定簽到相關功能", default_permissions=discord.Permissions(manage_guild=True))
@@ -146,7 +221,8 @@ class AttendanceCog(commands.Cog):
     @attendance_settings.command(name="set_enabled", description="啟用或停用簽到時的自動暱稱管理")
     @app_commands.checks.has_permissions(manage_guild=True)
     async def set_rename_enabled(self, interaction: discord.Interaction, enabled: bool):
-        tenant_db.set_attendance_setting(interaction.guild.id, 'attendance_rename_enabled', enabled)
+        await tenant_db.run(tenant_db.set_attendance_setting, interaction.guild.id, 'attendance_rename_enabled', enabled)
+        self.nickname_policies.invalidate(interaction.guild.id)
         status = "啟用" if enabled else "停用"
         await interaction.response.send_message(
             embed=create_success_embed("✅ 設定已更新", f"簽到自動暱稱管理已 **{status}**。" ),
@@ -156,7 +232,8 @@ class AttendanceCog(commands.Cog):
     @attendance_settings.command(name="set_staff_role", description="設定被視為「幹部」的身份組")
     @app_commands.checks.has_permissions(manage_guild=True)
     async def set_staff_role(self, interaction: discord.Interaction, role: discord.Role):
-        tenant_db.set_attendance_setting(interaction.guild.id, 'attendance_staff_role_id', role.id)
+        await tenant_db.run(tenant_db.set_attendance_setting, interaction.guild.id, 'attendance_staff_role_id', role.id)
+        self.nickname_policies.invalidate(interaction.guild.id)
         await interaction.response.send_message(
             embed=create_success_embed("✅ 設定已更新", f"幹部身份組已設定為 {role.mention}。" ),
             ephemeral=True
@@ -174,7 +251,8 @@ class AttendanceCog(commands.Cog):
             return
 
         key = 'attendance_rename_format_staff' if role_type == '幹部' else 'attendance_rename_format_member'
-        tenant_db.set_attendance_setting(interaction.guild.id, key, format)
+        await tenant_db.run(tenant_db.set_attendance_setting, interaction.guild.id, key, format)
+        self.nickname_policies.invalidate(interaction.guild.id)
         await interaction.response.send_message(
             embed=create_success_embed("✅ 設定已更新", f"**{role_type}** 的暱稱格式已更新為 `{format}`。" ),
             ephemeral=True
@@ -183,7 +261,7 @@ class AttendanceCog(commands.Cog):
     @attendance_settings.command(name="show", description="顯示目前的簽到設定")
     @app_commands.checks.has_permissions(manage_guild=True)
     async def show_settings(self, interaction: discord.Interaction):
-        settings = tenant_db.get_attendance_settings(interaction.guild.id)
+        settings = await tenant_db.run(tenant_db.get_attendance_settings, interaction.guild.id)
         status = "✅ 啟用" if settings.rename_enabled else "❌ 停用"
         
         staff_role = interaction.guild.get_role(settings.staff_role_id) if settings.staff_role_id else None
@@ -202,17 +280,17 @@ class AttendanceCog(commands.Cog):
     @app_commands.describe(minutes="簽到持續時間（分鐘）", canva_url="Canva簡報連結", outline="課程大綱")
     async def signin_start(self, interaction: discord.Interaction, minutes: int = 30, canva_url: str = None, outline: str = None):
         guild_id = interaction.guild.id
-        code = ''.join(secrets.choice(string.digits) for _ in range(4))
+        # Reserved synchronously, so a concurrent signin_start cannot draw the same code
+        code = self.active_sessions.new_code(guild_id)
         expire_at = datetime.now() + timedelta(minutes=minutes)
 
-        with sqlite3.connect("data/tenant.db") as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO sessions (guild_id, channel_id, code, expire_at, canva_url, outline) VALUES (?, ?, ?, ?, ?, ?)",
-                (guild_id, interaction.channel.id, code, expire_at, canva_url, outline)
+        try:
+            session_id = await tenant_db.run(
+                tenant_db.create_session, guild_id, interaction.channel.id, code, expire_at, canva_url, outline
             )
-            session_id = cursor.lastrowid
-            conn.commit()
+        except BaseException:
+            self.active_sessions.release_code(guild_id, code)
+            raise
 
         embed = create_brand_embed(
             title="🎯 簽到開始",
@@ -223,27 +301,47 @@ class AttendanceCog(commands.Cog):
         if outline:
             embed.add_field(name="📝 大綱", value=outline, inline=False)
 
-        view = SigninView(session_id)
-        await interaction.response.send_message(embed=embed, view=view)
+        self.active_sessions.add(ActiveSession(
+            session_id, guild_id, interaction.channel.id, code, expire_at, canva_url, outline
+        ))
+        self.expiry.schedule(session_id, expire_at)
+
+        await interaction.response.send_message(embed=embed, view=SigninButton.view_for(session_id))
+
+    @app_commands.command(name="signin_in", description="輸入簽到碼進行簽到")
+    @app_commands.describe(code="簽到碼")
+    async def signin_in(self, interaction: discord.Interaction, code: str):
+        key = (interaction.guild.id, interaction.user.id)
+        retry_after = self.code_failures.retry_after(key)
+        if retry_after:
+            await interaction.response.send_message(
+                embed=create_error_embed("⏳ 嘗試次數過多", f"簽到碼錯誤次數過多，請於 {retry_after:.0f} 秒後再試。" ),
+                ephemeral=True
+            )
+            return
+
+        session = self.active_sessions.by_code(interaction.guild.id, code.strip())
+        if not session:
+            self.code_failures.record(key)
+            await interaction.response.send_message(
+                embed=create_error_embed("❌ 簽到碼錯誤", "找不到使用此簽到碼的進行中簽到。" ),
+                ephemeral=True
+            )
+            return
+
+        # Same flow as pressing the session's button
+        await SigninButton(session.session_id).callback(interaction)
 
     @app_commands.command(name="signin_end", description="結束當前的簽到活動")
     async def signin_end(self, interaction: discord.Interaction):
         guild_id = interaction.guild.id
-        with sqlite3.connect("data/tenant.db") as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM sessions WHERE guild_id = ? AND active = 1", (guild_id,))
-            session = cursor.fetchone()
-
-            if not session:
-                await interaction.response.send_message(embed=create_error_embed("⚠️ 無進行中的簽到"), ephemeral=True)
-                return
+        session = self.active_sessions.latest_for_guild(guild_id)
 
-            session_id = session[0]
-            conn.execute("UPDATE sessions SET active = 0 WHERE id = ?", (session_id,))
-            conn.commit()
+        if not session:
+            await interaction.response.send_message(embed=create_error_embed("⚠️ 無進行中的簽到"), ephemeral=True)
+            return
 
-            cursor.execute("SELECT COUNT(*) FROM records WHERE session_id = ?", (session_id,))
-            count = cursor.fetchone()[0]
+        count = await self.close_session(session.session_id)
 
         embed = create_success_embed("🏁 簽到已結束", f"本次簽到結束，共有 **{count}** 人簽到。" )
         await interaction.response.send_message(embed=embed)
@@ -253,18 +351,14 @@ class AttendanceCog(commands.Cog):
         await interaction.response.defer(ephemeral=True)
         guild_id = interaction.guild.id
 
-        with sqlite3.connect("data/tenant.db") as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM sessions WHERE guild_id = ? ORDER BY id DESC LIMIT 1", (guild_id,))
-            session = cursor.fetchone()
+        session_id = await tenant_db.run(tenant_db.get_latest_session_id, guild_id)
 
-            if not session:
-                await interaction.followup.send(embed=create_error_embed("⚠️ 無簽到記錄"), ephemeral=True)
-                return
+        if not session_id:
+            await interaction.followup.send(embed=create_error_embed("⚠️ 無簽到記錄"), ephemeral=True)
+            return
 
-            session_id = session[0]
-            cursor.execute("SELECT user_id, username, ts FROM records WHERE session_id = ? ORDER BY ts", (session_id,))
-            records = cursor.fetchall()
+        await self.signin_queue.flush()
+        records = await tenant_db.run(tenant_db.get_session_records, session_id)
 
         if not records:
             await interaction.followup.send(embed=create_error_embed("⚠️ 此場次無人簽到"), ephemeral=True)
@@ -278,54 +372,219 @@ class AttendanceCog(commands.Cog):
             report_content += f"{ts:<20} | {record[1]:<25} | {record[0]}\n"
         report_content += "```"
 
+        description = f"共 **{len(records)}** 人簽到。\n{report_content}"
+        if len(description) > 4096:
+            # Too long for an embed; attach the full report instead
+            await self.send_export(interaction, guild_id, 'csv', session_id=session_id)
+            return
+
         embed = create_brand_embed(
             title=f"📋 簽到報告 (場次 #{session_id})",
-            description=f"共 **{len(records)}** 人簽到。\n{report_content}"
+            description=description
         )
         await interaction.followup.send(embed=embed, ephemeral=True)
 
+    @app_commands.command(name="signin_export", description="匯出簽到紀錄 (CSV/XLSX)")
+    @app_commands.describe(
+        scope="匯出範圍",
+        session_id="場次編號（單一場次時使用，預設為最新場次）",
+        start="起始日期 YYYY-MM-DD（日期區間時使用）",
+        end="結束日期 YYYY-MM-DD，含當天（日期區間時使用）",
+        file_format="檔案格式"
+    )
+    async def signin_export(self, interaction: discord.Interaction,
+                            scope: Literal['單一場次', '日期區間', '全部場次'] = '單一場次',
+                            session_id: Optional[int] = None, start: Optional[str] = None, end: Optional[str] = None,
+                            file_format: Literal['CSV', 'XLSX'] = 'CSV'):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        guild_id = interaction.guild.id
+        range_start, range_end = '', '9999-12-31'
+
+        if scope == '單一場次':
+            session_id = session_id or await tenant_db.run(tenant_db.get_latest_session_id, guild_id)
+            if not session_id:
+                await interaction.followup.send(embed=create_error_embed("⚠️ 無簽到記錄"), ephemeral=True)
+                return
+        else:
+            session_id = None
+            if scope == '日期區間':
+                try:
+                    range_start, range_end = self.utc_date_range(start, end)
+                except ValueError:
+                    await interaction.followup.send(
+                        embed=create_error_embed("❌ 日期格式錯誤", "請使用 `YYYY-MM-DD` 格式，例如 `2025-09-01`。" ),
+                        ephemeral=True
+                    )
+                    return
+
+        await self.send_export(interaction, guild_id, file_format.lower(), session_id, range_start, range_end)
+
+    @staticmethod
+    def utc_date_range(start: Optional[str], end: Optional[str]) -> Tuple[str, str]:
+        """Local YYYY-MM-DD bounds (end inclusive) as UTC timestamps comparable with records.ts."""
+        def to_utc(value: datetime) -> str:
+            return value.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+        range_start = to_utc(datetime.strptime(start, '%Y-%m-%d')) if start else ''
+        range_end = to_utc(datetime.strptime(end, '%Y-%m-%d') + timedelta(days=1)) if end else '9999-12-31'
+        return range_start, range_end
+
+    async def export_attendance(self, guild_id: int, file_format: str, session_id: Optional[int] = None,
+                                start: str = '', end: str = '9999-12-31') -> Tuple[str, int]:
+        """Stream matching records into a temporary file, one keyset page per DB job."""
+        await self.signin_queue.flush()
+        fd, path = tempfile.mkstemp(suffix=f".{file_format}")
+        os.close(fd)
+        writer = AttendanceExportWriter(path, file_format)
+        try:
+            for export_session_id in await tenant_db.run(tenant_db.get_guild_session_ids, guild_id, session_id):
+                after = ('', 0)
+                while True:
+                    page = await tenant_db.run(
+                        tenant_db.get_records_page, export_session_id, after, EXPORT_PAGE_SIZE, start, end
+                    )
+                    # Serializing a page (XLSX especially) would otherwise stall the gateway heartbeat
+                    await asyncio.to_thread(writer.write_rows, page)
+                    if len(page) < EXPORT_PAGE_SIZE:
+                        break
+                    after = (page[-1]['ts'], page[-1]['user_id'])
+        finally:
+            await asyncio.to_thread(writer.close)
+        return path, writer.rows
+
+    async def send_export(self, interaction: discord.Interaction, guild_id: int, file_format: str,
+                          session_id: Optional[int] = None, start: str = '', end: str = '9999-12-31'):
+        path, count = await self.export_attendance(guild_id, file_format, session_id, start, end)
+        try:
+            if count == 0:
+                await interaction.followup.send(embed=create_error_embed("⚠️ 沒有符合條件的簽到紀錄"), ephemeral=True)
+                return
+            if os.path.getsize(path) > interaction.guild.filesize_limit:
+                await interaction.followup.send(
+                    embed=create_error_embed("❌ 檔案過大", "匯出檔案超過 Discord 上傳上限，請改用 XLSX 或縮小日期區間。" ),
+                    ephemeral=True
+                )
+                return
+
+            name = f"attendance_{session_id}" if session_id else f"attendance_{guild_id}"
+            embed = create_success_embed("📤 匯出完成", f"共 **{count}** 筆簽到紀錄。" )
+            await interaction.followup.send(
+                embed=embed, file=discord.File(path, filename=f"{name}.{file_format}"), ephemeral=True
+            )
+        finally:
+            os.remove(path)
+
     @app_commands.command(name="signin_summary", description="顯示最新簽到活動的摘要 (已簽到/未簽到)")
-    async def signin_summary(self, interaction: discord.Interaction):
+    @app_commands.describe(output="顯示方式：分頁訊息或 CSV 檔案")
+    async def signin_summary(self, interaction: discord.Interaction, output: Literal['頁面', 'CSV'] = '頁面'):
         await interaction.response.defer()
-        guild_id = interaction.guild.id
+        guild = interaction.guild
 
-        with sqlite3.connect("data/tenant.db") as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM sessions WHERE guild_id = ? ORDER BY id DESC LIMIT 1", (guild_id,))
-            session = cursor.fetchone()
+        session_id = await tenant_db.run(tenant_db.get_latest_session_id, guild.id)
 
-            if not session:
-                await interaction.followup.send(embed=create_error_embed("⚠️ 無簽到記錄"))
-                return
+        if not session_id:
+            await interaction.followup.send(embed=create_error_embed("⚠️ 無簽到記錄"))
+            return
 
-            session_id = session[0]
-            cursor.execute("SELECT user_id FROM records WHERE session_id = ?", (session_id,))
-            signed_in_ids = {row[0] for row in cursor.fetchall()}
+        # Open sessions are answered from memory; closed ones from the DB
+        session = self.active_sessions.get(session_id)
+        if session:
+            signed_in_ids = session.signed_in
+        else:
+            signed_in_ids = await tenant_db.run(tenant_db.get_signed_in_user_ids, session_id)
+
+        member_ids = await self.guild_member_ids(guild)
+        signed_in, not_signed_in = split_attendance(member_ids, signed_in_ids)
+
+        if output == 'CSV':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(['user_id', 'name', 'signed_in'])
+            for ids, status in ((signed_in, 1), (not_signed_in, 0)):
+                for user_id in ids:
+                    member = guild.get_member(user_id)
+                    writer.writerow([user_id, member.display_name if member else '', status])
+            file = discord.File(io.BytesIO(buffer.getvalue().encode('utf-8-sig')), filename=f"signin_summary_{session_id}.csv")
+            embed = create_brand_embed(
+                title=f"📊 簽到摘要 (場次 #{session_id})",
+                description=f"✅ 已簽到 **{len(signed_in)}** 人，❌ 未簽到 **{len(not_signed_in)}** 人，完整名單見附件。"
+            )
+            await interaction.followup.send(embed=embed, file=file)
+            return
 
-        signed_in_members = []
-        not_signed_in_members = []
+        pages = []
+        sections = (("✅ 已簽到", signed_in, "無人簽到"), ("❌ 未簽到", not_signed_in, "全員到齊"))
+        for label, ids, empty_text in sections:
+            for page_ids in chunk(ids):
+                embed = create_brand_embed(
+                    title=f"📊 簽到摘要 (場次 #{session_id})",
+                    description=f"✅ 已簽到 **{len(signed_in)}** 人，❌ 未簽到 **{len(not_signed_in)}** 人"
+                )
+                value = "\n".join(f"<@{user_id}>" for user_id in page_ids) or empty_text
+                embed.add_field(name=f"{label} ({len(ids)})", value=value, inline=False)
+                pages.append(embed)
+
+        paginator = EmbedPaginator(pages, author_id=interaction.user.id)
+        await interaction.followup.send(embed=paginator.current, view=paginator)
+
+    async def guild_member_ids(self, guild: discord.Guild) -> List[int]:
+        """Non-bot member ids, chunking the member list from the gateway on first use."""
+        if not guild.chunked:
+            await guild.chunk()
+        return [member.id for member in guild.members if not member.bot]
+
+    @app_commands.command(name="signin_stats", description="查看出席統計（個人出席率或低於門檻的成員）")
+    @app_commands.describe(member="查看特定成員的出席率", below="列出出席率低於此百分比的成員，例如 70")
+    async def signin_stats(self, interaction: discord.Interaction, member: Optional[discord.Member] = None,
+                           below: Optional[app_commands.Range[int, 1, 100]] = None):
+        await interaction.response.defer()
+        guild = interaction.guild
 
-        for member in interaction.guild.members:
-            if member.bot:
-                continue
-            if member.id in signed_in_ids:
-                signed_in_members.append(f"<@{member.id}>")
-            else:
-                not_signed_in_members.append(f"<@{member.id}>")
+        # Answered from the rollups kept up to date at session close, not from records
+        total_sessions, total_attendances = await tenant_db.run(tenant_db.get_guild_attendance_stats, guild.id)
+        if total_sessions == 0:
+            await interaction.followup.send(embed=create_error_embed("⚠️ 尚無已結束的簽到場次"))
+            return
 
-        embed = create_brand_embed(title=f"📊 簽到摘要 (場次 #{session_id})")
-        
-        signed_in_text = "\n".join(signed_in_members) if signed_in_members else "無人簽到"
-        if len(signed_in_text) > 1024:
-            signed_in_text = f"人數過多，共 {len(signed_in_members)} 人"
-            
-        not_signed_in_text = "\n".join(not_signed_in_members) if not_signed_in_members else "全員到齊"
-        if len(not_signed_in_text) > 1024:
-            not_signed_in_text = f"人數過多，共 {len(not_signed_in_members)} 人"
+        if member:
+            attended = await tenant_db.run(tenant_db.get_member_attendance, guild.id, member.id)
+            embed = create_brand_embed(
+                title="📈 出席統計",
+                description=f"{member.mention} 出席 **{attended} / {total_sessions}** 場，出席率 **{attended / total_sessions:.0%}**。"
+            )
+            await interaction.followup.send(embed=embed)
+            return
 
-        embed.add_field(name=f"✅ 已簽到 ({len(signed_in_members)})", value=signed_in_text, inline=False)
-        embed.add_field(name=f"❌ 未簽到 ({len(not_signed_in_members)})", value=not_signed_in_text, inline=False)
+        if below is not None:
+            attendance = await tenant_db.run(tenant_db.get_guild_member_attendance, guild.id)
+            threshold = below / 100
+            lines = [
+                f"<@{user_id}> — {attendance.get(user_id, 0)} / {total_sessions} ({attendance.get(user_id, 0) / total_sessions:.0%})"
+                for user_id in await self.guild_member_ids(guild)
+                if attendance.get(user_id, 0) / total_sessions < threshold
+            ]
+            # A page of these lines can pass the 1,024-character field limit, so it goes in the description (4,096)
+            pages = [
+                create_brand_embed(
+                    title=f"📉 出席率低於 {below}% 的成員",
+                    description=f"共 **{len(lines)}** 人（已結束場次 {total_sessions} 場）\n\n" + ("\n".join(page_lines) or "無")
+                )
+                for page_lines in chunk(lines)
+            ]
+            paginator = EmbedPaginator(pages, author_id=interaction.user.id)
+            await interaction.followup.send(embed=paginator.current, view=paginator)
+            return
 
+        recent = await tenant_db.run(tenant_db.get_recent_headcounts, guild.id)
+        embed = create_brand_embed(
+            title="📈 出席統計",
+            description=f"已結束場次 **{total_sessions}** 場，平均每場 **{total_attendances / total_sessions:.1f}** 人。"
+        )
+        embed.add_field(
+            name="最近場次人數",
+            value="\n".join(f"場次 #{row['session_id']}：{row['headcount']} 人" for row in recent),
+            inline=False
+        )
         await interaction.followup.send(embed=embed)
 
     # --- Nickname Management Commands ---
@@ -344,41 +603,204 @@ class AttendanceCog(commands.Cog):
             await interaction.response.send_message(embed=create_error_embed("❌ 權限不足", f"我沒有權限修改 {user.mention} 的暱稱。請檢查我的權限設定。" ), ephemeral=True)
 
     @app_commands.command(name="nickname_clear", description="批次清除伺服器成員的暱稱")
-    @app_commands.describe(except_role="此身分組的成員將不會被清除暱稱")
+    @app_commands.describe(except_role="此身分組的成員將不會被清除暱稱", dry_run="只計算需要清除的人數，不實際修改")
     @app_commands.checks.has_permissions(manage_nicknames=True)
-    async def nickname_clear(self, interaction: discord.Interaction, except_role: Optional[discord.Role] = None):
+    async def nickname_clear(self, interaction: discord.Interaction, except_role: Optional[discord.Role] = None, dry_run: bool = False):
         await interaction.response.defer(ephemeral=True, thinking=True)
+        guild = interaction.guild
+        if await self.report_running_bulk_job(interaction, 'nickname_clear'):
+            return
 
-        excluded_members = set(except_role.members) if except_role else set()
-        tasks = []
-        
-        for member in interaction.guild.members:
-            if member.bot or member in excluded_members:
-                continue
-            if member.nick: # Only clear if they have a nickname
-                tasks.append(member.edit(nick=None))
-
-        if not tasks:
+        # Resume an interrupted job from its checkpoint instead of starting over
+        job_id = await tenant_db.run(tenant_db.get_open_bulk_job, guild.id, 'nickname_clear')
+        if job_id:
+            items = [(row['user_id'], row['nick']) for row in await tenant_db.run(tenant_db.get_pending_bulk_items, job_id)]
+        else:
+            if not guild.chunked:
+                await guild.chunk()
+            excluded_ids = {member.id for member in except_role.members} if except_role else set()
+            items = [
+                (member.id, None) for member in guild.members
+                if not member.bot and member.id not in excluded_ids and member.nick  # Only clear if they have a nickname
+            ]
+
+        if not items:
+            if job_id:
+                await tenant_db.run(tenant_db.finish_bulk_job, job_id)
             await interaction.followup.send(embed=create_brand_embed("✨ 無需操作", "沒有需要清除暱稱的成員。" ), ephemeral=True)
             return
 
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        success_count = sum(1 for r in results if not isinstance(r, Exception))
-        fail_count = len(results) - success_count
+        if dry_run:
+            note = "（未完成的上次作業）" if job_id else ""
+            await interaction.followup.send(
+                embed=create_brand_embed("🔍 試算結果", f"將清除 **{len(items)}** 位成員的暱稱{note}，未進行任何修改。" ),
+                ephemeral=True
+            )
+            return
 
-        embed = create_success_embed("🧹 暱稱清除完成", f"成功清除了 **{success_count}** 位成員的暱稱。" )
-        if fail_count > 0:
-            embed.add_field(name="⚠️ 失敗", value=f"有 **{fail_count}** 位成員無法清除，可能是我對他們的權限不足。" )
+        if not job_id:
+            job_id = await tenant_db.run(tenant_db.create_bulk_job, guild.id, 'nickname_clear', items)
 
-        await interaction.followup.send(embed=embed, ephemeral=True)
+        message = await interaction.followup.send(embed=self.bulk_progress_embed(BulkProgress(total=len(items))), ephemeral=True, wait=True)
+
+        async def clear_nick(user_id: int, nick: Optional[str]):
+            member = guild.get_member(user_id) or await guild.fetch_member(user_id)
+            await member.edit(nick=nick)
+
+        def finished(progress: BulkProgress) -> discord.Embed:
+            embed = create_success_embed("🧹 暱稱清除完成", f"成功清除了 **{progress.succeeded}** 位成員的暱稱。" )
+            if progress.failed > 0:
+                embed.add_field(name="⚠️ 失敗", value=f"有 **{progress.failed}** 位成員無法清除，可能是我對他們的權限不足。" )
+            return embed
 
+        # Large guilds take longer than the interaction token lives, so this runs in the background too
+        await self.start_bulk_job('nickname_clear', job_id, guild.id, items, clear_nick, interaction, message, finished)
+
+    @app_commands.command(name="nickname_normalize", description="在背景將不符合暱稱格式的成員批次改名")
+    @app_commands.describe(dry_run="只計算需要改名的人數，不實際修改")
+    @app_commands.checks.has_permissions(manage_nicknames=True)
+    async def nickname_normalize(self, interaction: discord.Interaction, dry_run: bool = False):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        guild = interaction.guild
+        policy = await self.nickname_policy(guild.id)
+        if not policy.enabled:
+            # With renaming off the format is not in force; the default `{name}` would reset every nickname
+            await interaction.followup.send(
+                embed=create_error_embed("⚠️ 自動暱稱管理未啟用", "請先使用 `/attendance_settings set_enabled` 啟用自動暱稱管理，再整理成員暱稱。" ),
+                ephemeral=True
+            )
+            return
+        if await self.report_running_bulk_job(interaction, 'nickname_normalize'):
+            return
+
+        job_id = await tenant_db.run(tenant_db.get_open_bulk_job, guild.id, 'nickname_normalize')
+        if job_id:
+            items = [(row['user_id'], row['nick']) for row in await tenant_db.run(tenant_db.get_pending_bulk_items, job_id)]
+        else:
+            if not guild.chunked:
+                await guild.chunk()
+            items = []
+            for member in guild.members:
+                if member.bot:
+                    continue
+                target = policy.target_for(member)
+                if member.display_name == target:
+                    # Warm the cache so these members skip the check at their next sign-in
+                    self.nickname_policies.mark_compliant(policy, member)
+                else:
+                    items.append((member.id, target))
+
+        if not items:
+            if job_id:
+                await tenant_db.run(tenant_db.finish_bulk_job, job_id)
+            await interaction.followup.send(embed=create_brand_embed("✨ 無需操作", "所有成員的暱稱都已符合格式。" ), ephemeral=True)
+            return
+
+        if dry_run:
+            note = "（未完成的上次作業）" if job_id else ""
+            await interaction.followup.send(
+                embed=create_brand_embed("🔍 試算結果", f"將為 **{len(items)}** 位成員改名{note}，未進行任何修改。" ),
+                ephemeral=True
+            )
+            return
+
+        if not job_id:
+            job_id = await tenant_db.run(tenant_db.create_bulk_job, guild.id, 'nickname_normalize', items)
+
+        message = await interaction.followup.send(embed=self.bulk_progress_embed(BulkProgress(total=len(items))), ephemeral=True, wait=True)
+
+        async def rename(user_id: int, nick: Optional[str]):
+            member = guild.get_member(user_id) or await guild.fetch_member(user_id)
+            await member.edit(nick=nick)
+            self.nickname_policies.mark_compliant(policy, member, nick)
+
+        def finished(progress: BulkProgress) -> discord.Embed:
+            embed = create_success_embed("🏷️ 暱稱整理完成", f"已將 **{progress.succeeded}** 位成員改為符合格式的暱稱。" )
+            if progress.failed > 0:
+                embed.add_field(name="⚠️ 失敗", value=f"有 **{progress.failed}** 位成員無法改名，可能是我對他們的權限不足。" )
+            return embed
+
+        # The job runs throttled in the background so the command returns immediately
+        await self.start_bulk_job('nickname_normalize', job_id, guild.id, items, rename, interaction, message, finished)
+
+    def running_bulk_job(self, guild_id: int, kind: str) -> Optional[Tuple[asyncio.Task, BulkProgress]]:
+        running = self.bulk_jobs.get((guild_id, kind))
+        return running if running and not running[0].done() else None
+
+    async def report_running_bulk_job(self, interaction: discord.Interaction, kind: str) -> bool:
+        """Show the progress of the guild's running ``kind`` job; False if none is running."""
+        running = self.running_bulk_job(interaction.guild.id, kind)
+        if running is None:
+            return False
+        await interaction.followup.send(embed=self.running_bulk_job_embed(running[1]), ephemeral=True)
+        return True
+
+    async def start_bulk_job(self, kind: str, job_id: int, guild_id: int, items: List[Tuple[int, Optional[str]]],
+                             edit: Callable, interaction: discord.Interaction, message: discord.WebhookMessage,
+                             finished: Callable[[BulkProgress], discord.Embed]) -> asyncio.Task:
+        """Run a bulk job in the background, reporting on the followup while its token is valid.
+
+        If the same kind of job started for the guild while this command was
+        preparing, that job is reported instead of running a second worker.
+        """
+        key = (guild_id, kind)
+        running = self.running_bulk_job(guild_id, kind)
+        if running is not None:
+            await message.edit(embed=self.running_bulk_job_embed(running[1]))
+            return running[0]
+
+        token_expires = time.monotonic() + FOLLOWUP_TOKEN_LIFETIME
+        progress = BulkProgress(total=len(items))
+
+        async def report(progress: BulkProgress):
+            if time.monotonic() < token_expires:
+                await message.edit(embed=self.bulk_progress_embed(progress))
+
+        async def run():
+            await self.bulk_editor.run(job_id, ('member_edit', guild_id), items, edit, report, progress)
+            embed = finished(progress)
+            if time.monotonic() < token_expires:
+                try:
+                    await message.edit(embed=embed)
+                    return
+                except discord.HTTPException:
+                    pass
+            # The followup can no longer be edited; tell the invoker in the channel instead
+            if interaction.channel:
+                await interaction.channel.send(content=interaction.user.mention, embed=embed)
+
+        def forget(task: asyncio.Task):
+            if self.bulk_jobs.get(key, (None,))[0] is task:
+                del self.bulk_jobs[key]
+
+        task = asyncio.create_task(run())
+        self.bulk_jobs[key] = (task, progress)
+        task.add_done_callback(forget)
+        return task
+
+    @staticmethod
+    def bulk_progress_embed(progress: BulkProgress) -> discord.Embed:
+        return create_brand_embed("⏳ 批次處理中", f"進度：**{progress.done} / {progress.total}**（失敗 {progress.failed}）")
+
+    @staticmethod
+    def running_bulk_job_embed(progress: BulkProgress) -> discord.Embed:
+        return create_brand_embed(
+            "⏳ 作業已在進行中",
+            f"此伺服器已有相同的批次作業在背景執行，未重複啟動。\n進度：**{progress.done} / {progress.total}**（失敗 {progress.failed}）"
+        )
+
+    @nickname_normalize.error
     @nickname_clear.error
     async def on_nickname_clear_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
         if isinstance(error, app_commands.MissingPermissions):
-            await interaction.response.send_message(embed=create_error_embed("權限不足", "您需要 `管理暱稱` 權限才能使用此指令。" ), ephemeral=True)
+            embed = create_error_embed("權限不足", "您需要 `管理暱稱` 權限才能使用此指令。" )
+        else:
+            embed = create_error_embed("發生未知錯誤", str(error))
+        # Both commands defer first, so later failures must go through the followup
+        if interaction.response.is_done():
+            await interaction.followup.send(embed=embed, ephemeral=True)
         else:
-            await interaction.response.send_message(embed=create_error_embed("發生未知錯誤", str(error)), ephemeral=True)
+            await interaction.response.send_message(embed=embed, ephemeral=True)
 
 
 async def setup(bot):
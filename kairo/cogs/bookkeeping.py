@@ -96,7 +96,7 @@ class BookkeepingLayoutModal(discord.ui.Modal, title='記帳版面設定'):
             start_row=start_row,
             **cols
         )
-        tenant_db.set_bookkeeping_settings(guild_id, new_settings)
+        await tenant_db.run(tenant_db.set_bookkeeping_settings, guild_id, new_settings)
 
         embed = create_success_embed(
             title="✅ 版面設定已儲存",
@@ -136,7 +136,7 @@ class BookkeepingCog(commands.Cog):
         await interaction.response.defer(ephemeral=True)
         guild_id = interaction.guild.id
         user_name = interaction.user.display_name
-        path_or_url = self.get_excel_path_or_url(guild_id)
+        path_or_url = await tenant_db.run(self.get_excel_path_or_url, guild_id)
 
         success = False
         file_info = ""
@@ -146,7 +146,7 @@ class BookkeepingCog(commands.Cog):
             if sheet_id:
                 self.google_sheets.create_journal_sheet(sheet_id)
                 
-                settings = tenant_db.get_bookkeeping_settings(guild_id)
+                settings = await tenant_db.run(tenant_db.get_bookkeeping_settings, guild_id)
                 record_data = {
                     'date': datetime.now().strftime('%Y-%m-%d'),
                     'category': category,
@@ -188,7 +188,7 @@ class BookkeepingCog(commands.Cog):
     async def book_balance(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
         guild_id = interaction.guild.id
-        path_or_url = self.get_excel_path_or_url(guild_id)
+        path_or_url = await tenant_db.run(self.get_excel_path_or_url, guild_id)
 
         balance_info = None
         file_info = ""
@@ -200,7 +200,7 @@ class BookkeepingCog(commands.Cog):
                 if balance is not None:
                     balance_info = {'balance': balance, 'source': 'Google Sheets Summary'}
                 else:
-                    settings = tenant_db.get_bookkeeping_settings(guild_id)
+                    settings = await tenant_db.run(tenant_db.get_bookkeeping_settings, guild_id)
                     balance_info = self.google_sheets.calculate_balance_from_journal(sheet_id, settings.amount_col)
                 file_info = "Google Sheets"
         else:
@@ -244,7 +244,7 @@ class BookkeepingCog(commands.Cog):
             await interaction.followup.send(embed=create_error_embed(title="❌ 無法解析 URL", description="無法從連結中提取 Sheet ID。", guild_name=interaction.guild.name))
             return
 
-        set_guild_google_sheets_url(guild_id, url)
+        await tenant_db.run(set_guild_google_sheets_url, guild_id, url)
         embed = create_success_embed(title="✅ Google Sheets 已設定", description="記帳功能現在會使用指定的 Google Sheets。", guild_name=interaction.guild.name)
         embed.add_field(name="Sheet ID", value=sheet_id, inline=True)
 
@@ -259,7 +259,7 @@ class BookkeepingCog(commands.Cog):
     @app_commands.checks.has_permissions(manage_guild=True)
     async def book_set_layout(self, interaction: discord.Interaction):
         guild_id = interaction.guild.id
-        current_settings = tenant_db.get_bookkeeping_settings(guild_id)
+        current_settings = await tenant_db.run(tenant_db.get_bookkeeping_settings, guild_id)
         modal = BookkeepingLayoutModal(current_settings)
         await interaction.response.send_modal(modal)
 
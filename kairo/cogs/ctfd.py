@@ -3,8 +3,8 @@ from discord.ext import commands
 from discord import app_commands
 from ..utils.brand import create_brand_embed, create_success_embed, create_error_embed
 from ..utils.tenant import tenant_db, CryptoManager
-import sqlite3
-import requests
+from ..utils.ctfd import CTFdClient
+import asyncio
 import os
 
 class CTFdCog(commands.Cog):
@@ -21,46 +21,40 @@ class CTFdCog(commands.Cog):
         else:
             print("CTFd 模組警告: 未設定 MASTER_KEY_BASE64，將以受限模式運行")
             self.crypto = None
+        # Non-blocking, with one keep-alive pool per CTFd instance
+        self.http = CTFdClient()
 
-    def get_guild_ctfd_config(self, guild_id: int):
+    async def cog_unload(self):
+        await self.http.close()
+
+    async def get_guild_ctfd_config(self, guild_id: int):
         """Get CTFd configuration for guild"""
         if not self.crypto:
             return None
 
-        with sqlite3.connect("data/tenant.db") as conn:
-            cursor = conn.execute("""
-                SELECT ctfd_base_url, ciphertext_ctfd_token, ctfd_push_mode,
-                       ctfd_award_name, ctfd_award_category
-                FROM org_configs WHERE guild_id = ?
-            """, (guild_id,))
-            row = cursor.fetchone()
+        row = await tenant_db.run(tenant_db.get_ctfd_config, guild_id)
 
-            if not row or not row[0] or not row[1]:
-                return None
+        if not row or not row['ctfd_base_url'] or not row['ciphertext_ctfd_token']:
+            return None
 
-            try:
-                token = self.crypto.decrypt(row[1])
-                return {
-                    'base_url': row[0].rstrip('/'),
-                    'token': token,
-                    'push_mode': row[2] or 'award',
-                    'award_name': row[3] or 'Discord QA',
-                    'award_category': row[4] or 'discord'
-                }
-            except:
-                return None
+        try:
+            token = self.crypto.decrypt(row['ciphertext_ctfd_token'])
+            return {
+                'base_url': row['ctfd_base_url'].rstrip('/'),
+                'token': token,
+                'push_mode': row['ctfd_push_mode'] or 'award',
+                'award_name': row['ctfd_award_name'] or 'Discord QA',
+                'award_category': row['ctfd_award_category'] or 'discord'
+            }
+        except:
+            return None
 
     async def make_ctfd_request(self, config, method: str, endpoint: str, **kwargs):
         """Make authenticated request to CTFd API"""
-        url = f"{config['base_url']}/api/v1{endpoint}"
-        headers = {
-            'Authorization': f"Token {config['token']}",
-            'Content-Type': 'application/json'
-        }
-
         try:
-            response = requests.request(method, url, headers=headers, timeout=10, **kwargs)
-            return response
+            return await self.http.request(config['base_url'], config['token'], method, endpoint, **kwargs)
+        except asyncio.TimeoutError:
+            raise Exception("CTFd API 請求逾時")
         except Exception as e:
             raise Exception(f"CTFd API 請求失敗: {str(e)}")
 
@@ -71,7 +65,7 @@ class CTFdCog(commands.Cog):
         user_id = interaction.user.id
 
         # Get CTFd config
-        config = self.get_guild_ctfd_config(guild_id)
+        config = await self.get_guild_ctfd_config(guild_id)
         if not config:
             await interaction.response.send_message(
                 embed=create_error_embed(
@@ -105,11 +99,7 @@ class CTFdCog(commands.Cog):
             return
 
         # Save binding
-        with sqlite3.connect("data/tenant.db") as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO ctfd_links (guild_id, discord_user_id, email, ctfd_user_id)
-                VALUES (?, ?, ?, ?)
-            """, (guild_id, user_id, email, ctfd_user_id))
+        await tenant_db.run(tenant_db.set_ctfd_link, guild_id, user_id, email, ctfd_user_id)
 
         embed = create_success_embed(
             title="✅ 綁定成功",
@@ -130,7 +120,7 @@ class CTFdCog(commands.Cog):
         guild_id = interaction.guild.id
 
         # Get CTFd config
-        config = self.get_guild_ctfd_config(guild_id)
+        config = await self.get_guild_ctfd_config(guild_id)
         if not config:
             await interaction.response.send_message(
                 embed=create_error_embed(
@@ -185,22 +175,15 @@ class CTFdCog(commands.Cog):
 
     async def award_ctfd_points(self, guild_id: int, user_id: int, points: int):
         """Award points to user on CTFd platform"""
-        config = self.get_guild_ctfd_config(guild_id)
+        config = await self.get_guild_ctfd_config(guild_id)
         if not config or config['push_mode'] != 'award':
             return False
 
         # Get user's CTFd binding
-        with sqlite3.connect("data/tenant.db") as conn:
-            cursor = conn.execute(
-                "SELECT ctfd_user_id FROM ctfd_links WHERE guild_id = ? AND discord_user_id = ?",
-                (guild_id, user_id)
-            )
-            row = cursor.fetchone()
+        ctfd_user_id = await tenant_db.run(tenant_db.get_ctfd_link, guild_id, user_id)
 
-            if not row or not row[0]:
-                return False
-
-            ctfd_user_id = row[0]
+        if not ctfd_user_id:
+            return False
 
         try:
             # Create award
@@ -2,8 +2,8 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from ..utils.brand import create_brand_embed, create_success_embed, create_error_embed
-from ..utils.tenant import tenant_db
-from ..utils.visibility import is_super_admin
+from ..utils.tenant import tenant_db, MODULES
+from ..utils.visibility import is_super_admin, get_visible_commands_for_guild
 import os
 
 REVIEW_CHANNEL_ID = int(os.getenv('REVIEW_CHANNEL_ID', '1416406590411509860'))
@@ -28,7 +28,7 @@ class ModulesAdminCog(commands.Cog):
         if not guild:
             return
 
-        registration = tenant_db.get_registration_status(guild_id)
+        registration = await tenant_db.run(tenant_db.get_registration_status, guild_id)
         if not registration:
             return
 
@@ -98,8 +98,8 @@ class ModulesAdminCog(commands.Cog):
             return
 
         # Update status
-        tenant_db.set_registration_status(gid, 'approved')
-        tenant_db.enable_default_modules(gid)
+        await tenant_db.run(tenant_db.set_registration_status, gid, 'approved')
+        await tenant_db.run(tenant_db.enable_default_modules, gid)
 
         await interaction.response.send_message(
             embed=create_success_embed(
@@ -143,7 +143,7 @@ class ModulesAdminCog(commands.Cog):
             return
 
         # Update status
-        tenant_db.set_registration_status(gid, 'needs_more_info', reason)
+        await tenant_db.run(tenant_db.set_registration_status, gid, 'needs_more_info', reason)
 
         await interaction.response.send_message(
             embed=create_success_embed(
@@ -187,7 +187,7 @@ class ModulesAdminCog(commands.Cog):
             return
 
         # Update status
-        tenant_db.set_registration_status(gid, 'declined', reason)
+        await tenant_db.run(tenant_db.set_registration_status, gid, 'declined', reason)
 
         await interaction.response.send_message(
             embed=create_success_embed(
@@ -231,7 +231,7 @@ class ModulesAdminCog(commands.Cog):
             )
             return
 
-        tenant_db.set_module_enabled(gid, module, True)
+        await tenant_db.run(tenant_db.set_module_enabled, gid, module, True)
 
         await interaction.response.send_message(
             embed=create_success_embed(
@@ -272,7 +272,7 @@ class ModulesAdminCog(commands.Cog):
             )
             return
 
-        tenant_db.set_module_enabled(gid, module, False)
+        await tenant_db.run(tenant_db.set_module_enabled, gid, module, False)
 
         await interaction.response.send_message(
             embed=create_success_embed(
@@ -309,11 +309,9 @@ class ModulesAdminCog(commands.Cog):
             )
             return
 
-        enabled_modules = tenant_db.get_enabled_modules(gid)
-        all_modules = ['attendance', 'plans', 'qa', 'crypto', 'bookkeeping', 'ctfd', 'routing']
-
+        enabled_modules = await tenant_db.run(tenant_db.get_enabled_modules, gid)
         module_status = []
-        for module in all_modules:
+        for module in MODULES:
             status = "✅" if module in enabled_modules else "❌"
             module_status.append(f"{status} {module}")
 
@@ -336,18 +334,7 @@ class ModulesAdminCog(commands.Cog):
             )
             return
 
-        import sqlite3
-
-        with sqlite3.connect("data/tenant.db") as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute("""
-                SELECT guild_id, status, school, club_name, responsible_person,
-                       responsible_discord_id, club_type, applied_at, reason
-                FROM registration_status
-                ORDER BY applied_at DESC
-"""
-            )
-            registrations = cursor.fetchall()
+        registrations = await tenant_db.run(tenant_db.list_registrations)
 
         if not registrations:
             embed = create_brand_embed(
@@ -477,22 +464,19 @@ class ModulesAdminCog(commands.Cog):
             )
             return
 
-        from utils.visibility import get_visible_commands_for_guild
-        from utils.tenant import tenant_db
-
         # 取得 guild 資訊
         guild = self.bot.get_guild(gid)
         guild_name = guild.name if guild else f"Guild {gid}"
 
         # 取得註冊狀態
-        registration = tenant_db.get_registration_status(gid)
+        registration = await tenant_db.run(tenant_db.get_registration_status, gid)
         status = registration.get('status', 'none') if registration else 'none'
 
         # 取得可見指令
-        visible_commands = get_visible_commands_for_guild(gid)
+        visible_commands = await tenant_db.run(get_visible_commands_for_guild, gid)
 
         # 取得已啟用模組
-        enabled_modules = tenant_db.get_enabled_modules(gid)
+        enabled_modules = await tenant_db.run(tenant_db.get_enabled_modules, gid)
 
         embed = create_brand_embed(
             title=f"🔍 Guild 指令檢查",
@@ -4,7 +4,6 @@ from discord import app_commands
 from ..utils.brand import create_brand_embed, create_success_embed, create_error_embed
 from ..utils.tenant import tenant_db
 from datetime import datetime
-import sqlite3
 
 class PlansCog(commands.Cog):
     def __init__(self, bot):
@@ -17,28 +16,22 @@ class PlansCog(commands.Cog):
 
     async def send_plan_notification(self, guild_id: int, week: str, group: str, content: str):
         """Send plan notification to routing channel if configured"""
-        with sqlite3.connect("data/tenant.db") as conn:
-            cursor = conn.execute(
-                "SELECT channel_id FROM routing WHERE guild_id = ? AND key = 'plan_status'",
-                (guild_id,)
-            )
-            row = cursor.fetchone()
-
-            if row:
-                channel_id = row[0]
-                channel = self.bot.get_channel(channel_id)
-                if channel:
-                    embed = create_brand_embed(
-                        title="📚 新課綱發布",
-                        description=f"**週次：** {week}\n**組別：** {group}",
-                        guild_name=channel.guild.name
-                    )
-                    embed.add_field(name="課程內容", value=content[:1000] + ("..." if len(content) > 1000 else ""), inline=False)
-
-                    try:
-                        await channel.send(embed=embed)
-                    except:
-                        pass  # Ignore if sending fails
+        channel_id = await tenant_db.run(tenant_db.get_routing, guild_id, 'plan_status')
+
+        if channel_id:
+            channel = self.bot.get_channel(channel_id)
+            if channel:
+                embed = create_brand_embed(
+                    title="📚 新課綱發布",
+                    description=f"**週次：** {week}\n**組別：** {group}",
+                    guild_name=channel.guild.name
+                )
+                embed.add_field(name="課程內容", value=content[:1000] + ("..." if len(content) > 1000 else ""), inline=False)
+
+                try:
+                    await channel.send(embed=embed)
+                except:
+                    pass  # Ignore if sending fails
 
     @app_commands.command(name="plan_set", description="設定週課綱")
     @app_commands.describe(
@@ -71,11 +64,7 @@ class PlansCog(commands.Cog):
             return
 
         # Save plan
-        with sqlite3.connect("data/tenant.db") as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO plans (guild_id, week_key, group_name, content)
-                VALUES (?, ?, ?, ?)
-            """, (guild_id, week, group, content))
+        await tenant_db.run(tenant_db.set_plan, guild_id, week, group, content)
 
         embed = create_success_embed(
             title="✅ 課綱已設定",
@@ -108,23 +97,12 @@ class PlansCog(commands.Cog):
 
         # If no group specified, get user's group
         if not group:
-            with sqlite3.connect("data/tenant.db") as conn:
-                cursor = conn.execute(
-                    "SELECT group_name FROM plan_groups WHERE guild_id = ? AND user_id = ?",
-                    (guild_id, user_id)
-                )
-                row = cursor.fetchone()
-                group = row[0] if row else "default"
+            group = await tenant_db.run(tenant_db.get_plan_group, guild_id, user_id) or "default"
 
         # Get plan content
-        with sqlite3.connect("data/tenant.db") as conn:
-            cursor = conn.execute(
-                "SELECT content FROM plans WHERE guild_id = ? AND week_key = ? AND group_name = ?",
-                (guild_id, week, group)
-            )
-            row = cursor.fetchone()
+        content = await tenant_db.run(tenant_db.get_plan, guild_id, week, group)
 
-        if not row:
+        if content is None:
             embed = create_error_embed(
                 title="📚 無課綱",
                 description=f"**週次：** {week}\n**組別：** {group}\n\n尚未設定此週課綱。",
@@ -133,7 +111,7 @@ class PlansCog(commands.Cog):
         else:
             embed = create_brand_embed(
                 title=f"📚 週課綱 ({week})",
-                description=row[0],
+                description=content,
                 guild_name=interaction.guild.name
             )
             embed.add_field(name="組別", value=group, inline=True)
@@ -166,11 +144,7 @@ class PlansCog(commands.Cog):
             return
 
         # Set group
-        with sqlite3.connect("data/tenant.db") as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO plan_groups (guild_id, user_id, group_name)
-                VALUES (?, ?, ?)
-            """, (guild_id, member.id, group))
+        await tenant_db.run(tenant_db.set_plan_group, guild_id, member.id, group)
 
         embed = create_success_embed(
             title="✅ 組別已設定",
@@ -2,16 +2,43 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from ..utils.brand import create_brand_embed, create_success_embed, create_error_embed
-from ..utils.tenant import tenant_db
-import sqlite3
-import json
-import os
+from ..utils.tenant import tenant_db, QAQuestion
+from ..utils.qa import QA_FILE_FORMATS, QA_IMPORT_MAX_BYTES, QAExportWriter, import_legacy_bank, import_question_file
+from ..utils.answers import AnswerMatcher
+from ..utils.leaderboard import Entry, Leaderboards
+from ..utils.scores import ScoreAccumulator, QA_SCORE_FLUSH_INTERVAL
+from ..utils.contest import Contest, Contests, SolveQueue
+from ..utils.signin import ExpiryScheduler
+from ..utils.ratelimit import SlidingWindowLimiter
+from ..utils.attempts import AttemptLog, QA_ATTEMPT_LIMIT, QA_ATTEMPT_WINDOW
+from ..utils.paginator import EmbedPaginator, chunk
+from datetime import datetime, timedelta
+import asyncio
 import io
+import os
+import tempfile
+from typing import List, Literal, Optional, Tuple
+
+# Choice label -> AnswerMatcher mode
+MATCH_MODE_CHOICES = {'精確': 'exact', '寬鬆': 'normalize', '模糊': 'fuzzy'}
+SCOREBOARD_PAGE_SIZE = 10
+SCOREBOARD_MAX_ENTRIES = 100
+SCOREBOARD_NEIGHBORS = 5
+# Choice label -> contest scoring rule
+CONTEST_SCORING_CHOICES = {'固定': 'fixed', '首殺加成': 'first_blood', '遞減': 'decay'}
+# Contest answers always merge score writes, even when QA_SCORE_FLUSH_INTERVAL is 0
+CONTEST_SCORE_FLUSH_INTERVAL = 0.05
+QA_EXPORT_PAGE_SIZE = 500
+# Import errors listed in the reply; the rest are only counted
+QA_IMPORT_ERRORS_SHOWN = 15
+QA_STATS_PAGE_SIZE = 15
 
 class QAAnswerModal(discord.ui.Modal):
-    def __init__(self, question_data):
-        super().__init__(title=f"回答問題: {question_data['title'][:30]}...")
+    def __init__(self, question_data: QAQuestion, contest_id: Optional[int] = None):
+        super().__init__(title=f"回答問題: {question_data.title[:30]}...")
         self.question_data = question_data
+        # Set when the question was posted for a contest; such answers never fall back to normal scoring
+        self.contest_id = contest_id
 
         self.answer = discord.ui.TextInput(
             label="您的答案",
@@ -26,29 +53,36 @@ class QAAnswerModal(discord.ui.Modal):
     async def on_submit(self, interaction: discord.Interaction):
         guild_id = interaction.guild.id
         user_id = interaction.user.id
-        user_answer = self.answer.value.strip().lower()
+        qa_cog = interaction.client.get_cog('QACog')
 
-        # Check answers (case-insensitive, whitespace ignored)
-        correct_answers = [ans.strip().lower() for ans in self.question_data['answers']]
-        is_correct = any(user_answer == correct_ans for correct_ans in correct_answers)
+        # Throttled before matching, so scripted guessing costs neither pattern work nor DB writes
+        key = (guild_id, user_id, self.question_data.id)
+        if not qa_cog.attempt_limiter.hit(key):
+            embed = create_error_embed(
+                "⏳ 作答過於頻繁",
+                f"請於 {qa_cog.attempt_limiter.retry_after(key):.0f} 秒後再回答此題。",
+                guild_name=interaction.guild.name
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        # Answers were compiled when the question was loaded; this is a set lookup in the common case
+        is_correct = self.question_data.matcher.matches(self.answer.value)
+        qa_cog.attempt_log.submit(guild_id, self.question_data.id, user_id, is_correct)
+
+        if self.contest_id is not None:
+            contest = qa_cog.contests.get_open(guild_id)
+            if contest is None or contest.contest_id != self.contest_id:
+                embed = create_error_embed("⏰ 競賽已結束", "此題所屬的競賽已經結束。", guild_name=interaction.guild.name)
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+                return
+            await self.submit_contest_answer(interaction, qa_cog, contest, is_correct)
+            return
 
         if is_correct:
             # Add points
-            points = self.question_data['points']
-            with sqlite3.connect("data/tenant.db") as conn:
-                conn.execute("""
-                    INSERT OR IGNORE INTO scores (guild_id, user_id, score) VALUES (?, ?, 0)
-                """, (guild_id, user_id))
-                conn.execute("""
-                    UPDATE scores SET score = score + ? WHERE guild_id = ? AND user_id = ?
-                """, (points, guild_id, user_id))
-
-                # Get new total score
-                cursor = conn.execute(
-                    "SELECT score FROM scores WHERE guild_id = ? AND user_id = ?",
-                    (guild_id, user_id)
-                )
-                new_score = cursor.fetchone()[0]
+            points = self.question_data.points
+            new_score = await qa_cog.add_score(guild_id, user_id, points)
 
             embed = create_success_embed(
                 title="🎉 答對了！",
@@ -65,18 +99,18 @@ class QAAnswerModal(discord.ui.Modal):
         else:
             embed = create_error_embed(
                 title="❌ 答錯了",
-                description=f"正確答案：{' / '.join(self.question_data['answers'])}",
+                description=f"正確答案：{' / '.join(self.question_data.answers)}",
                 guild_name=interaction.guild.name
             )
 
         # Handle long content
         if len(embed.description) > 2000:
             # Create file attachment
-            file_content = f"題目: {self.question_data['title']}\n"
+            file_content = f"題目: {self.question_data.title}\n"
             file_content += f"您的答案: {self.answer.value}\n"
             file_content += f"結果: {'正確' if is_correct else '錯誤'}\n"
             if not is_correct:
-                file_content += f"正確答案: {' / '.join(self.question_data['answers'])}\n"
+                file_content += f"正確答案: {' / '.join(self.question_data.answers)}\n"
             if is_correct:
                 file_content += f"獲得分數: +{points}\n總分數: {new_score}\n"
 
@@ -86,6 +120,38 @@ class QAAnswerModal(discord.ui.Modal):
         else:
             await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    async def submit_contest_answer(self, interaction: discord.Interaction, qa_cog: "QACog", contest: Contest, is_correct: bool):
+        """Contest answers: one scoring solve per user and question, no answers revealed."""
+        question = self.question_data
+        user_id = interaction.user.id
+        if contest.has_solved(question.id, user_id):
+            embed = create_error_embed("⚠️ 已解出", "您在本場競賽已解出此題。", guild_name=interaction.guild.name)
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        if not is_correct:
+            embed = create_error_embed("❌ 答錯了", "再試一次吧！", guild_name=interaction.guild.name)
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        # Claimed synchronously in memory, so concurrent correct answers cannot both score
+        award = contest.award(question.id, user_id, question.points)
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        qa_cog.solve_queue.submit(contest.contest_id, question.id, user_id, award.points)
+        new_score = await qa_cog.add_score(interaction.guild.id, user_id, award.points, batched=True)
+
+        title = "🩸 首殺！" if award.first_blood else "🎉 答對了！"
+        embed = create_success_embed(
+            title=title,
+            description=f"**第 {award.solve_number} 位解出**\n**獲得分數：** +{award.points}\n**總分數：** {new_score}",
+            guild_name=interaction.guild.name
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+        try:
+            await self.sync_ctfd_award(interaction, award.points)
+        except:
+            pass  # Ignore CTFd sync errors
+
     async def sync_ctfd_award(self, interaction: discord.Interaction, points: int):
         """Try to sync award to CTFd"""
         try:
@@ -102,47 +168,77 @@ class QAAnswerModal(discord.ui.Modal):
 class QACog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.qa_bank_file = "data/qa_bank.json"
-        self.ensure_qa_bank_exists()
-
-    def ensure_qa_bank_exists(self):
-        """Ensure QA bank file exists"""
-        os.makedirs("data", exist_ok=True)
-        if not os.path.exists(self.qa_bank_file):
-            with open(self.qa_bank_file, 'w', encoding='utf-8') as f:
-                json.dump([], f, ensure_ascii=False, indent=2)
-
-    def load_qa_bank(self):
-        """Load QA bank from file"""
-        try:
-            with open(self.qa_bank_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return []
-
-    def save_qa_bank(self, questions):
-        """Save QA bank to file"""
-        with open(self.qa_bank_file, 'w', encoding='utf-8') as f:
-            json.dump(questions, f, ensure_ascii=False, indent=2)
-
-    def get_next_question_id(self, questions):
-        """Get next available question ID"""
-        if not questions:
-            return 1
-        return max(q.get('id', 0) for q in questions) + 1
+        self.leaderboards = Leaderboards()
+        # Merges score writes for contests, and for every answer when QA_SCORE_FLUSH_INTERVAL is set;
+        # otherwise each answer is one UPSERT
+        self.score_accumulator = ScoreAccumulator(tenant_db, QA_SCORE_FLUSH_INTERVAL or CONTEST_SCORE_FLUSH_INTERVAL)
+        self.contests = Contests()
+        self.solve_queue = SolveQueue(tenant_db)
+        self.contest_expiry = ExpiryScheduler(self.expire_contest)
+        self.attempt_limiter = SlidingWindowLimiter(QA_ATTEMPT_LIMIT, QA_ATTEMPT_WINDOW)
+        self.attempt_log = AttemptLog(tenant_db)
+
+    async def cog_load(self):
+        # One-time move of the old shared data/qa_bank.json into the per-guild table
+        imported = await tenant_db.run(import_legacy_bank, tenant_db)
+        if imported:
+            print(f"已將舊版題庫匯入資料庫：{imported} 題")
+        # Scoreboards are served from memory; every score change after this updates them in place
+        self.leaderboards.load(await tenant_db.run(tenant_db.get_all_scores))
+        # Open contests and who solved what come back in one query
+        self.contests.load(await tenant_db.run(tenant_db.get_active_qa_contests))
+        for contest in self.contests:
+            self.contest_expiry.schedule(contest.contest_id, contest.ends_at)
+        self.score_accumulator.start()
+        self.solve_queue.start()
+        self.attempt_log.start()
+        self.contest_expiry.start()
+
+    async def cog_unload(self):
+        # Runs on bot shutdown as well; writes out every queued solve, attempt and merged increment
+        await self.contest_expiry.stop()
+        await self.solve_queue.stop()
+        await self.attempt_log.stop()
+        await self.score_accumulator.stop()
+
+    async def add_score(self, guild_id: int, user_id: int, points: int, batched: bool = False) -> int:
+        """Persist points, update the in-memory leaderboard and return the new total."""
+        if batched or QA_SCORE_FLUSH_INTERVAL > 0:
+            total = await self.score_accumulator.add(guild_id, user_id, points)
+        else:
+            total = await tenant_db.run(tenant_db.add_score, guild_id, user_id, points)
+        self.leaderboards.set(guild_id, user_id, total)
+        return total
+
+    async def end_contest(self, guild_id: int) -> Optional[Contest]:
+        """Close the guild's contest and write out its queued solves."""
+        contest = self.contests.remove(guild_id)
+        if contest is None:
+            return None
+        self.contest_expiry.cancel(contest.contest_id)
+        await self.solve_queue.flush()
+        await tenant_db.run(tenant_db.end_qa_contest, contest.contest_id)
+        return contest
+
+    async def expire_contest(self, contest_id: int):
+        contest = self.contests.find(contest_id)
+        if contest:
+            await self.end_contest(contest.guild_id)
 
     @app_commands.command(name="qa_add", description="新增題目")
     @app_commands.describe(
         title="題目標題",
-        answer="答案（用 ; 分隔多個答案）",
-        points="分數"
+        answer="答案（用 ; 分隔多個答案，以 re: 開頭表示正規表示式，例如 re:flag\\{.+\\}）",
+        points="分數",
+        match_mode="比對方式：精確（忽略大小寫）、寬鬆（另忽略全半形與多餘空白）、模糊（容許少量錯字）"
     )
     async def qa_add(
         self,
         interaction: discord.Interaction,
         title: str,
         answer: str,
-        points: int
+        points: int,
+        match_mode: Literal['精確', '寬鬆', '模糊'] = '精確'
     ):
         # Check permission
         if not interaction.user.guild_permissions.manage_messages:
@@ -170,34 +266,155 @@ class QACog(commands.Cog):
             )
             return
 
-        # Load and update QA bank
-        questions = self.load_qa_bank()
-        question_id = self.get_next_question_id(questions)
-
-        new_question = {
-            "id": question_id,
-            "title": title,
-            "answers": answers,
-            "points": points
-        }
+        # Reject broken patterns now rather than at answer time
+        mode = MATCH_MODE_CHOICES[match_mode]
+        try:
+            AnswerMatcher(answers, mode)
+        except ValueError as e:
+            await interaction.response.send_message(
+                embed=create_error_embed(
+                    title="❌ 答案格式錯誤",
+                    description=f"正規表示式無效：{e}",
+                    guild_name=interaction.guild.name
+                ),
+                ephemeral=True
+            )
+            return
 
-        questions.append(new_question)
-        self.save_qa_bank(questions)
+        question_id = await tenant_db.run(tenant_db.add_qa_question, interaction.guild.id, title, answers, points, mode)
 
         embed = create_success_embed(
             title="✅ 題目已新增",
-            description=f"**ID：** {question_id}\n**標題：** {title}\n**分數：** {points}",
+            description=f"**ID：** {question_id}\n**標題：** {title}\n**分數：** {points}\n**比對方式：** {match_mode}",
             guild_name=interaction.guild.name
         )
         embed.add_field(name="答案", value=" / ".join(answers), inline=False)
 
         await interaction.response.send_message(embed=embed)
 
+    @app_commands.command(name="qa_import", description="從 CSV/JSON/NDJSON 檔案批次匯入題目")
+    @app_commands.describe(file="題庫檔案，欄位為 title、answers、points、match_mode（選填）；匯入的題目會取得新的 ID")
+    async def qa_import(self, interaction: discord.Interaction, file: discord.Attachment):
+        if not interaction.user.guild_permissions.manage_messages:
+            await interaction.response.send_message(
+                embed=create_error_embed(
+                    title="❌ 權限不足",
+                    description="只有管理員可以匯入題目。",
+                    guild_name=interaction.guild.name
+                ),
+                ephemeral=True
+            )
+            return
+
+        file_format = os.path.splitext(file.filename)[1].lstrip('.').lower()
+        if file_format not in QA_FILE_FORMATS:
+            await interaction.response.send_message(
+                embed=create_error_embed(
+                    title="❌ 檔案格式錯誤",
+                    description="請上傳 .csv、.json 或 .ndjson 檔案。",
+                    guild_name=interaction.guild.name
+                ),
+                ephemeral=True
+            )
+            return
+
+        if file.size > QA_IMPORT_MAX_BYTES:
+            await interaction.response.send_message(
+                embed=create_error_embed(
+                    title="❌ 檔案過大",
+                    description=f"匯入檔案最大為 {QA_IMPORT_MAX_BYTES // (1024 * 1024)} MB，請分成多個檔案匯入。",
+                    guild_name=interaction.guild.name
+                ),
+                ephemeral=True
+            )
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        fd, path = tempfile.mkstemp(suffix=f".{file_format}")
+        os.close(fd)
+        try:
+            await file.save(path)
+            question_ids, errors = await tenant_db.run(
+                import_question_file, tenant_db, interaction.guild.id, path, file_format
+            )
+        except ValueError as e:
+            await interaction.followup.send(
+                embed=create_error_embed("❌ 檔案無法解析", f"{e}\n未匯入任何題目。", guild_name=interaction.guild.name),
+                ephemeral=True
+            )
+            return
+        finally:
+            os.remove(path)
+
+        description = f"成功匯入 **{len(question_ids)}** 題"
+        if question_ids:
+            description += f"（ID {question_ids[0]}–{question_ids[-1]}）"
+        embed = create_success_embed("📥 匯入完成", description + "。", guild_name=interaction.guild.name)
+        if errors:
+            lines = [f"第 {row_number} 列：{message}" for row_number, message in errors[:QA_IMPORT_ERRORS_SHOWN]]
+            if len(errors) > QA_IMPORT_ERRORS_SHOWN:
+                lines.append(f"…另有 {len(errors) - QA_IMPORT_ERRORS_SHOWN} 列")
+            embed.add_field(name=f"⚠️ 略過 {len(errors)} 列", value="\n".join(lines)[:1024], inline=False)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    async def export_questions(self, guild_id: int, file_format: str) -> Tuple[str, int]:
+        """Stream the guild's bank into a temporary file, one keyset page per DB job."""
+        fd, path = tempfile.mkstemp(suffix=f".{file_format}")
+        os.close(fd)
+        writer = QAExportWriter(path, file_format)
+        try:
+            after_id = 0
+            while True:
+                page = await tenant_db.run(tenant_db.get_qa_questions_page, guild_id, after_id, QA_EXPORT_PAGE_SIZE)
+                await asyncio.to_thread(writer.write_rows, page)
+                if len(page) < QA_EXPORT_PAGE_SIZE:
+                    break
+                after_id = page[-1]['id']
+        finally:
+            await asyncio.to_thread(writer.close)
+        return path, writer.rows
+
+    @app_commands.command(name="qa_export", description="匯出題庫 (CSV/JSON/NDJSON)")
+    @app_commands.describe(file_format="檔案格式")
+    async def qa_export(self, interaction: discord.Interaction, file_format: Literal['CSV', 'JSON', 'NDJSON'] = 'CSV'):
+        # The export contains every answer
+        if not interaction.user.guild_permissions.manage_messages:
+            await interaction.response.send_message(
+                embed=create_error_embed(
+                    title="❌ 權限不足",
+                    description="只有管理員可以匯出題庫。",
+                    guild_name=interaction.guild.name
+                ),
+                ephemeral=True
+            )
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        guild = interaction.guild
+        path, count = await self.export_questions(guild.id, file_format.lower())
+        try:
+            if count == 0:
+                await interaction.followup.send(embed=create_error_embed("⚠️ 題庫是空的", guild_name=guild.name), ephemeral=True)
+                return
+            if os.path.getsize(path) > guild.filesize_limit:
+                await interaction.followup.send(
+                    embed=create_error_embed("❌ 檔案過大", "匯出檔案超過 Discord 上傳上限。", guild_name=guild.name),
+                    ephemeral=True
+                )
+                return
+
+            await interaction.followup.send(
+                embed=create_success_embed("📤 匯出完成", f"共 **{count}** 題。", guild_name=guild.name),
+                file=discord.File(path, filename=f"qa_bank_{guild.id}.{file_format.lower()}"),
+                ephemeral=True
+            )
+        finally:
+            os.remove(path)
+
     @app_commands.command(name="qa_ask", description="出題")
     @app_commands.describe(qid="題目ID")
     async def qa_ask(self, interaction: discord.Interaction, qid: int):
-        questions = self.load_qa_bank()
-        question = next((q for q in questions if q.get('id') == qid), None)
+        question = await tenant_db.run(tenant_db.get_qa_question, interaction.guild.id, qid)
 
         if not question:
             await interaction.response.send_message(
@@ -213,59 +430,189 @@ class QACog(commands.Cog):
         # Create question embed
         embed = create_brand_embed(
             title=f"📝 題目 #{qid}",
-            description=question['title'],
+            description=question.title,
             guild_name=interaction.guild.name
         )
-        embed.add_field(name="分數", value=f"{question['points']} 分", inline=True)
-
-        # Create modal for answer
-        modal = QAAnswerModal(question)
+        embed.add_field(name="分數", value=f"{question.points} 分", inline=True)
 
         # Check if question is too long for embed
-        if len(question['title']) > 2000:
+        file = None
+        if len(question.title) > 2000:
             # Send as attachment
-            file_content = f"題目 #{qid}\n\n{question['title']}\n\n分數: {question['points']} 分"
+            file_content = f"題目 #{qid}\n\n{question.title}\n\n分數: {question.points} 分"
             file = discord.File(io.StringIO(file_content), filename=f"question_{qid}.txt")
             embed.description = "題目內容過長，請見附件。"
+
+        # During a contest everyone answers through one shared button until the contest ends
+        contest = self.contests.get_open(interaction.guild.id)
+        if contest:
+            embed.add_field(name="競賽", value=f"結束於 <t:{int(contest.ends_at.timestamp())}:R>", inline=True)
+            timeout = (contest.ends_at - datetime.now()).total_seconds()
+            view = QAAnswerView(question, timeout, contest.contest_id)
+            if file:
+                await interaction.response.send_message(embed=embed, file=file, view=view)
+            else:
+                await interaction.response.send_message(embed=embed, view=view)
+            return
+
+        # Create modal for answer
+        modal = QAAnswerModal(question)
+
+        if file:
             await interaction.response.send_message(embed=embed, file=file)
             await interaction.followup.send("請點擊按鈕回答:", view=QAAnswerView(question), ephemeral=True)
         else:
             await interaction.response.send_modal(modal)
 
-    @app_commands.command(name="qa_scoreboard", description="顯示排行榜")
-    async def qa_scoreboard(self, interaction: discord.Interaction):
+    @app_commands.command(name="qa_contest_start", description="開始限時問答競賽")
+    @app_commands.describe(minutes="競賽時間（分鐘）", scoring="計分方式：固定、首殺加成（第一位解出者額外加分）、遞減（越晚解出分數越低）")
+    async def qa_contest_start(self, interaction: discord.Interaction, minutes: app_commands.Range[int, 1, 1440] = 60,
+                               scoring: Literal['固定', '首殺加成', '遞減'] = '固定'):
+        if not interaction.user.guild_permissions.manage_messages:
+            await interaction.response.send_message(
+                embed=create_error_embed(
+                    title="❌ 權限不足",
+                    description="只有管理員可以開始競賽。",
+                    guild_name=interaction.guild.name
+                ),
+                ephemeral=True
+            )
+            return
+
         guild_id = interaction.guild.id
+        await self.end_contest(guild_id)
+        starts_at = datetime.now()
+        ends_at = starts_at + timedelta(minutes=minutes)
+        rule = CONTEST_SCORING_CHOICES[scoring]
+        contest_id = await tenant_db.run(tenant_db.create_qa_contest, guild_id, rule, starts_at, ends_at)
+        self.contests.add(Contest(contest_id, guild_id, rule, starts_at, ends_at))
+        self.contest_expiry.schedule(contest_id, ends_at)
+
+        embed = create_success_embed(
+            title="🏁 問答競賽開始",
+            description=f"**計分方式：** {scoring}\n**結束時間：** <t:{int(ends_at.timestamp())}:R>\n"
+                        "競賽期間使用 `/qa_ask` 出的題目，所有人都可以作答，每題只計分一次。",
+            guild_name=interaction.guild.name
+        )
+        await interaction.response.send_message(embed=embed)
 
-        with sqlite3.connect("data/tenant.db") as conn:
-            cursor = conn.execute("""
-                SELECT user_id, score FROM scores
-                WHERE guild_id = ? AND score > 0
-                ORDER BY score DESC LIMIT 10
-            """, (guild_id,))
-            scores = cursor.fetchall()
+    @app_commands.command(name="qa_contest_end", description="結束目前的問答競賽")
+    async def qa_contest_end(self, interaction: discord.Interaction):
+        if not interaction.user.guild_permissions.manage_messages:
+            await interaction.response.send_message(
+                embed=create_error_embed(
+                    title="❌ 權限不足",
+                    description="只有管理員可以結束競賽。",
+                    guild_name=interaction.guild.name
+                ),
+                ephemeral=True
+            )
+            return
 
-        if not scores:
+        contest = await self.end_contest(interaction.guild.id)
+        if contest is None:
+            await interaction.response.send_message(
+                embed=create_error_embed("❌ 沒有進行中的競賽", "目前沒有可結束的競賽。", guild_name=interaction.guild.name),
+                ephemeral=True
+            )
+            return
+
+        counts = contest.solve_counts()
+        embed = create_success_embed(
+            title="🏁 問答競賽結束",
+            description=f"共 **{len(counts)}** 題被解出，總解題次數 **{sum(counts.values())}**。\n使用 `/qa_scoreboard` 查看排行榜。",
+            guild_name=interaction.guild.name
+        )
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="qa_scoreboard", description="顯示排行榜")
+    @app_commands.describe(view="排行榜：前 100 名（分頁）；我的排名：您前後的名次")
+    async def qa_scoreboard(self, interaction: discord.Interaction, view: Literal['排行榜', '我的排名'] = '排行榜'):
+        board = self.leaderboards.get(interaction.guild.id)
+        user_id = interaction.user.id
+
+        if not len(board):
             embed = create_brand_embed(
                 title="🏆 排行榜",
                 description="目前還沒有分數記錄。",
                 guild_name=interaction.guild.name
             )
-        else:
-            leaderboard = []
-            for i, (user_id, score) in enumerate(scores, 1):
-                user = interaction.guild.get_member(user_id)
-                username = user.display_name if user else f"User {user_id}"
+            await interaction.response.send_message(embed=embed)
+            return
 
-                medal = ["🥇", "🥈", "🥉"][i-1] if i <= 3 else f"{i}."
-                leaderboard.append(f"{medal} **{username}** - {score} 分")
+        rank = board.rank(user_id)
+        my_rank = f"第 **{rank}** 名，{board.score(user_id)} 分" if rank else "您目前還沒有分數。"
 
+        if view == '我的排名':
+            entries = board.around(user_id, SCOREBOARD_NEIGHBORS)
             embed = create_brand_embed(
-                title="🏆 排行榜 (Top 10)",
-                description="\n".join(leaderboard),
+                title="🏆 我的排名",
+                description="\n".join(self.format_entries(entries, user_id)) or my_rank,
                 guild_name=interaction.guild.name
             )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
 
-        await interaction.response.send_message(embed=embed)
+        entries = board.top(SCOREBOARD_MAX_ENTRIES)
+        pages = []
+        for page in chunk(entries, SCOREBOARD_PAGE_SIZE):
+            embed = create_brand_embed(
+                title=f"🏆 排行榜 (Top {len(entries)})",
+                description="\n".join(self.format_entries(page, user_id)),
+                guild_name=interaction.guild.name
+            )
+            embed.add_field(name="我的排名", value=my_rank, inline=False)
+            pages.append(embed)
+
+        paginator = EmbedPaginator(pages, author_id=user_id)
+        await interaction.response.send_message(embed=paginator.current, view=paginator)
+
+    @app_commands.command(name="qa_stats", description="顯示各題作答統計與答對率")
+    async def qa_stats(self, interaction: discord.Interaction):
+        if not interaction.user.guild_permissions.manage_messages:
+            await interaction.response.send_message(
+                embed=create_error_embed(
+                    title="❌ 權限不足",
+                    description="只有管理員可以查看作答統計。",
+                    guild_name=interaction.guild.name
+                ),
+                ephemeral=True
+            )
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        stats = await self.attempt_log.stats(interaction.guild.id)
+        if not stats:
+            await interaction.followup.send(
+                embed=create_brand_embed(title="📊 作答統計", description="目前還沒有作答紀錄。", guild_name=interaction.guild.name),
+                ephemeral=True
+            )
+            return
+
+        pages = []
+        for page in chunk(stats, QA_STATS_PAGE_SIZE):
+            lines = [
+                f"**#{s.question_id}** 答對率 {s.solve_rate:.0%}（{s.solvers}/{s.attempters} 人，共 {s.attempts} 次作答）"
+                for s in page
+            ]
+            pages.append(create_brand_embed(
+                title=f"📊 作答統計（{len(stats)} 題）",
+                description="\n".join(lines),
+                guild_name=interaction.guild.name
+            ))
+
+        paginator = EmbedPaginator(pages, author_id=interaction.user.id)
+        await interaction.followup.send(embed=paginator.current, view=paginator, ephemeral=True)
+
+    @staticmethod
+    def format_entries(entries: List[Entry], highlight: Optional[int] = None) -> List[str]:
+        # Mentions render as names client-side, so no member lookups are needed
+        lines = []
+        for user_id, score, rank in entries:
+            medal = ["🥇", "🥈", "🥉"][rank - 1] if rank <= 3 else f"{rank}."
+            marker = " ⬅️" if user_id == highlight else ""
+            lines.append(f"{medal} <@{user_id}> - {score} 分{marker}")
+        return lines
 
     @app_commands.command(name="qa_reset", description="重置所有分數")
     async def qa_reset(self, interaction: discord.Interaction):
@@ -282,8 +629,10 @@ class QACog(commands.Cog):
 
         guild_id = interaction.guild.id
 
-        with sqlite3.connect("data/tenant.db") as conn:
-            conn.execute("DELETE FROM scores WHERE guild_id = ?", (guild_id,))
+        # Merged increments still waiting would otherwise be written after the reset and bring points back
+        await self.score_accumulator.discard(guild_id)
+        await tenant_db.run(tenant_db.reset_scores, guild_id)
+        self.leaderboards.reset(guild_id)
 
         embed = create_success_embed(
             title="🗑️ 分數已重置",
@@ -295,13 +644,14 @@ class QACog(commands.Cog):
 
 class QAAnswerView(discord.ui.View):
     """View for handling QA answers when question is sent as file"""
-    def __init__(self, question_data):
-        super().__init__(timeout=300)
+    def __init__(self, question_data: QAQuestion, timeout: float = 300, contest_id: Optional[int] = None):
+        super().__init__(timeout=timeout)
         self.question_data = question_data
+        self.contest_id = contest_id
 
     @discord.ui.button(label="回答問題", style=discord.ButtonStyle.primary, emoji="✍️")
     async def answer_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        modal = QAAnswerModal(self.question_data)
+        modal = QAAnswerModal(self.question_data, self.contest_id)
         await interaction.response.send_modal(modal)
 
 async def setup(bot):
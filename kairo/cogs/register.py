@@ -72,7 +72,8 @@ class RegistrationModal(discord.ui.Modal):
             return
 
         # Save registration
-        tenant_db.save_registration(
+        await tenant_db.run(
+            tenant_db.save_registration,
             guild_id=guild.id,
             school=self.school.value,
             club_name=self.club_name.value,
@@ -133,7 +134,7 @@ class RegisterCog(commands.Cog):
             return
 
         # Check current status
-        registration = tenant_db.get_registration_status(guild.id)
+        registration = await tenant_db.run(tenant_db.get_registration_status, guild.id)
         if registration and registration.get('status') not in ['none', 'declined']:
             await interaction.response.send_message(
                 embed=create_brand_embed(
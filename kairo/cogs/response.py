@@ -27,7 +27,7 @@ class ResponseModal(discord.ui.Modal):
             return
 
         # Update status to pending
-        tenant_db.set_registration_status(guild.id, 'pending')
+        await tenant_db.run(tenant_db.set_registration_status, guild.id, 'pending')
 
         # Update status embed
         status_embed = create_brand_embed(
@@ -36,7 +36,7 @@ class ResponseModal(discord.ui.Modal):
             guild_name=guild.name
         )
 
-        registration = tenant_db.get_registration_status(guild.id)
+        registration = await tenant_db.run(tenant_db.get_registration_status, guild.id)
         if registration:
             status_embed.add_field(name="申請資訊", value=f"""
 **學校：** {registration.get('school', 'N/A')}
@@ -87,7 +87,7 @@ class ResponseCog(commands.Cog):
         if not guild:
             return
 
-        registration = tenant_db.get_registration_status(guild.id)
+        registration = await tenant_db.run(tenant_db.get_registration_status, guild.id)
         if not registration or registration.get('status') != 'needs_more_info':
             await interaction.response.send_message(
                 embed=create_brand_embed(
@@ -2,7 +2,7 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from ..utils.brand import create_brand_embed, create_success_embed, create_error_embed
-import sqlite3
+from ..utils.tenant import tenant_db
 
 class RoutingCog(commands.Cog):
     def __init__(self, bot):
@@ -34,11 +34,7 @@ class RoutingCog(commands.Cog):
         guild_id = interaction.guild.id
 
         # Save routing
-        with sqlite3.connect("data/tenant.db") as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO routing (guild_id, key, channel_id)
-                VALUES (?, ?, ?)
-            """, (guild_id, key, channel.id))
+        await tenant_db.run(tenant_db.set_routing, guild_id, key, channel.id)
 
         embed = create_success_embed(
             title="✅ 路由已設定",
@@ -57,63 +53,54 @@ class RoutingCog(commands.Cog):
     ):
         guild_id = interaction.guild.id
 
-        with sqlite3.connect("data/tenant.db") as conn:
-            if key:
-                # Get specific routing
-                cursor = conn.execute(
-                    "SELECT channel_id FROM routing WHERE guild_id = ? AND key = ?",
-                    (guild_id, key)
-                )
-                row = cursor.fetchone()
+        if key:
+            # Get specific routing
+            channel_id = await tenant_db.run(tenant_db.get_routing, guild_id, key)
 
-                if row:
-                    channel = self.bot.get_channel(row[0])
-                    if channel:
-                        embed = create_brand_embed(
-                            title="🔗 頻道路由",
-                            description=f"**功能：** {key}\n**頻道：** {channel.mention}",
-                            guild_name=interaction.guild.name
-                        )
-                    else:
-                        embed = create_error_embed(
-                            title="⚠️ 頻道不存在",
-                            description=f"功能 {key} 設定的頻道已被刪除。",
-                            guild_name=interaction.guild.name
-                        )
+            if channel_id:
+                channel = self.bot.get_channel(channel_id)
+                if channel:
+                    embed = create_brand_embed(
+                        title="🔗 頻道路由",
+                        description=f"**功能：** {key}\n**頻道：** {channel.mention}",
+                        guild_name=interaction.guild.name
+                    )
                 else:
                     embed = create_error_embed(
-                        title="❌ 未設定路由",
-                        description=f"功能 {key} 尚未設定對應頻道。",
+                        title="⚠️ 頻道不存在",
+                        description=f"功能 {key} 設定的頻道已被刪除。",
                         guild_name=interaction.guild.name
                     )
             else:
-                # Get all routing
-                cursor = conn.execute(
-                    "SELECT key, channel_id FROM routing WHERE guild_id = ?",
-                    (guild_id,)
+                embed = create_error_embed(
+                    title="❌ 未設定路由",
+                    description=f"功能 {key} 尚未設定對應頻道。",
+                    guild_name=interaction.guild.name
                 )
-                rows = cursor.fetchall()
-
-                if rows:
-                    routing_list = []
-                    for route_key, channel_id in rows:
-                        channel = self.bot.get_channel(channel_id)
-                        if channel:
-                            routing_list.append(f"**{route_key}:** {channel.mention}")
-                        else:
-                            routing_list.append(f"**{route_key}:** ❌ 已刪除")
+        else:
+            # Get all routing
+            routes = await tenant_db.run(tenant_db.get_all_routing, guild_id)
+
+            if routes:
+                routing_list = []
+                for route_key, channel_id in routes.items():
+                    channel = self.bot.get_channel(channel_id)
+                    if channel:
+                        routing_list.append(f"**{route_key}:** {channel.mention}")
+                    else:
+                        routing_list.append(f"**{route_key}:** ❌ 已刪除")
 
-                    embed = create_brand_embed(
-                        title="🔗 所有頻道路由",
-                        description="\n".join(routing_list),
-                        guild_name=interaction.guild.name
-                    )
-                else:
-                    embed = create_brand_embed(
-                        title="🔗 頻道路由",
-                        description="尚未設定任何路由。",
-                        guild_name=interaction.guild.name
-                    )
+                embed = create_brand_embed(
+                    title="🔗 所有頻道路由",
+                    description="\n".join(routing_list),
+                    guild_name=interaction.guild.name
+                )
+            else:
+                embed = create_brand_embed(
+                    title="🔗 頻道路由",
+                    description="尚未設定任何路由。",
+                    guild_name=interaction.guild.name
+                )
 
         await interaction.response.send_message(embed=embed)
 
@@ -138,30 +125,19 @@ class RoutingCog(commands.Cog):
 
         guild_id = interaction.guild.id
 
-        with sqlite3.connect("data/tenant.db") as conn:
-            # Check if routing exists
-            cursor = conn.execute(
-                "SELECT 1 FROM routing WHERE guild_id = ? AND key = ?",
-                (guild_id, key)
-            )
-            exists = cursor.fetchone()
+        # Remove routing
+        removed = await tenant_db.run(tenant_db.delete_routing, guild_id, key)
 
-            if not exists:
-                await interaction.response.send_message(
-                    embed=create_error_embed(
-                        title="❌ 路由不存在",
-                        description=f"功能 {key} 沒有設定路由。",
-                        guild_name=interaction.guild.name
-                    ),
-                    ephemeral=True
-                )
-                return
-
-            # Remove routing
-            conn.execute(
-                "DELETE FROM routing WHERE guild_id = ? AND key = ?",
-                (guild_id, key)
+        if not removed:
+            await interaction.response.send_message(
+                embed=create_error_embed(
+                    title="❌ 路由不存在",
+                    description=f"功能 {key} 沒有設定路由。",
+                    guild_name=interaction.guild.name
+                ),
+                ephemeral=True
             )
+            return
 
         embed = create_success_embed(
             title="🗑️ 路由已移除",
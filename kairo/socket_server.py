@@ -4,7 +4,9 @@ import logging
 import asyncio
 import os
 import sys
+import json
 from bot_main import main as bot_main
+from kairo.utils.tenant import tenant_db
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,6 +19,8 @@ def handle_client(client_socket, addr):
 
         if data == "ping":
             response = "pong"
+        elif data == "stats":
+            response = json.dumps(tenant_db.cache_stats())
         else:
             response = "ok"
 
@@ -0,0 +1,52 @@
+import unittest
+from ..utils.answers import AnswerMatcher, edit_distance, normalize
+
+class TestAnswerMatcher(unittest.TestCase):
+    def test_exact_mode_ignores_case_and_padding(self):
+        """Test the default mode keeps the old strip + lower-case comparison"""
+        matcher = AnswerMatcher(["Paris", " Lyon "])
+        self.assertTrue(matcher.matches("  paris\n"))
+        self.assertTrue(matcher.matches("LYON"))
+        self.assertFalse(matcher.matches("par is"))
+        self.assertFalse(matcher.matches("Ｐａｒｉｓ"))
+
+    def test_normalize_mode(self):
+        """Test NFKC folding and whitespace collapsing"""
+        matcher = AnswerMatcher(["hello world"], "normalize")
+        self.assertTrue(matcher.matches("ＨＥＬＬＯ　  world"))
+        self.assertEqual(normalize("a \t b", "normalize"), "a b")
+
+    def test_regex_answers(self):
+        """Test re: answers are compiled once and must match the whole answer"""
+        matcher = AnswerMatcher([r"re:flag\{[a-z0-9_]+\}", "plain"])
+        self.assertEqual(len(matcher.patterns), 1)
+        self.assertTrue(matcher.matches(" flag{s0me_flag} "))
+        self.assertFalse(matcher.matches("flag{x} trailing"))
+        self.assertTrue(matcher.matches("PLAIN"))
+        with self.assertRaises(ValueError):
+            AnswerMatcher(["re:flag{("])
+
+    def test_regex_verdicts_do_not_depend_on_submission_order(self):
+        """Test a cached verdict for one casing never decides another casing"""
+        for order in (["FLAG{abc}", "flag{abc}"], ["flag{abc}", "FLAG{abc}"]):
+            matcher = AnswerMatcher([r"re:flag\{[a-z]+\}"])
+            verdicts = {answer: matcher.matches(answer) for answer in order}
+            self.assertEqual(verdicts, {"flag{abc}": True, "FLAG{abc}": False})
+
+    def test_fuzzy_mode(self):
+        """Test small typos pass in fuzzy mode, scaled to the answer length"""
+        matcher = AnswerMatcher(["photosynthesis", "ox"], "fuzzy")
+        self.assertTrue(matcher.matches("photosinthesis"))
+        self.assertTrue(matcher.matches("photosynthesys"))
+        self.assertFalse(matcher.matches("photo"))
+        self.assertTrue(matcher.matches("ax"))
+        self.assertFalse(matcher.matches("dog"))
+
+    def test_edit_distance(self):
+        """Test Levenshtein distance with the early cut-off"""
+        self.assertEqual(edit_distance("kitten", "sitting", 5), 3)
+        self.assertEqual(edit_distance("kitten", "sitting", 1), 2)
+        self.assertEqual(edit_distance("", "abc", 5), 3)
+
+if __name__ == '__main__':
+    unittest.main()
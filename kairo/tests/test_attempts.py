@@ -0,0 +1,55 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from ..utils.tenant import tenant_db
+from ..utils.attempts import AttemptLog, QuestionStats
+
+class TestAttemptLog(unittest.TestCase):
+    def setUp(self):
+        """Set up test database"""
+        self.test_db_path = tempfile.mktemp()
+        tenant_db.db_path = self.test_db_path
+        tenant_db.init_db()
+
+    def tearDown(self):
+        """Clean up test database"""
+        tenant_db.close()
+        if os.path.exists(self.test_db_path):
+            os.remove(self.test_db_path)
+
+    def test_batched_append_and_stats(self):
+        """Test queued attempts are written in batches and counted per question"""
+        async def scenario():
+            log = AttemptLog(tenant_db, max_batch=2)
+            for question_id, user_id, correct in [(1, 10, False), (1, 10, True), (1, 11, False), (2, 10, True)]:
+                log.submit(1, question_id, user_id, correct)
+            log.submit(2, 1, 10, True)
+            stats = await log.stats(1)
+            return log, stats
+
+        log, stats = asyncio.run(scenario())
+        self.assertEqual((log.flushed, log.batches, len(log)), (5, 3, 0))
+        self.assertEqual(stats, [QuestionStats(1, 3, 2, 1), QuestionStats(2, 1, 1, 1)])
+        self.assertEqual(stats[0].solve_rate, 0.5)
+        self.assertEqual(tenant_db.get_qa_attempt_stats(3), [])
+
+    def test_failed_flush_keeps_attempts(self):
+        """Test a failed batch is put back for the next flush"""
+        async def scenario():
+            log = AttemptLog(tenant_db)
+            log.submit(1, 1, 10, False)
+            original = tenant_db.record_qa_attempts
+            tenant_db.record_qa_attempts = lambda rows: (_ for _ in ()).throw(RuntimeError("locked"))
+            try:
+                with self.assertRaises(RuntimeError):
+                    await log.flush()
+            finally:
+                tenant_db.record_qa_attempts = original
+            self.assertEqual(len(log), 1)
+            return await log.flush()
+
+        self.assertEqual(asyncio.run(scenario()), 1)
+
+if __name__ == '__main__':
+    unittest.main()
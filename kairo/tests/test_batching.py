@@ -0,0 +1,68 @@
+import unittest
+import asyncio
+from ..utils.batching import BatchWriter
+
+class RecordingWriter(BatchWriter):
+    def __init__(self, max_batch=2):
+        super().__init__(db=None, flush_interval=0, max_batch=max_batch)
+        self.batches_written = []
+        self.fail = False
+
+    async def write(self, rows):
+        if self.fail:
+            raise RuntimeError("locked")
+        self.batches_written.append(list(rows))
+        return len(rows)
+
+class SummingWriter(RecordingWriter):
+    merge_duplicates = True
+
+    def merge(self, queued, row):
+        return queued + row
+
+class TestBatchWriter(unittest.TestCase):
+    def test_keyed_rows_deduped(self):
+        """Test a keyed row is refused while the same key is queued"""
+        writer = RecordingWriter()
+        self.assertTrue(writer.enqueue("a", key=1))
+        self.assertFalse(writer.enqueue("again", key=1))
+        self.assertTrue(writer.enqueue("b"))
+        self.assertTrue(writer.enqueue("b"))
+        self.assertEqual(len(writer), 3)
+
+    def test_failed_batch_requeued_in_order(self):
+        """Test a failed batch goes back ahead of newer rows and is written in order"""
+        async def scenario():
+            writer = RecordingWriter()
+            for row in "abc":
+                writer.enqueue(row)
+            writer.fail = True
+            with self.assertRaises(RuntimeError):
+                await writer.flush()
+            writer.enqueue("d")
+            writer.fail = False
+            self.assertEqual(await writer.flush(), 4)
+            return writer
+
+        writer = asyncio.run(scenario())
+        self.assertEqual(writer.batches_written, [["a", "b"], ["c", "d"]])
+        self.assertEqual((writer.flushed, writer.batches, len(writer)), (4, 2, 0))
+
+    def test_merging_writer_combines_rows(self):
+        """Test merged rows combine while queued and with a failed batch on requeue"""
+        async def scenario():
+            writer = SummingWriter()
+            writer.enqueue(1, key="a")
+            self.assertTrue(writer.enqueue(2, key="a"))
+            writer.fail = True
+            with self.assertRaises(RuntimeError):
+                await writer.flush()
+            writer.enqueue(4, key="a")
+            writer.fail = False
+            await writer.flush()
+            return writer
+
+        self.assertEqual(asyncio.run(scenario()).batches_written, [[7]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from ..utils.tenant import tenant_db
+from ..bench_signin import run_benchmark
+
+class TestSigninBenchmark(unittest.TestCase):
+    def setUp(self):
+        """Set up test database"""
+        self.test_db_path = tempfile.mktemp()
+        tenant_db.db_path = self.test_db_path
+        tenant_db.init_db()
+
+    def tearDown(self):
+        """Clean up test database"""
+        tenant_db.close()
+        if os.path.exists(self.test_db_path):
+            os.remove(self.test_db_path)
+
+    def test_storm_loses_and_duplicates_nothing(self):
+        """Test a small click storm through the real cog stores every sign-in exactly once"""
+        result = asyncio.run(run_benchmark(users=200, seconds=0.2, repeat_rate=0.3, seed=1))
+
+        self.assertGreater(result.clicks, 200)
+        self.assertEqual(len(result.latencies), result.clicks)
+        self.assertEqual(len(result.acknowledged), 200)
+        self.assertEqual((result.lost, result.duplicates), (0, 0))
+
+    def test_renames_counted_once(self):
+        """Test renaming during sign-in still records each member once"""
+        result = asyncio.run(run_benchmark(users=30, seconds=0.05, rename=True, edit_rate=1000, seed=2))
+        self.assertEqual((result.lost, result.duplicates), (0, 0))
+        self.assertEqual(len(result.stored_ids), 30)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from ..utils.tenant import tenant_db
+from ..utils.ratelimit import RouteLimiter
+from ..utils.bulk import BulkMemberEditor, BulkProgress
+
+class TestBulkMemberEditor(unittest.TestCase):
+    def setUp(self):
+        """Set up test database"""
+        self.test_db_path = tempfile.mktemp()
+        tenant_db.db_path = self.test_db_path
+        tenant_db.init_db()
+        self.limiter = RouteLimiter(rate=10000.0, capacity=100)
+
+    def tearDown(self):
+        """Clean up test database"""
+        tenant_db.close()
+        if os.path.exists(self.test_db_path):
+            os.remove(self.test_db_path)
+
+    def test_bounded_concurrency_and_failures(self):
+        """Test edits never exceed the concurrency limit and failures are counted"""
+        items = [(user_id, None) for user_id in range(40)]
+        job_id = tenant_db.create_bulk_job(1, "nickname_clear", items)
+        editor = BulkMemberEditor(tenant_db, self.limiter, concurrency=3, checkpoint_every=5)
+        running, peak = 0, 0
+
+        async def edit(user_id, nick):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+            if user_id % 10 == 0:
+                raise RuntimeError("forbidden")
+
+        progress = asyncio.run(editor.run(job_id, ("member_edit", 1), items, edit))
+
+        self.assertEqual(peak, 3)
+        self.assertEqual((progress.done, progress.failed, progress.succeeded), (40, 4, 36))
+        self.assertEqual(tenant_db.get_pending_bulk_items(job_id), [])
+        self.assertIsNone(tenant_db.get_open_bulk_job(1, "nickname_clear"))
+
+    def test_resume_after_interruption(self):
+        """Test a cancelled job keeps its checkpoint and resumes the remaining items"""
+        items = [(user_id, None) for user_id in range(20)]
+        job_id = tenant_db.create_bulk_job(1, "nickname_clear", items)
+        editor = BulkMemberEditor(tenant_db, self.limiter, concurrency=1, checkpoint_every=1)
+        edited = []
+
+        async def crash_after_eight(user_id, nick):
+            if len(edited) == 8:
+                raise asyncio.CancelledError()
+            edited.append(user_id)
+
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(editor.run(job_id, ("member_edit", 1), items, crash_after_eight))
+
+        self.assertEqual(tenant_db.get_open_bulk_job(1, "nickname_clear"), job_id)
+        remaining = [(row["user_id"], row["nick"]) for row in tenant_db.get_pending_bulk_items(job_id)]
+        self.assertEqual(len(remaining), 12)
+
+        async def edit(user_id, nick):
+            edited.append(user_id)
+
+        asyncio.run(editor.run(job_id, ("member_edit", 1), remaining, edit))
+        self.assertEqual(sorted(edited), list(range(20)))
+
+    def test_progress_reported(self):
+        """Test the progress callback receives running totals"""
+        items = [(user_id, "nick") for user_id in range(10)]
+        job_id = tenant_db.create_bulk_job(1, "rename", items)
+        editor = BulkMemberEditor(tenant_db, self.limiter, concurrency=2, progress_interval=0)
+        reports = []
+
+        async def edit(user_id, nick):
+            pass
+
+        async def on_progress(progress):
+            reports.append(progress.done)
+
+        asyncio.run(editor.run(job_id, ("member_edit", 1), items, edit, on_progress))
+        self.assertEqual(reports[-1], 10)
+
+    def test_caller_progress_is_updated_in_place(self):
+        """Test a progress object passed in is the one the job updates and returns"""
+        items = [(user_id, None) for user_id in range(6)]
+        job_id = tenant_db.create_bulk_job(1, "nickname_clear", items)
+        editor = BulkMemberEditor(tenant_db, self.limiter, concurrency=2)
+        progress = BulkProgress(total=len(items))
+
+        async def edit(user_id, nick):
+            if user_id == 3:
+                raise RuntimeError("forbidden")
+
+        self.assertIs(asyncio.run(editor.run(job_id, ("member_edit", 1), items, edit, progress=progress)), progress)
+        self.assertEqual((progress.done, progress.failed), (6, 1))
+
+if __name__ == '__main__':
+    unittest.main()
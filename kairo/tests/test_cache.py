@@ -0,0 +1,53 @@
+import unittest
+from ..utils.cache import TTLCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestTTLCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TTLCache(maxsize=2, ttl=10, clock=self.clock)
+
+    def test_hit_and_miss_counters(self):
+        """Test hits and misses are counted"""
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.set("a", 1)
+        self.assertEqual(self.cache.get("a"), 1)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_entries_expire(self):
+        """Test entries expire after ttl seconds"""
+        self.cache.set("a", 1)
+        self.clock.now = 10
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first"""
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_get_or_load_caches_none(self):
+        """Test a loaded None is cached rather than reloaded"""
+        calls = []
+        load = lambda: calls.append(1)
+        self.cache.get_or_load("a", load)
+        self.cache.get_or_load("a", load)
+        self.assertEqual(len(calls), 1)
+
+if __name__ == '__main__':
+    unittest.main()
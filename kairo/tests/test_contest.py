@@ -0,0 +1,78 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta
+from ..utils.tenant import tenant_db
+from ..utils.contest import Contest, Contests, SolveQueue, contest_points
+
+class TestContestScoring(unittest.TestCase):
+    def test_contest_points(self):
+        """Test fixed, first-blood and decaying points"""
+        self.assertEqual([contest_points("fixed", 100, n) for n in (1, 2)], [100, 100])
+        self.assertEqual([contest_points("first_blood", 100, n) for n in (1, 2)], [150, 100])
+        self.assertEqual([contest_points("decay", 100, n) for n in (1, 2, 3)], [100, 90, 81])
+        self.assertEqual(contest_points("decay", 100, 50), 30)
+
+    def test_duplicate_solves_rejected(self):
+        """Test each user scores a question once and solve numbers count up"""
+        now = datetime.now()
+        contest = Contest(1, 10, "first_blood", now - timedelta(minutes=1), now + timedelta(minutes=5))
+        first = contest.award(7, 100, 20)
+        self.assertTrue(first.first_blood)
+        self.assertEqual(first.points, 30)
+        self.assertIsNone(contest.award(7, 100, 20))
+        second = contest.award(7, 101, 20)
+        self.assertEqual((second.solve_number, second.points), (2, 20))
+        self.assertTrue(contest.has_solved(7, 101))
+        self.assertEqual(contest.solve_counts(), {7: 2})
+        self.assertTrue(contest.is_open(now))
+        self.assertFalse(contest.is_open(now + timedelta(minutes=10)))
+
+class TestContestPersistence(unittest.TestCase):
+    def setUp(self):
+        """Set up test database"""
+        self.test_db_path = tempfile.mktemp()
+        tenant_db.db_path = self.test_db_path
+        tenant_db.init_db()
+
+    def tearDown(self):
+        """Clean up test database"""
+        tenant_db.close()
+        if os.path.exists(self.test_db_path):
+            os.remove(self.test_db_path)
+
+    def test_solves_batched_and_reloaded(self):
+        """Test queued solves are written in one batch and restore the solved sets"""
+        now = datetime.now()
+        contest_id = tenant_db.create_qa_contest(10, "decay", now, now + timedelta(hours=1))
+        tenant_db.create_qa_contest(20, "fixed", now, now + timedelta(hours=1))
+
+        async def scenario():
+            queue = SolveQueue(tenant_db)
+            for user_id in range(100):
+                queue.submit(contest_id, 1, user_id, 10)
+            queue.submit(contest_id, 2, 5, 10)
+            self.assertEqual(await queue.flush(), 101)
+            return queue
+
+        queue = asyncio.run(scenario())
+        self.assertEqual(queue.batches, 1)
+
+        contests = Contests()
+        contests.load(tenant_db.get_active_qa_contests())
+        restored = contests.get(10)
+        self.assertEqual(restored.contest_id, contest_id)
+        self.assertEqual(restored.solve_counts(), {1: 100, 2: 1})
+        self.assertEqual(contests.get(20).solve_counts(), {})
+        self.assertIsNone(restored.award(1, 42, 10))
+
+        # A new contest closes the previous one
+        newer = tenant_db.create_qa_contest(10, "fixed", now, now + timedelta(hours=1))
+        contests.load(tenant_db.get_active_qa_contests())
+        self.assertEqual(contests.get(10).contest_id, newer)
+        self.assertTrue(tenant_db.end_qa_contest(newer))
+        self.assertFalse(tenant_db.end_qa_contest(newer))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import asyncio
+from aiohttp import web
+from ..utils.ctfd import CTFdClient
+
+class TestCTFdClient(unittest.TestCase):
+    """Runs against a local aiohttp server standing in for CTFd, so no network is needed"""
+
+    async def start_server(self):
+        self.peers = []
+
+        async def scoreboard(request):
+            self.peers.append(request.transport.get_extra_info('peername'))
+            return web.json_response({'data': [{'name': 'alice', 'score': 100}], 'auth': request.headers['Authorization']})
+
+        async def slow(request):
+            await asyncio.sleep(0.5)
+            return web.json_response({})
+
+        app = web.Application()
+        app.router.add_get('/api/v1/scoreboard', scoreboard)
+        app.router.add_get('/api/v1/slow', slow)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        return runner, f"http://127.0.0.1:{port}"
+
+    def test_requests_share_one_pooled_connection(self):
+        """Test repeated calls to one base_url reuse the same session and kept-alive connection"""
+        async def scenario():
+            runner, base_url = await self.start_server()
+            client = CTFdClient()
+            try:
+                responses = [await client.request(base_url, "secret", 'GET', '/scoreboard') for _ in range(3)]
+                self.assertIs(client.session(base_url), client.session(base_url))
+                self.assertEqual(len(client), 1)
+                return responses
+            finally:
+                await client.close()
+                await runner.cleanup()
+
+        responses = asyncio.run(scenario())
+        self.assertEqual([response.status_code for response in responses], [200] * 3)
+        self.assertEqual(responses[0].json()['data'][0]['name'], 'alice')
+        self.assertEqual(responses[0].json()['auth'], "Token secret")
+        self.assertEqual(len(set(self.peers)), 1)
+
+    def test_read_timeout(self):
+        """Test a server slower than the read timeout fails instead of hanging"""
+        async def scenario():
+            runner, base_url = await self.start_server()
+            client = CTFdClient(read_timeout=0.1)
+            try:
+                with self.assertRaises(asyncio.TimeoutError):
+                    await client.request(base_url, "secret", 'GET', '/slow')
+            finally:
+                await client.close()
+                await runner.cleanup()
+
+        asyncio.run(scenario())
+
+if __name__ == '__main__':
+    unittest.main()
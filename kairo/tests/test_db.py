@@ -0,0 +1,91 @@
+import unittest
+import asyncio
+import os
+import tempfile
+import threading
+from ..utils.db import ConnectionManager, DatabaseExecutor
+
+class TestConnectionManager(unittest.TestCase):
+    def setUp(self):
+        """Set up a fresh database file"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.manager = ConnectionManager(os.path.join(self.tmpdir.name, "tenant.db"))
+
+    def tearDown(self):
+        self.manager.close_all()
+        self.tmpdir.cleanup()
+
+    def test_pragmas_applied(self):
+        """Test WAL and tuning pragmas are set on new connections"""
+        conn = self.manager.get()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+        self.assertEqual(conn.execute("PRAGMA cache_size").fetchone()[0], -16000)
+
+    def test_connection_reused_within_thread(self):
+        """Test the same thread always gets the same connection"""
+        self.assertIs(self.manager.get(), self.manager.get())
+
+    def test_connection_per_thread(self):
+        """Test other threads get their own connection"""
+        main_conn = self.manager.get()
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.manager.get()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(main_conn, other[0])
+
+    def test_context_commits_and_rolls_back(self):
+        """Test connection() keeps sqlite3 context manager semantics"""
+        with self.manager.connection() as conn:
+            conn.execute("CREATE TABLE t (v INTEGER)")
+            conn.execute("INSERT INTO t VALUES (1)")
+
+        with self.assertRaises(RuntimeError):
+            with self.manager.connection() as conn:
+                conn.execute("INSERT INTO t VALUES (2)")
+                raise RuntimeError("boom")
+
+        with self.manager.connection() as conn:
+            rows = conn.execute("SELECT v FROM t").fetchall()
+        self.assertEqual([row["v"] for row in rows], [1])
+
+    def test_close_all_reconnects(self):
+        """Test threads reconnect lazily after close_all"""
+        first = self.manager.get()
+        self.manager.close_all()
+        second = self.manager.get()
+        self.assertIsNot(first, second)
+        self.assertEqual(second.execute("SELECT 1").fetchone()[0], 1)
+
+class TestDatabaseExecutor(unittest.TestCase):
+    def test_runs_off_event_loop_thread(self):
+        """Test jobs run on the dedicated DB thread, not the loop thread"""
+        executor = DatabaseExecutor()
+
+        async def run_test():
+            return await executor.run(lambda: threading.current_thread().name)
+
+        try:
+            thread_name = asyncio.run(run_test())
+        finally:
+            executor.shutdown()
+        self.assertTrue(thread_name.startswith("kairo-db"))
+        self.assertNotEqual(thread_name, threading.current_thread().name)
+
+    def test_jobs_run_in_submission_order(self):
+        """Test the single worker preserves submission order"""
+        executor = DatabaseExecutor()
+        order = []
+
+        async def run_test():
+            await asyncio.gather(*(executor.run(order.append, i) for i in range(50)))
+
+        try:
+            asyncio.run(run_test())
+        finally:
+            executor.shutdown()
+        self.assertEqual(order, list(range(50)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import csv
+import os
+import tempfile
+from datetime import datetime
+import openpyxl
+from ..utils.tenant import tenant_db
+from ..utils.excel import AttendanceExportWriter, ATTENDANCE_EXPORT_HEADERS
+
+class TestAttendanceExport(unittest.TestCase):
+    def setUp(self):
+        """Set up test database"""
+        self.test_db_path = tempfile.mktemp()
+        tenant_db.db_path = self.test_db_path
+        tenant_db.init_db()
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Clean up test database"""
+        tenant_db.close()
+        if os.path.exists(self.test_db_path):
+            os.remove(self.test_db_path)
+        self.tmpdir.cleanup()
+
+    def export_rows(self, session_id, start="", end="9999-12-31", limit=7):
+        rows, after = [], ("", 0)
+        while True:
+            page = tenant_db.get_records_page(session_id, after, limit, start, end)
+            rows.extend(page)
+            if len(page) < limit:
+                return rows
+            after = (page[-1]["ts"], page[-1]["user_id"])
+
+    def test_keyset_pages_cover_every_record_once(self):
+        """Test paging by (ts, user_id) returns each record exactly once, in order"""
+        session_id = tenant_db.create_session(1, 10, "1234", datetime(2030, 1, 1))
+        tenant_db.record_signins([
+            (session_id, user_id, f"user{user_id}", f"2030-01-01 00:00:{user_id % 3:02d}")
+            for user_id in range(1, 31)
+        ])
+
+        rows = self.export_rows(session_id)
+
+        keys = [(row["ts"], row["user_id"]) for row in rows]
+        self.assertEqual(len(keys), 30)
+        self.assertEqual(keys, sorted(set(keys)))
+
+    def test_date_range_and_guild_scoping(self):
+        """Test ts bounds filter records and sessions stay within their guild"""
+        first = tenant_db.create_session(1, 10, "1111", datetime(2030, 1, 1))
+        second = tenant_db.create_session(1, 10, "2222", datetime(2030, 2, 1))
+        other = tenant_db.create_session(2, 20, "3333", datetime(2030, 1, 1))
+        tenant_db.record_signins([
+            (first, 1, "a", "2030-01-01 10:00:00"),
+            (second, 1, "a", "2030-02-01 10:00:00"),
+        ])
+
+        self.assertEqual(tenant_db.get_guild_session_ids(1), [first, second])
+        self.assertEqual(tenant_db.get_guild_session_ids(1, other), [])
+        self.assertEqual(len(self.export_rows(first, "2030-01-15", "2030-03-01")), 0)
+        self.assertEqual(len(self.export_rows(second, "2030-01-15", "2030-03-01")), 1)
+
+    def test_csv_and_xlsx_writers(self):
+        """Test both formats write the header and rows with ids as text"""
+        rows = [(1, "2030-01-01 00:00:00", 123456789012345678, "小明")]
+        for file_format in ("csv", "xlsx"):
+            path = os.path.join(self.tmpdir.name, f"export.{file_format}")
+            writer = AttendanceExportWriter(path, file_format)
+            writer.write_rows(rows)
+            writer.close()
+            self.assertEqual(writer.rows, 1)
+
+            if file_format == "csv":
+                with open(path, newline="", encoding="utf-8-sig") as f:
+                    written = list(csv.reader(f))
+            else:
+                workbook = openpyxl.load_workbook(path, read_only=True)
+                written = [list(row) for row in workbook["Attendance"].iter_rows(values_only=True)]
+                workbook.close()
+            self.assertEqual(written[0], ATTENDANCE_EXPORT_HEADERS)
+            self.assertEqual([str(value) for value in written[1]], ["1", "123456789012345678", "小明", "2030-01-01 00:00:00"])
+
+if __name__ == '__main__':
+    unittest.main()
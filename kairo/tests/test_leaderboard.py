@@ -0,0 +1,76 @@
+import unittest
+import random
+from bisect import bisect_left, insort
+from ..utils.leaderboard import Leaderboard, Leaderboards, SortedList
+
+class TestLeaderboard(unittest.TestCase):
+    def test_ranks_ties_and_updates(self):
+        """Test ordering, shared ranks for ties and in-place score changes"""
+        board = Leaderboard()
+        board.load([(1, 50), (2, 80), (3, 50), (4, 0)])
+        self.assertEqual(len(board), 3)
+        self.assertEqual(board.top(3), [(2, 80, 1), (1, 50, 2), (3, 50, 2)])
+        self.assertIsNone(board.rank(4))
+
+        board.set(3, 90)
+        self.assertEqual(board.rank(3), 1)
+        self.assertEqual(board.rank(2), 2)
+        board.set(2, 0)
+        self.assertIsNone(board.score(2))
+        self.assertEqual(board.top(10), [(3, 90, 1), (1, 50, 2)])
+
+    def test_around(self):
+        """Test neighbours are clipped at both ends of the board"""
+        board = Leaderboard()
+        board.load([(user_id, 100 - user_id) for user_id in range(1, 21)])
+        self.assertEqual([entry[0] for entry in board.around(10, 2)], [8, 9, 10, 11, 12])
+        self.assertEqual([entry[0] for entry in board.around(1, 2)], [1, 2, 3])
+        self.assertEqual([entry[0] for entry in board.around(20, 2)], [18, 19, 20])
+        self.assertEqual(board.around(99), [])
+
+    def test_matches_full_sort(self):
+        """Test random updates keep the board equal to sorting from scratch"""
+        rng = random.Random(0)
+        board, scores = Leaderboard(), {}
+        for _ in range(2000):
+            user_id, score = rng.randrange(100), rng.randrange(-5, 50)
+            board.set(user_id, score)
+            scores[user_id] = score
+        expected = sorted(((user_id, score) for user_id, score in scores.items() if score > 0),
+                          key=lambda item: (-item[1], item[0]))
+        self.assertEqual([(user_id, score) for user_id, score, _ in board.top(len(expected))], expected)
+        for user_id, score in expected:
+            self.assertEqual(board.rank(user_id), 1 + sum(1 for _, other in expected if other > score))
+
+    def test_sorted_list_across_bucket_splits(self):
+        """Test small buckets split and empty out while matching a plain sorted list"""
+        rng = random.Random(1)
+        items = [rng.randrange(1000) for _ in range(50)]
+        sorted_list, expected = SortedList(items, load=4), sorted(items)
+        for _ in range(3000):
+            if expected and rng.random() < 0.45:
+                value = expected[rng.randrange(len(expected))]
+                sorted_list.remove(value)
+                expected.remove(value)
+            else:
+                value = rng.randrange(1000)
+                sorted_list.add(value)
+                insort(expected, value)
+            probe = rng.randrange(1000)
+            self.assertEqual(sorted_list.bisect_left(probe), bisect_left(expected, probe))
+            start = rng.randrange(len(expected) + 1)
+            self.assertEqual(sorted_list.slice(start, start + 7), expected[start:start + 7])
+        self.assertEqual(list(sorted_list), expected)
+        self.assertEqual(len(sorted_list), len(expected))
+
+    def test_per_guild_boards(self):
+        """Test boards are rebuilt per guild and reset independently"""
+        boards = Leaderboards()
+        boards.load([(1, 10, 5), (2, 10, 7), (1, 11, 9)])
+        self.assertEqual(boards.get(1).top(5), [(11, 9, 1), (10, 5, 2)])
+        boards.reset(1)
+        self.assertEqual(len(boards.get(1)), 0)
+        self.assertEqual(boards.get(2).rank(10), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from ..utils.db import ConnectionManager
+from ..utils.migrations import (
+    Migration, MIGRATIONS, add_column, apply_migrations, current_version,
+    pending_backfills, run_backfill_batch,
+)
+from ..utils.tenant import tenant_db
+
+def backfill_doubled(conn, batch_size):
+    rows = conn.execute("SELECT id, v FROM t WHERE doubled IS NULL LIMIT ?", (batch_size,)).fetchall()
+    conn.executemany("UPDATE t SET doubled = ? WHERE id = ?", [(row["v"] * 2, row["id"]) for row in rows])
+    return len(rows)
+
+TEST_MIGRATIONS = [
+    Migration(1, "create t", "CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER);"),
+    Migration(2, "add doubled", lambda conn: add_column(conn, "t", "doubled", "INTEGER"), backfill_doubled),
+]
+
+class TestMigrationEngine(unittest.TestCase):
+    def setUp(self):
+        """Set up a fresh database file"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.manager = ConnectionManager(os.path.join(self.tmpdir.name, "migrate.db"))
+        self.conn = self.manager.get()
+
+    def tearDown(self):
+        self.manager.close_all()
+        self.tmpdir.cleanup()
+
+    def test_applies_in_order_once(self):
+        """Test pending migrations apply in version order and are recorded"""
+        self.assertEqual(apply_migrations(self.conn, reversed(TEST_MIGRATIONS)), [1, 2])
+        self.assertEqual(current_version(self.conn), 2)
+        self.assertEqual(apply_migrations(self.conn, TEST_MIGRATIONS), [])
+
+    def test_only_newer_versions_applied(self):
+        """Test an existing database only receives migrations above its version"""
+        apply_migrations(self.conn, TEST_MIGRATIONS[:1])
+        self.assertEqual(apply_migrations(self.conn, TEST_MIGRATIONS), [2])
+
+    def test_failed_migration_rolls_back(self):
+        """Test a failing migration leaves neither schema changes nor a version row"""
+        broken = Migration(1, "broken", "CREATE TABLE a (id INTEGER);\nCREATE TABLE a (id INTEGER);")
+        with self.assertRaises(Exception):
+            apply_migrations(self.conn, [broken])
+        self.assertEqual(current_version(self.conn), 0)
+        tables = self.conn.execute("SELECT name FROM sqlite_master WHERE name = 'a'").fetchall()
+        self.assertEqual(tables, [])
+
+    def test_backfill_runs_in_batches(self):
+        """Test backfills process bounded batches and finish idempotently"""
+        apply_migrations(self.conn, TEST_MIGRATIONS[:1])
+        with self.conn:
+            self.conn.executemany("INSERT INTO t (v) VALUES (?)", [(i,) for i in range(25)])
+        apply_migrations(self.conn, TEST_MIGRATIONS)
+
+        migration = pending_backfills(self.conn, TEST_MIGRATIONS)[0]
+        batches = []
+        while True:
+            processed = run_backfill_batch(self.conn, migration, batch_size=10)
+            batches.append(processed)
+            if not processed:
+                break
+
+        self.assertEqual(batches, [10, 10, 5, 0])
+        self.assertEqual(pending_backfills(self.conn, TEST_MIGRATIONS), [])
+        total = self.conn.execute("SELECT SUM(doubled) FROM t").fetchone()[0]
+        self.assertEqual(total, sum(i * 2 for i in range(25)))
+
+    def test_add_column_is_idempotent(self):
+        """Test add_column can be re-run safely"""
+        apply_migrations(self.conn, TEST_MIGRATIONS[:1])
+        add_column(self.conn, "t", "extra", "TEXT")
+        add_column(self.conn, "t", "extra", "TEXT")
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(t)")]
+        self.assertEqual(columns.count("extra"), 1)
+
+class TestTenantMigrations(unittest.TestCase):
+    def setUp(self):
+        """Set up test database"""
+        self.test_db_path = tempfile.mktemp()
+        tenant_db.db_path = self.test_db_path
+        tenant_db.init_db()
+
+    def tearDown(self):
+        """Clean up test database"""
+        tenant_db.close()
+        if os.path.exists(self.test_db_path):
+            os.remove(self.test_db_path)
+
+    def test_init_db_reaches_latest_version(self):
+        """Test init_db migrates a new database to the latest version"""
+        self.assertEqual(tenant_db.schema_version(), max(m.version for m in MIGRATIONS))
+        tenant_db.init_db()
+        self.assertEqual(tenant_db.schema_version(), max(m.version for m in MIGRATIONS))
+
+    def test_run_backfills_with_nothing_pending(self):
+        """Test run_backfills is a no-op once every backfill has completed"""
+        self.assertEqual(asyncio.run(tenant_db.run_backfills()), 0)
+
+if __name__ == '__main__':
+    unittest.main()
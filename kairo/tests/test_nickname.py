@@ -0,0 +1,56 @@
+import unittest
+from types import SimpleNamespace
+from ..utils.tenant import AttendanceSettings
+from ..utils.nickname import NicknamePolicies, compile_format
+
+def make_member(user_id=1, name="alice", display_name=None, role_ids=()):
+    return SimpleNamespace(
+        id=user_id, name=name, display_name=display_name or name,
+        roles=[SimpleNamespace(id=role_id) for role_id in role_ids]
+    )
+
+class TestCompileFormat(unittest.TestCase):
+    def test_matches_str_format(self):
+        """Test compiled formats produce the same nickname as str.format"""
+        for template in ["{name}", "社員 | {name}", "{name} ({name})", "[{name}]", "{{x}} {name}", "{name!r}", "{name:>8}"]:
+            with self.subTest(template=template):
+                self.assertEqual(compile_format(template)("bob"), template.format(name="bob"))
+
+class TestNicknamePolicies(unittest.TestCase):
+    def setUp(self):
+        self.policies = NicknamePolicies()
+        self.settings = AttendanceSettings(rename_enabled=True, staff_role_id=99, rename_format_member="社員 | {name}")
+
+    def test_staff_role_picks_staff_format(self):
+        """Test the target nickname depends on holding the staff role"""
+        policy = self.policies.load(1, self.settings)
+        self.assertEqual(policy.target_for(make_member()), "社員 | alice")
+        self.assertEqual(policy.target_for(make_member(role_ids=(99,))), "幹部 | alice")
+
+    def test_compliance_cache_key(self):
+        """Test cached compliance is invalidated by role, name and format changes"""
+        policy = self.policies.load(1, self.settings)
+        member = make_member(display_name="社員 | alice")
+        self.assertFalse(self.policies.is_compliant(policy, member))
+        self.policies.mark_compliant(policy, member)
+        self.assertTrue(self.policies.is_compliant(policy, member))
+
+        self.assertFalse(self.policies.is_compliant(policy, make_member(display_name="社員 | alice", role_ids=(99,))))
+        self.assertFalse(self.policies.is_compliant(policy, make_member(display_name="alice")))
+
+        self.policies.invalidate(1)
+        self.assertIsNone(self.policies.get(1))
+        reloaded = self.policies.load(1, self.settings)
+        self.assertNotEqual(reloaded.version, policy.version)
+        self.assertFalse(self.policies.is_compliant(reloaded, member))
+
+    def test_mark_after_rename(self):
+        """Test a member renamed by the bot is compliant under the new display name"""
+        policy = self.policies.load(1, self.settings)
+        member = make_member()
+        self.policies.mark_compliant(policy, member, "社員 | alice")
+        member.display_name = "社員 | alice"
+        self.assertTrue(self.policies.is_compliant(policy, member))
+
+if __name__ == '__main__':
+    unittest.main()
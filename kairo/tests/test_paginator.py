@@ -0,0 +1,28 @@
+import unittest
+import asyncio
+import discord
+from ..utils.paginator import EmbedPaginator, chunk
+
+class TestPaginator(unittest.TestCase):
+    def test_chunk(self):
+        """Test lists are split into fixed-size pages, with one empty page for no items"""
+        self.assertEqual(chunk(list(range(5)), 2), [[0, 1], [2, 3], [4]])
+        self.assertEqual(chunk([], 2), [[]])
+
+    def test_buttons_follow_page(self):
+        """Test page footers are numbered and buttons disable at the ends"""
+        async def run_test():
+            pages = [discord.Embed(title=str(i)) for i in range(3)]
+            paginator = EmbedPaginator(pages)
+            states = [(paginator.previous_page.disabled, paginator.next_page.disabled)]
+            paginator.index = 2
+            paginator._sync_buttons()
+            states.append((paginator.previous_page.disabled, paginator.next_page.disabled))
+            return pages, states
+
+        pages, states = asyncio.run(run_test())
+        self.assertEqual(pages[1].footer.text, "第 2/3 頁")
+        self.assertEqual(states, [(True, False), (False, True)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import json
+import os
+import tempfile
+from ..utils.tenant import tenant_db
+from ..utils.qa import QAExportWriter, import_legacy_bank, import_question_file, parse_legacy_bank
+
+class TestLegacyBankImport(unittest.TestCase):
+    def setUp(self):
+        """Set up test database and a legacy bank file"""
+        self.test_db_path = tempfile.mktemp()
+        tenant_db.db_path = self.test_db_path
+        tenant_db.init_db()
+        self.bank_path = tempfile.mktemp(suffix=".json")
+        with open(self.bank_path, 'w', encoding='utf-8') as f:
+            json.dump([
+                {"id": 1, "title": "Q1", "answers": ["a"], "points": 10},
+                {"id": 3, "title": "Q3", "answers": [" b ", ""], "points": 30},
+                {"title": "no id", "answers": ["c"], "points": 5},
+                {"id": 4, "title": "no answers", "answers": [], "points": 5},
+            ], f)
+
+    def tearDown(self):
+        """Clean up test database and bank files"""
+        tenant_db.close()
+        for path in (self.test_db_path, self.bank_path, self.bank_path + '.imported'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_parse_skips_invalid_and_assigns_ids(self):
+        """Test malformed entries are dropped and missing ids follow the largest one"""
+        with open(self.bank_path, encoding='utf-8') as f:
+            questions = parse_legacy_bank(json.load(f))
+        self.assertEqual([(q.id, q.title, q.answers) for q in questions],
+                         [(1, "Q1", ["a"]), (3, "Q3", ["b"]), (5, "no id", ["c"])])
+
+    def test_import_copies_bank_into_qa_guilds_once(self):
+        """Test every approved guild using QA receives the bank and the file is retired"""
+        for guild_id in (1, 2, 3):
+            tenant_db.set_registration_status(guild_id, "approved")
+        tenant_db.set_module_enabled(3, "qa", False)
+
+        self.assertEqual(import_legacy_bank(tenant_db, self.bank_path), 6)
+        self.assertEqual(tenant_db.get_qa_question(2, 3).answers, ["b"])
+        self.assertIsNone(tenant_db.get_qa_question(3, 1))
+        self.assertFalse(os.path.exists(self.bank_path))
+        self.assertEqual(import_legacy_bank(tenant_db, self.bank_path), 0)
+
+    def test_import_waits_for_a_guild(self):
+        """Test the file is kept while no guild can receive the questions"""
+        self.assertEqual(import_legacy_bank(tenant_db, self.bank_path), 0)
+        self.assertTrue(os.path.exists(self.bank_path))
+
+class TestQuestionFiles(unittest.TestCase):
+    def setUp(self):
+        """Set up test database"""
+        self.test_db_path = tempfile.mktemp()
+        tenant_db.db_path = self.test_db_path
+        tenant_db.init_db()
+        self.paths = []
+
+    def tearDown(self):
+        """Clean up test database and files"""
+        tenant_db.close()
+        for path in [self.test_db_path] + self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def write_file(self, suffix, content):
+        path = tempfile.mktemp(suffix=suffix)
+        self.paths.append(path)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_import_reports_invalid_rows(self):
+        """Test valid CSV rows are stored with new ids and bad rows are reported by line"""
+        tenant_db.add_qa_question(1, "existing", ["x"], 1)
+        path = self.write_file(".csv", (
+            "title,answers,points,match_mode\n"
+            "Q1,a;b,10,\n"
+            ",a,10,\n"
+            "Q3,a,ten,\n"
+            "Q4,re:(,5,\n"
+            'Q5,"[""c;d""]",5,fuzzy\n'
+        ))
+        question_ids, errors = import_question_file(tenant_db, 1, path, 'csv')
+        self.assertEqual(question_ids, [2, 3])
+        self.assertEqual([row for row, _ in errors], [3, 4, 5])
+        self.assertEqual(tenant_db.get_qa_question(1, 2).answers, ["a", "b"])
+        question = tenant_db.get_qa_question(1, 3)
+        self.assertEqual((question.answers, question.match_mode), (["c;d"], "fuzzy"))
+
+    def test_broken_file_stores_nothing(self):
+        """Test a file that fails to parse partway leaves the bank unchanged"""
+        path = self.write_file(".json", '[{"title": "Q1", "answers": ["a"], "points": 1}')
+        with self.assertRaises(ValueError):
+            import_question_file(tenant_db, 1, path, 'json')
+        self.assertIsNone(tenant_db.get_qa_question(1, 1))
+
+    def test_export_round_trip(self):
+        """Test every export format imports back to the same questions"""
+        tenant_db.add_qa_question(1, "Q1", ["a", "b"], 10)
+        tenant_db.add_qa_question(1, "旗標", ["re:flag\\{.+\\}", "x;y"], 20, "normalize")
+        expected = [(q.title, q.answers, q.points, q.match_mode) for q in (tenant_db.get_qa_question(1, i) for i in (1, 2))]
+        for guild_id, file_format in enumerate(('csv', 'json', 'ndjson'), 2):
+            with self.subTest(file_format=file_format):
+                path = tempfile.mktemp(suffix=f".{file_format}")
+                self.paths.append(path)
+                writer = QAExportWriter(path, file_format)
+                writer.write_rows(tenant_db.get_qa_questions_page(1, 0, 1))
+                writer.write_rows(tenant_db.get_qa_questions_page(1, 1, 1))
+                writer.close()
+                self.assertEqual(import_question_file(tenant_db, guild_id, path, file_format), ([1, 2], []))
+                imported = [tenant_db.get_qa_question(guild_id, i) for i in (1, 2)]
+                self.assertEqual([(q.title, q.answers, q.points, q.match_mode) for q in imported], expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+import inspect
+import os
+import tempfile
+from datetime import datetime
+from ..utils.tenant import tenant_db, TenantDB, BookkeepingSettings, QAQuestion
+
+# Every repository call the cogs make, with representative arguments.
+# Adding a TenantDB method without listing it here fails test_every_method_covered.
+REPOSITORY_CALLS = [
+    ("register_org", (1, "Club")),
+    ("get_org", (1,)),
+    ("is_module_enabled", (1, "qa")),
+    ("set_module_enabled", (1, "qa", True)),
+    ("enable_module", (1, "qa")),
+    ("get_module_guild_ids", ("qa",)),
+    ("get_enabled_modules", (1,)),
+    ("enable_default_modules", (1,)),
+    ("get_attendance_settings", (1,)),
+    ("set_attendance_setting", (1, "attendance_rename_enabled", True)),
+    ("get_bookkeeping_settings", (1,)),
+    ("set_bookkeeping_settings", (1, BookkeepingSettings())),
+    ("set_org_config", (1,), {"ctfd_push_mode": "award"}),
+    ("get_excel_path", (1,)),
+    ("set_excel_path", (1, "club.xlsx")),
+    ("get_ctfd_config", (1,)),
+    ("get_registration_status", (1,)),
+    ("save_registration", (1, "School", "Club", "Owner", 42, "CTF")),
+    ("set_registration_status", (1, "approved")),
+    ("list_registrations", ()),
+    ("get_routing", (1, "plan_status")),
+    ("get_all_routing", (1,)),
+    ("set_routing", (1, "plan_status", 100)),
+    ("delete_routing", (1, "plan_status")),
+    ("get_plan", (1, "2025-W37", "default")),
+    ("set_plan", (1, "2025-W37", "default", "content")),
+    ("get_plan_group", (1, 42)),
+    ("set_plan_group", (1, 42, "default")),
+    ("create_session", (1, 10, "1234", datetime(2030, 1, 1))),
+    ("get_active_sessions", ()),
+    ("get_latest_session_id", (1,)),
+    ("record_signins", ([(1, 43, "bob", "2030-01-01 00:00:00")],)),
+    ("get_session_records", (1,)),
+    ("get_signed_in_user_ids", (1,)),
+    ("end_session", (1,)),
+    ("get_guild_session_ids", (1,)),
+    ("get_records_page", (1, ("2030-01-01 00:00:00", 42), 500, "2030-01-01", "2030-02-01")),
+    ("get_guild_attendance_stats", (1,)),
+    ("get_member_attendance", (1, 42)),
+    ("get_guild_member_attendance", (1,)),
+    ("get_recent_headcounts", (1, 10)),
+    ("create_bulk_job", (1, "nickname_clear", [(42, None)])),
+    ("get_open_bulk_job", (1, "nickname_clear")),
+    ("get_pending_bulk_items", (1,)),
+    ("mark_bulk_items_done", (1, [(42, None)])),
+    ("finish_bulk_job", (1,)),
+    ("add_qa_question", (1, "Question", ["answer"], 10)),
+    ("add_qa_questions", (1, [("Question", ["answer"], 10, "exact")])),
+    ("get_qa_question", (1, 1)),
+    ("get_qa_questions_page", (1, 0, 500)),
+    ("import_qa_questions", (1, [QAQuestion(2, "Question", ["answer"], 10)])),
+    ("create_qa_contest", (1, "fixed", datetime(2030, 1, 1), datetime(2030, 1, 2))),
+    ("end_qa_contest", (1,)),
+    ("get_active_qa_contests", ()),
+    ("record_qa_solves", ([(1, 1, 42, 10, "2030-01-01 00:00:00")],)),
+    ("record_qa_attempts", ([(1, 1, 42, True, "2030-01-01 00:00:00")],)),
+    ("get_qa_attempt_stats", (1,)),
+    ("add_score", (1, 42, 10)),
+    ("add_scores", ([(1, 42, 10), (1, 43, 5)],)),
+    ("get_all_scores", ()),
+    ("reset_scores", (1,)),
+    ("get_ctfd_link", (1, 42)),
+    ("set_ctfd_link", (1, 42, "a@example.com", 7)),
+]
+
+# Statements allowed to read a whole table, with the reason why that is fine.
+ALLOWED_FULL_SCANS = {
+    "list_registrations": "super-admin listing that returns every registration",
+    "get_all_scores": "startup rebuild of the in-memory leaderboards reads every score once",
+}
+
+# Methods that do not issue repository queries themselves
+NON_QUERY_METHODS = {
+    "connection", "close", "cache_stats", "init_db", "schema_version", "run_backfills", "adopt_legacy_database",
+    "run", "fetchone", "fetchall", "execute",
+}
+
+class TestQueryPlans(unittest.TestCase):
+    def setUp(self):
+        """Set up test database"""
+        self.test_db_path = tempfile.mktemp()
+        tenant_db.db_path = self.test_db_path
+        tenant_db.init_db()
+
+    def tearDown(self):
+        """Clean up test database"""
+        tenant_db.close()
+        if os.path.exists(self.test_db_path):
+            os.remove(self.test_db_path)
+
+    def uses_partial_index(self, step):
+        """A scan over a partial index only visits the rows matching its WHERE clause"""
+        with tenant_db.connection() as conn:
+            rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql LIKE '% WHERE %'").fetchall()
+        return any(step.endswith(f"INDEX {row['name']}") for row in rows)
+
+    def capture_statements(self, name, args, kwargs):
+        statements = []
+        tenant_db.config_cache.clear()  # cached reads must still hit the database
+        with tenant_db.connection() as conn:
+            conn.set_trace_callback(statements.append)
+        try:
+            getattr(tenant_db, name)(*args, **kwargs)
+        finally:
+            with tenant_db.connection() as conn:
+                conn.set_trace_callback(None)
+        return [sql for sql in statements if sql.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE", "INSERT")]
+
+    def test_no_full_scans_or_temp_sorts(self):
+        """Test every repository query is served by an index"""
+        for call in REPOSITORY_CALLS:
+            name, args = call[0], call[1]
+            kwargs = call[2] if len(call) > 2 else {}
+            for sql in self.capture_statements(name, args, kwargs):
+                with tenant_db.connection() as conn:
+                    plan = [row["detail"] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+                with self.subTest(method=name, sql=" ".join(sql.split())):
+                    if name in ALLOWED_FULL_SCANS:
+                        continue
+                    offending = [
+                        step for step in plan
+                        if (step.startswith("SCAN") and not self.uses_partial_index(step)) or "TEMP B-TREE" in step
+                    ]
+                    self.assertEqual(offending, [], f"{name}: {plan}")
+
+    def test_every_method_covered(self):
+        """Test the plan audit lists every public TenantDB query method"""
+        methods = {
+            name for name, member in inspect.getmembers(TenantDB, inspect.isfunction)
+            if not name.startswith("_") and name not in NON_QUERY_METHODS
+        }
+        covered = {call[0] for call in REPOSITORY_CALLS}
+        self.assertEqual(methods - covered, set())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import asyncio
+import time
+from ..utils.ratelimit import TokenBucket, RouteLimiter, SlidingWindowLimiter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_refill(self):
+        """Test the bucket allows a burst and refills at the configured rate"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2.0, capacity=3, clock=clock)
+        self.assertEqual([bucket.try_acquire() for _ in range(4)], [True, True, True, False])
+
+        clock.now = 0.5  # one token at 2/s
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+        clock.now = 100.0  # never refills past capacity
+        self.assertEqual(sum(bucket.try_acquire() for _ in range(10)), 3)
+
+    def test_acquire_waits_for_tokens(self):
+        """Test acquire paces callers once the burst is spent"""
+        bucket = TokenBucket(rate=50.0, capacity=2)
+
+        async def run_test():
+            start = time.monotonic()
+            for _ in range(7):
+                await bucket.acquire()
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(run_test())
+        self.assertGreaterEqual(elapsed, 0.09)  # 5 tokens beyond the burst at 50/s
+
+class TestRouteLimiter(unittest.TestCase):
+    def test_buckets_per_route(self):
+        """Test each route key gets its own independent bucket"""
+        limiter = RouteLimiter(rate=1.0, capacity=1, clock=FakeClock())
+        self.assertIs(limiter.bucket(("member_edit", 1)), limiter.bucket(("member_edit", 1)))
+        self.assertTrue(limiter.bucket(("member_edit", 1)).try_acquire())
+        self.assertFalse(limiter.bucket(("member_edit", 1)).try_acquire())
+        self.assertTrue(limiter.bucket(("member_edit", 2)).try_acquire())
+
+    def test_acquire_within_gives_up_when_backed_up(self):
+        """Test callers that would wait past the timeout are turned away without taking a token"""
+        limiter = RouteLimiter(rate=20.0, capacity=2)
+
+        async def run_test():
+            waiters = [asyncio.ensure_future(limiter.acquire_within("rename", 0.12)) for _ in range(6)]
+            results = await asyncio.gather(*waiters)
+            start = time.monotonic()
+            late = await limiter.acquire_within("rename", 0.0)
+            return results, late, time.monotonic() - start
+
+        results, late, elapsed = asyncio.run(run_test())
+        # 2 from the burst plus about 0.12 s of refill at 20/s
+        self.assertEqual(results[:4], [True] * 4)
+        self.assertFalse(results[-1])
+        self.assertFalse(late)
+        self.assertLess(elapsed, 0.01)
+
+class TestSlidingWindowLimiter(unittest.TestCase):
+    def test_limit_and_retry_after(self):
+        """Test keys are limited after N events and recover as the window slides"""
+        clock = FakeClock()
+        limiter = SlidingWindowLimiter(limit=3, window=10, clock=clock)
+        for now in (0, 1, 2):
+            clock.now = now
+            self.assertTrue(limiter.hit("a"))
+        self.assertFalse(limiter.hit("a"))
+        self.assertTrue(limiter.hit("b"))
+        self.assertEqual(limiter.retry_after("a"), 8)
+
+        clock.now = 10.5  # the first event has left the window
+        self.assertEqual(limiter.retry_after("a"), 0)
+        self.assertTrue(limiter.hit("a"))
+        self.assertTrue(limiter.is_limited("a"))
+
+    def test_prune_drops_idle_keys(self):
+        """Test keys with only expired events are removed"""
+        clock = FakeClock()
+        limiter = SlidingWindowLimiter(limit=1, window=5, clock=clock)
+        for key in range(10):
+            limiter.record(key)
+        clock.now = 6
+        limiter.record("fresh")
+        limiter.prune()
+        self.assertEqual(len(limiter), 1)
+
+if __name__ == '__main__':
+    unittest.main()
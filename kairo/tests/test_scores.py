@@ -0,0 +1,78 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from ..utils.tenant import tenant_db
+from ..utils.scores import ScoreAccumulator
+
+class TestScoreUpsert(unittest.TestCase):
+    def setUp(self):
+        """Set up test database"""
+        self.test_db_path = tempfile.mktemp()
+        tenant_db.db_path = self.test_db_path
+        tenant_db.init_db()
+
+    def tearDown(self):
+        """Clean up test database"""
+        tenant_db.close()
+        if os.path.exists(self.test_db_path):
+            os.remove(self.test_db_path)
+
+    def test_add_scores_returns_totals_in_order(self):
+        """Test the batched upsert creates and increments rows in one call"""
+        tenant_db.add_score(1, 42, 10)
+        self.assertEqual(tenant_db.add_scores([(1, 42, 5), (1, 43, 7), (2, 42, 1)]), [15, 7, 1])
+        self.assertEqual(sorted(tuple(row) for row in tenant_db.get_all_scores()), [(1, 42, 15), (1, 43, 7), (2, 42, 1)])
+
+    def test_accumulator_merges_increments(self):
+        """Test concurrent adds for one user become one write with the merged total"""
+        async def scenario():
+            accumulator = ScoreAccumulator(tenant_db, flush_interval=0.01)
+            accumulator.start()
+            totals = await asyncio.gather(
+                accumulator.add(1, 42, 10), accumulator.add(1, 42, 5), accumulator.add(1, 43, 3)
+            )
+            await accumulator.stop()
+            return accumulator, totals
+
+        accumulator, totals = asyncio.run(scenario())
+        self.assertEqual(totals, [15, 15, 3])
+        self.assertEqual(accumulator.batches, 1)
+        self.assertEqual(accumulator.flushed, 2)
+        self.assertEqual(tenant_db.add_score(1, 42, 0), 15)
+
+    def test_accumulator_keeps_increments_after_failed_flush(self):
+        """Test a failed write puts the increments back for the next flush"""
+        async def scenario():
+            accumulator = ScoreAccumulator(tenant_db)
+            task = asyncio.ensure_future(accumulator.add(1, 42, 10))
+            await asyncio.sleep(0)
+            original = tenant_db.add_scores
+            tenant_db.add_scores = lambda increments: (_ for _ in ()).throw(RuntimeError("locked"))
+            try:
+                with self.assertRaises(RuntimeError):
+                    await accumulator.flush()
+            finally:
+                tenant_db.add_scores = original
+            self.assertEqual(len(accumulator), 1)
+            await accumulator.flush()
+            return await task
+
+        self.assertEqual(asyncio.run(scenario()), 10)
+
+    def test_discard_drops_pending_for_guild(self):
+        """Test discarded increments are never written and their waiters resolve"""
+        async def scenario():
+            accumulator = ScoreAccumulator(tenant_db)
+            dropped = asyncio.ensure_future(accumulator.add(1, 42, 10))
+            kept = asyncio.ensure_future(accumulator.add(2, 42, 5))
+            await asyncio.sleep(0)
+            self.assertEqual(await accumulator.discard(1), 1)
+            await accumulator.flush()
+            return await dropped, await kept
+
+        self.assertEqual(asyncio.run(scenario()), (0, 5))
+        self.assertEqual(tenant_db.add_score(1, 42, 0), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,217 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta
+from ..utils.tenant import tenant_db
+from ..utils.signin import ActiveSession, ActiveSessions, ExpiryScheduler, SigninQueue, split_attendance
+
+class TestSigninQueue(unittest.TestCase):
+    def setUp(self):
+        """Set up test database"""
+        self.test_db_path = tempfile.mktemp()
+        tenant_db.db_path = self.test_db_path
+        tenant_db.init_db()
+        self.session_id = tenant_db.create_session(1, 10, "1234", datetime.now() + timedelta(minutes=30))
+
+    def tearDown(self):
+        """Clean up test database"""
+        tenant_db.close()
+        if os.path.exists(self.test_db_path):
+            os.remove(self.test_db_path)
+
+    def test_dedupes_pending_signins(self):
+        """Test a user queued twice for one session is rejected the second time"""
+        queue = SigninQueue(tenant_db)
+        self.assertTrue(queue.submit(self.session_id, 42, "alice"))
+        self.assertFalse(queue.submit(self.session_id, 42, "alice"))
+        self.assertTrue(queue.submit(self.session_id, 43, "bob"))
+        self.assertEqual(len(queue), 2)
+
+    def test_flush_writes_in_batches(self):
+        """Test flush stores every queued record using bounded batches"""
+        queue = SigninQueue(tenant_db, max_batch=100)
+        for user_id in range(250):
+            queue.submit(self.session_id, user_id, f"user{user_id}")
+
+        inserted = asyncio.run(queue.flush())
+
+        self.assertEqual(inserted, 250)
+        self.assertEqual(queue.batches, 3)
+        self.assertEqual(len(queue), 0)
+        self.assertEqual(len(tenant_db.get_signed_in_user_ids(self.session_id)), 250)
+
+    def test_background_flush_and_stop(self):
+        """Test the flusher writes shortly after submit and stop drains the rest"""
+        queue = SigninQueue(tenant_db, flush_interval=0.001)
+
+        async def run_test():
+            queue.start()
+            queue.submit(self.session_id, 1, "first")
+            await asyncio.sleep(0.05)
+            written = 1 in tenant_db.get_signed_in_user_ids(self.session_id)
+            queue.submit(self.session_id, 2, "second")
+            await queue.stop()
+            return written
+
+        self.assertTrue(asyncio.run(run_test()))
+        self.assertEqual(tenant_db.get_signed_in_user_ids(self.session_id), {1, 2})
+
+    def test_existing_records_not_duplicated(self):
+        """Test a queued sign-in that already exists in the DB is ignored"""
+        tenant_db.record_signins([(self.session_id, 42, "alice", "2030-01-01 00:00:00")])
+        queue = SigninQueue(tenant_db)
+        queue.submit(self.session_id, 42, "alice")
+        self.assertEqual(asyncio.run(queue.flush()), 0)
+        self.assertEqual(len(tenant_db.get_session_records(self.session_id)), 1)
+
+class TestActiveSessions(unittest.TestCase):
+    def setUp(self):
+        """Set up test database"""
+        self.test_db_path = tempfile.mktemp()
+        tenant_db.db_path = self.test_db_path
+        tenant_db.init_db()
+
+    def tearDown(self):
+        """Clean up test database"""
+        tenant_db.close()
+        if os.path.exists(self.test_db_path):
+            os.remove(self.test_db_path)
+
+    def load_state(self):
+        state = ActiveSessions()
+        state.load(tenant_db.get_active_sessions())
+        return state
+
+    def test_load_from_db(self):
+        """Test open sessions and their sign-ins are rebuilt from the database"""
+        expire_at = datetime(2030, 1, 1, 12, 0)
+        open_id = tenant_db.create_session(1, 10, "1234", expire_at, "https://canva.example", "intro")
+        closed_id = tenant_db.create_session(1, 10, "5678", expire_at)
+        empty_id = tenant_db.create_session(2, 20, "0000", expire_at)
+        tenant_db.record_signins([
+            (open_id, 42, "alice", "2030-01-01 00:00:00"),
+            (open_id, 44, "carol", "2030-01-01 00:00:00"),
+            (closed_id, 43, "bob", "2030-01-01 00:00:00"),
+        ])
+        tenant_db.end_session(closed_id)
+
+        state = self.load_state()
+
+        self.assertEqual(len(state), 2)
+        session = state.get(open_id)
+        self.assertEqual(session.expire_at, expire_at)
+        self.assertEqual(session.outline, "intro")
+        self.assertEqual(session.signed_in, {42, 44})
+        self.assertEqual(state.get(empty_id).signed_in, set())
+        self.assertIsNone(state.get(closed_id))
+
+    def test_mark_signed_in(self):
+        """Test sign-ins are accepted once and only for open sessions"""
+        state = ActiveSessions()
+        state.add(ActiveSession(1, 100, 10, "1234", datetime(2030, 1, 1)))
+        self.assertTrue(state.mark_signed_in(1, 42))
+        self.assertFalse(state.mark_signed_in(1, 42))
+        self.assertFalse(state.mark_signed_in(2, 42))
+
+    def test_code_index(self):
+        """Test codes resolve per guild, are unique while open and freed on removal"""
+        state = ActiveSessions()
+        code = state.new_code(100)
+        state.add(ActiveSession(1, 100, 10, code, datetime(2030, 1, 1)))
+        self.assertEqual(state.by_code(100, code).session_id, 1)
+        self.assertIsNone(state.by_code(200, code))
+
+        for _ in range(50):
+            drawn = state.new_code(100, digits=1)
+            self.assertEqual(len(drawn), 1)
+            state.release_code(100, drawn)
+        for session_id, taken in enumerate("012345678", start=2):
+            state.add(ActiveSession(session_id, 100, 10, taken, datetime(2030, 1, 1)))
+        self.assertEqual(state.new_code(100, digits=1), "9")
+
+        state.remove(1)
+        self.assertIsNone(state.by_code(100, code))
+
+    def test_code_reserved_until_added_or_released(self):
+        """Test a drawn code cannot be drawn again before its session is added"""
+        state = ActiveSessions()
+        first = state.new_code(100, digits=1)
+        drawn = {first} | {state.new_code(100, digits=1) for _ in range(9)}
+        self.assertEqual(len(drawn), 10)
+        with self.assertRaises(RuntimeError):
+            state.new_code(100, digits=1)
+        self.assertIsNone(state.by_code(100, first))
+
+        state.add(ActiveSession(1, 100, 10, first, datetime(2030, 1, 1)))
+        self.assertEqual(state.by_code(100, first).session_id, 1)
+        state.release_code(100, first)
+        self.assertEqual(state.by_code(100, first).session_id, 1)
+
+        for code in drawn - {first}:
+            state.release_code(100, code)
+        self.assertNotEqual(state.new_code(100, digits=1), first)
+
+    def test_guild_scoping_and_remove(self):
+        """Test lookups respect the guild and removal closes the session"""
+        state = ActiveSessions()
+        state.add(ActiveSession(1, 100, 10, "1111", datetime(2030, 1, 1)))
+        state.add(ActiveSession(2, 100, 10, "2222", datetime(2030, 1, 1)))
+        self.assertIsNone(state.get(1, guild_id=200))
+        self.assertEqual(state.latest_for_guild(100).session_id, 2)
+
+        state.remove(2)
+        self.assertEqual(state.latest_for_guild(100).session_id, 1)
+        state.remove(1)
+        self.assertIsNone(state.latest_for_guild(100))
+        self.assertFalse(state.mark_signed_in(1, 42))
+
+class TestSplitAttendance(unittest.TestCase):
+    def test_partitions_in_member_order(self):
+        """Test members are split into signed-in and absent lists, keeping order"""
+        present, absent = split_attendance([5, 1, 4, 2, 3], {1, 3, 99})
+        self.assertEqual(present, [1, 3])
+        self.assertEqual(absent, [5, 4, 2])
+
+class TestExpiryScheduler(unittest.TestCase):
+    def run_scheduler(self, schedule, wait=0.15):
+        expired = []
+
+        async def on_expire(session_id):
+            expired.append(session_id)
+
+        async def run_test():
+            scheduler = ExpiryScheduler(on_expire)
+            scheduler.start()
+            schedule(scheduler, datetime.now())
+            await asyncio.sleep(wait)
+            await scheduler.stop()
+            return scheduler
+
+        scheduler = asyncio.run(run_test())
+        return expired, scheduler
+
+    def test_fires_in_deadline_order(self):
+        """Test sessions expire earliest first, including a sooner one added later"""
+        def schedule(scheduler, now):
+            scheduler.schedule(1, now + timedelta(milliseconds=60))
+            scheduler.schedule(2, now + timedelta(milliseconds=30))
+            scheduler.schedule(3, now - timedelta(minutes=5))  # already overdue at startup
+
+        expired, scheduler = self.run_scheduler(schedule)
+        self.assertEqual(expired, [3, 2, 1])
+        self.assertEqual(len(scheduler), 0)
+
+    def test_cancelled_and_future_sessions_not_fired(self):
+        """Test cancelled sessions are skipped and future ones keep waiting"""
+        def schedule(scheduler, now):
+            scheduler.schedule(1, now + timedelta(milliseconds=20))
+            scheduler.schedule(2, now + timedelta(hours=1))
+            scheduler.cancel(1)
+
+        expired, scheduler = self.run_scheduler(schedule, wait=0.08)
+        self.assertEqual(expired, [])
+        self.assertEqual(len(scheduler), 1)
+
+if __name__ == '__main__':
+    unittest.main()
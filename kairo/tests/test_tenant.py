@@ -0,0 +1,194 @@
+import unittest
+import asyncio
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+from datetime import datetime, timedelta
+from ..utils.migrations import MIGRATIONS
+from ..utils.tenant import tenant_db, MODULES
+
+class TestTenantRepository(unittest.TestCase):
+    def setUp(self):
+        """Set up test database"""
+        self.test_db_path = tempfile.mktemp()
+        tenant_db.db_path = self.test_db_path
+        tenant_db.init_db()
+
+    def tearDown(self):
+        """Clean up test database"""
+        tenant_db.close()
+        if os.path.exists(self.test_db_path):
+            os.remove(self.test_db_path)
+
+    def test_routing_roundtrip(self):
+        """Test set, get and delete of channel routing"""
+        tenant_db.set_routing(1, "plan_status", 100)
+        tenant_db.set_routing(1, "ctf_notice", 200)
+
+        self.assertEqual(tenant_db.get_routing(1, "plan_status"), 100)
+        self.assertEqual(tenant_db.get_all_routing(1), {"plan_status": 100, "ctf_notice": 200})
+        self.assertTrue(tenant_db.delete_routing(1, "plan_status"))
+        self.assertFalse(tenant_db.delete_routing(1, "plan_status"))
+        self.assertIsNone(tenant_db.get_routing(1, "plan_status"))
+
+    def test_record_signin_rejects_duplicates(self):
+        """Test a user can only sign in once per session"""
+        session_id = tenant_db.create_session(1, 10, "1234", datetime.now() + timedelta(minutes=30))
+
+        self.assertEqual(tenant_db.record_signins([(session_id, 42, "alice", "2030-01-01 00:00:00")]), 1)
+        self.assertEqual(tenant_db.record_signins([(session_id, 42, "alice", "2030-01-01 00:00:01")]), 0)
+        self.assertEqual(tenant_db.get_signed_in_user_ids(session_id), {42})
+        self.assertEqual(tenant_db.end_session(session_id), 1)
+        self.assertEqual(tenant_db.get_active_sessions(), [])
+
+    def test_add_score_returns_total(self):
+        """Test score accumulation"""
+        self.assertEqual(tenant_db.add_score(1, 42, 10), 10)
+        self.assertEqual(tenant_db.add_score(1, 42, 5), 15)
+        self.assertEqual([tuple(row) for row in tenant_db.get_all_scores()], [(1, 42, 15)])
+
+    def test_qa_questions_are_per_guild(self):
+        """Test question ids are allocated per guild and lookups never cross tenants"""
+        self.assertEqual(tenant_db.add_qa_question(1, "Q1", ["a"], 10), 1)
+        self.assertEqual(tenant_db.add_qa_question(1, "Q2", ["b", "c"], 20), 2)
+        self.assertEqual(tenant_db.add_qa_question(2, "Other", ["x"], 5), 1)
+
+        question = tenant_db.get_qa_question(1, 2)
+        self.assertEqual((question.title, question.answers, question.points), ("Q2", ["b", "c"], 20))
+        self.assertEqual(tenant_db.get_qa_question(2, 1).title, "Other")
+        self.assertIsNone(tenant_db.get_qa_question(2, 2))
+        # A cached miss is dropped when that id is added
+        self.assertEqual(tenant_db.add_qa_question(2, "Second", ["y"], 5), 2)
+        self.assertEqual(tenant_db.get_qa_question(2, 2).title, "Second")
+
+        tenant_db.add_qa_question(1, "Flag", ["re:flag\\{.+\\}"], 50, "normalize")
+        question = tenant_db.get_qa_question(1, 3)
+        self.assertEqual(question.match_mode, "normalize")
+        self.assertTrue(question.matcher.matches("flag{x}"))
+
+    def test_registration_and_modules(self):
+        """Test registration status updates and default modules"""
+        tenant_db.save_registration(1, "School", "Club", "Owner", 42, "CTF")
+        self.assertEqual(tenant_db.get_registration_status(1)["status"], "pending")
+
+        tenant_db.set_registration_status(1, "approved")
+        tenant_db.enable_default_modules(1)
+        tenant_db.set_module_enabled(1, "crypto", False)
+
+        self.assertEqual(tenant_db.get_registration_status(1)["club_name"], "Club")
+        self.assertEqual(tenant_db.get_enabled_modules(1), [m for m in MODULES if m != "crypto"])
+
+    def test_excel_path_keeps_other_config(self):
+        """Test setting the sheet URL does not wipe other org config columns"""
+        tenant_db.set_attendance_setting(1, "attendance_rename_enabled", True)
+        tenant_db.set_excel_path(1, "https://docs.google.com/spreadsheets/d/abc")
+
+        self.assertEqual(tenant_db.get_excel_path(1), "https://docs.google.com/spreadsheets/d/abc")
+        self.assertTrue(tenant_db.get_attendance_settings(1).rename_enabled)
+
+    def test_config_cache_invalidated_by_setters(self):
+        """Test cached settings are served from memory and refreshed after writes"""
+        self.assertFalse(tenant_db.get_attendance_settings(1).rename_enabled)
+        self.assertFalse(tenant_db.get_attendance_settings(1).rename_enabled)
+        self.assertGreaterEqual(tenant_db.cache_stats()["config"]["hits"], 1)
+
+        tenant_db.set_attendance_setting(1, "attendance_rename_enabled", True)
+        self.assertTrue(tenant_db.get_attendance_settings(1).rename_enabled)
+
+        self.assertIsNone(tenant_db.get_routing(1, "plan_status"))
+        tenant_db.set_routing(1, "plan_status", 100)
+        self.assertEqual(tenant_db.get_routing(1, "plan_status"), 100)
+
+        tenant_db.set_org_config(1, ctfd_base_url="https://ctf.example", ciphertext_ctfd_token="x")
+        self.assertEqual(tenant_db.get_ctfd_config(1)["ctfd_base_url"], "https://ctf.example")
+        with self.assertRaises(ValueError):
+            tenant_db.set_org_config(1, not_a_column=1)
+
+class TestLegacyDatabase(unittest.TestCase):
+    def setUp(self):
+        """Set up test database and a legacy database file with one routing row"""
+        self.test_db_path = tempfile.mktemp()
+        self.legacy_path = tempfile.mktemp()
+        with closing(sqlite3.connect(self.legacy_path)) as conn:
+            conn.execute("CREATE TABLE routing (guild_id INTEGER, key TEXT, channel_id INTEGER, PRIMARY KEY (guild_id, key))")
+            conn.execute("INSERT INTO routing VALUES (1, 'plan_status', 100)")
+            conn.commit()
+        tenant_db.db_path = self.test_db_path
+        tenant_db.init_db()
+
+    def tearDown(self):
+        """Clean up test database and legacy files"""
+        tenant_db.close()
+        for path in (self.test_db_path, self.legacy_path, self.legacy_path + '.migrated'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_adopted_into_empty_database(self):
+        """Test a legacy file is copied into an empty database, migrated and retired"""
+        self.assertEqual(tenant_db.adopt_legacy_database([self.legacy_path]), os.path.abspath(self.legacy_path))
+        self.assertEqual(tenant_db.get_routing(1, "plan_status"), 100)
+        self.assertEqual(tenant_db.schema_version(), max(m.version for m in MIGRATIONS))
+        self.assertFalse(os.path.exists(self.legacy_path))
+        self.assertIsNone(tenant_db.adopt_legacy_database([self.legacy_path]))
+
+    def test_warns_when_both_hold_data(self):
+        """Test nothing is merged and both paths are logged when the active database has data"""
+        tenant_db.set_routing(2, "plan_status", 200)
+        with self.assertLogs("kairo.utils.tenant", level="WARNING") as logs:
+            self.assertIsNone(tenant_db.adopt_legacy_database([self.legacy_path]))
+        self.assertIn(os.path.abspath(self.legacy_path), logs.output[0])
+        self.assertIn(os.path.abspath(self.test_db_path), logs.output[0])
+        self.assertIsNone(tenant_db.get_routing(1, "plan_status"))
+        self.assertTrue(os.path.exists(self.legacy_path))
+
+class TestAttendanceRollups(unittest.TestCase):
+    def setUp(self):
+        """Set up test database"""
+        self.test_db_path = tempfile.mktemp()
+        tenant_db.db_path = self.test_db_path
+        tenant_db.init_db()
+
+    def tearDown(self):
+        """Clean up test database"""
+        tenant_db.close()
+        if os.path.exists(self.test_db_path):
+            os.remove(self.test_db_path)
+
+    def run_session(self, guild_id, user_ids):
+        session_id = tenant_db.create_session(guild_id, 10, "1234", datetime.now() + timedelta(minutes=30))
+        tenant_db.record_signins([(session_id, user_id, f"user{user_id}", "2030-01-01 00:00:00") for user_id in user_ids])
+        return session_id
+
+    def test_end_session_updates_rollups_once(self):
+        """Test closing a session folds it into the rollups exactly once"""
+        first = self.run_session(1, [42, 43])
+        tenant_db.end_session(first)
+        tenant_db.end_session(first)  # closing twice must not double count
+        second = self.run_session(1, [42])
+        tenant_db.end_session(second)
+
+        self.assertEqual(tenant_db.get_guild_attendance_stats(1), (2, 3))
+        self.assertEqual(tenant_db.get_member_attendance(1, 42), 2)
+        self.assertEqual(tenant_db.get_guild_member_attendance(1), {42: 2, 43: 1})
+        self.assertEqual([tuple(row) for row in tenant_db.get_recent_headcounts(1)], [(second, 1), (first, 2)])
+        self.assertEqual(tenant_db.get_guild_attendance_stats(2), (0, 0))
+
+    def test_backfill_rolls_up_history(self):
+        """Test sessions closed before the rollup migration are backfilled in batches"""
+        for user_ids in ([1, 2], [1], [3]):
+            session_id = self.run_session(1, user_ids)
+            with tenant_db.connection() as conn:
+                conn.execute("UPDATE sessions SET active = 0 WHERE id = ?", (session_id,))
+        with tenant_db.connection() as conn:
+            conn.execute("UPDATE schema_version SET backfilled = 0 WHERE version = 4")
+
+        processed = asyncio.run(tenant_db.run_backfills(batch_size=1))
+
+        self.assertEqual(processed, 3)
+        self.assertEqual(tenant_db.get_guild_attendance_stats(1), (3, 4))
+        self.assertEqual(tenant_db.get_guild_member_attendance(1), {1: 2, 2: 1, 3: 1})
+        self.assertEqual(asyncio.run(tenant_db.run_backfills()), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,18 +4,50 @@ Kairo Utils Package
 提供各種實用工具函式和輔助功能。
 """
 
+from . import answers
+from . import attempts
+from . import batching
 from . import brand
+from . import bulk
+from . import cache
+from . import contest
 from . import crypto
+from . import ctfd
+from . import db
 from . import excel
 from . import google_sheets
+from . import leaderboard
+from . import migrations
+from . import nickname
+from . import paginator
+from . import qa
+from . import ratelimit
+from . import scores
+from . import signin
 from . import tenant
 from . import visibility
 
 __all__ = [
+    "answers",
+    "attempts",
+    "batching",
     "brand",
+    "bulk",
+    "cache",
+    "contest",
     "crypto", 
+    "ctfd",
+    "db",
     "excel",
     "google_sheets",
+    "leaderboard",
+    "migrations",
+    "nickname",
+    "paginator",
+    "qa",
+    "ratelimit",
+    "scores",
+    "signin",
     "tenant",
     "visibility",
 ]
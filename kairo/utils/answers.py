@@ -0,0 +1,90 @@
+"""
+Kairo 答案比對
+
+題目新增或載入時即將答案編譯為比對器：正規化後的答案集合（O(1) 精確比對）、
+預先編譯的正規表示式（以 re: 開頭的答案，適用 CTF flag 格式），以及可選的
+NFKC/空白正規化與編輯距離模糊比對。
+"""
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Pattern
+
+MATCH_MODES = ('exact', 'normalize', 'fuzzy')
+REGEX_PREFIX = 're:'
+# Fuzzy mode accepts one typo per this many characters of the expected answer (at least one)
+FUZZY_CHARS_PER_EDIT = 8
+VERDICT_CACHE_SIZE = 256
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize(text: str, mode: str = 'exact') -> str:
+    """``exact`` ignores case and surrounding whitespace; the other modes also apply NFKC and collapse whitespace."""
+    if mode == 'exact':
+        return text.strip().casefold()
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', text)).strip().casefold()
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, giving up with ``limit + 1`` once it is certainly above ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class AnswerMatcher:
+    """Compiled form of a question's accepted answers."""
+
+    def __init__(self, answers: Iterable[str], mode: str = 'exact'):
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Invalid match mode: {mode}")
+        self.mode = mode
+        self.exact = set()
+        self.patterns: List[Pattern[str]] = []
+        for answer in answers:
+            if answer.startswith(REGEX_PREFIX):
+                try:
+                    self.patterns.append(re.compile(answer[len(REGEX_PREFIX):].strip()))
+                except re.error as e:
+                    raise ValueError(f"Invalid answer pattern {answer!r}: {e}") from e
+            else:
+                self.exact.add(normalize(answer, mode))
+        self._verdicts: Dict[str, bool] = {}
+
+    def matches(self, answer: str) -> bool:
+        key = normalize(answer, self.mode)
+        if key in self.exact:
+            return True
+        if not self.patterns and self.mode != 'fuzzy':
+            return False
+
+        raw = answer.strip()
+        # Patterns see the raw text, so their verdicts may differ between answers sharing a normalized key
+        cache_key = raw if self.patterns else key
+        verdict = self._verdicts.get(cache_key)
+        if verdict is None:
+            verdict = self._match_slow(raw, key)
+            if len(self._verdicts) >= VERDICT_CACHE_SIZE:
+                self._verdicts.clear()
+            self._verdicts[cache_key] = verdict
+        return verdict
+
+    def _match_slow(self, raw: str, key: str) -> bool:
+        if any(pattern.fullmatch(raw) for pattern in self.patterns):
+            return True
+        if self.mode == 'fuzzy':
+            return any(
+                edit_distance(key, expected, limit) <= limit
+                for expected in self.exact
+                for limit in (max(1, len(expected) // FUZZY_CHARS_PER_EDIT),)
+            )
+        return False
@@ -0,0 +1,55 @@
+"""
+Kairo 作答紀錄
+
+每次作答先以滑動視窗限制 (伺服器, 使用者, 題目) 的嘗試頻率，擋下腳本暴力猜答；
+通過的作答先放入記憶體佇列，再以批次交易附加到只增不改的 qa_attempts，
+各題的答對率統計直接由這份紀錄計算。
+"""
+
+import os
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from .batching import BatchWriter, utc_timestamp
+
+# Answers allowed per user and question within the window
+QA_ATTEMPT_LIMIT = int(os.getenv('QA_ATTEMPT_LIMIT', '5'))
+QA_ATTEMPT_WINDOW = float(os.getenv('QA_ATTEMPT_WINDOW', '60'))
+# Nothing reads attempts back right away, so batches can wait longer than solves
+ATTEMPT_FLUSH_INTERVAL = 1.0
+ATTEMPT_MAX_BATCH = 500
+
+AttemptRow = Tuple[int, int, int, bool, str]  # (guild_id, question_id, user_id, correct, attempted_at)
+
+
+@dataclass
+class QuestionStats:
+    question_id: int
+    attempts: int
+    attempters: int
+    solvers: int
+
+    @property
+    def solve_rate(self) -> float:
+        """Share of users who tried the question and solved it."""
+        return self.solvers / self.attempters if self.attempters else 0.0
+
+
+class AttemptLog(BatchWriter):
+    """In-memory attempt buffer appended to ``qa_attempts`` in batched transactions."""
+
+    label = "作答紀錄"
+
+    def __init__(self, db, flush_interval: float = ATTEMPT_FLUSH_INTERVAL, max_batch: int = ATTEMPT_MAX_BATCH):
+        super().__init__(db, flush_interval, max_batch)
+
+    def submit(self, guild_id: int, question_id: int, user_id: int, correct: bool):
+        self.enqueue((guild_id, question_id, user_id, correct, utc_timestamp()))
+
+    async def write(self, rows: List[AttemptRow]) -> int:
+        return await self._db.run(self._db.record_qa_attempts, rows)
+
+    async def stats(self, guild_id: int) -> List[QuestionStats]:
+        """Per-question statistics for the guild, including attempts still queued."""
+        await self.flush()
+        return [QuestionStats(*row) for row in await self._db.run(self._db.get_qa_attempt_stats, guild_id)]
@@ -0,0 +1,134 @@
+"""
+Kairo 批次寫入
+
+write-behind 的共用實作：資料列先進入記憶體佇列，由背景任務稍候合併，
+以有上限的批次交易寫入資料庫；寫入失敗時整批放回佇列前端待下次重試，
+關閉時將佇列完整寫出。簽到、競賽解題、作答紀錄與分數累加皆建立於此。
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from itertools import count, islice
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Wait before retrying after a failed write
+RETRY_DELAY = 1.0
+
+
+def utc_timestamp() -> str:
+    """Now in UTC, in the format SQLite's CURRENT_TIMESTAMP writes, so reports parse either."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class BatchWriter:
+    """In-memory row buffer written by ``write`` in batched transactions.
+
+    Rows may carry a key; a keyed row is refused while the same key is queued
+    or being written. Writers that set ``merge_duplicates`` instead combine it
+    into the queued row through ``merge``, and queue it behind a row with the
+    same key that is being written. Subclasses implement ``write``.
+    """
+
+    label = "批次資料"
+    merge_duplicates = False
+
+    def __init__(self, db, flush_interval: float, max_batch: int):
+        self._db = db
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending: Dict[Hashable, Any] = {}
+        self._inflight: Dict[Hashable, Any] = {}
+        self._sequence = count()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.flushed = 0
+        self.batches = 0
+
+    async def write(self, rows: Sequence[Any]) -> int:
+        """Store one batch; returns how many rows were stored."""
+        raise NotImplementedError
+
+    def merge(self, queued: Any, row: Any) -> Any:
+        """Combine a newer row into the queued row with the same key; used when ``merge_duplicates`` is set."""
+        raise NotImplementedError
+
+    def enqueue(self, row: Any, key: Optional[Hashable] = None) -> bool:
+        """Queue a row; False if a row with the same key is already queued and rows are not merged."""
+        if key is None:
+            key = ('seq', next(self._sequence))
+        elif self.merge_duplicates:
+            if key in self._pending:
+                row = self.merge(self._pending[key], row)
+        elif self.is_queued(key):
+            return False
+        self._pending[key] = row
+        self._wakeup.set()
+        return True
+
+    def is_queued(self, key: Hashable) -> bool:
+        return key in self._pending or key in self._inflight
+
+    def __len__(self) -> int:
+        return len(self._pending) + len(self._inflight)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background flusher and write out everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Let a burst accumulate into one transaction
+            await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("%s寫入失敗，%.0f 秒後重試（%d 筆待寫入）", self.label, RETRY_DELAY, len(self))
+                await asyncio.sleep(RETRY_DELAY)
+                self._wakeup.set()
+
+    async def flush(self) -> int:
+        """Write everything queued now; returns the total reported by ``write``."""
+        async with self._flush_lock:
+            written = 0
+            while self._pending:
+                batch = self._take_batch()
+                try:
+                    written += await self.write([row for _, row in batch])
+                except BaseException:
+                    # Requeue ahead of newer rows so write order is kept
+                    requeued = dict(batch)
+                    for key, row in self._pending.items():
+                        requeued[key] = self.merge(requeued[key], row) if key in requeued else row
+                    self._pending = requeued
+                    raise
+                finally:
+                    for key, _ in batch:
+                        self._inflight.pop(key, None)
+                self.flushed += len(batch)
+                self.batches += 1
+            return written
+
+    def _take_batch(self) -> List[Tuple[Hashable, Any]]:
+        batch = []
+        for key in list(islice(self._pending, self.max_batch)):
+            row = self._pending.pop(key)
+            self._inflight[key] = row
+            batch.append((key, row))
+        return batch
@@ -0,0 +1,98 @@
+"""
+Kairo 批次成員編輯
+
+以有限併發與每路由 token bucket 執行大量成員修改（例如清除暱稱），
+定期回報進度，並將完成狀態寫入資料庫作為檢查點，中斷後可從未完成處繼續。
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Hashable, List, Optional, Sequence, Tuple
+
+from .ratelimit import RouteLimiter
+
+BULK_CONCURRENCY = 4
+BULK_CHECKPOINT_EVERY = 25
+BULK_PROGRESS_INTERVAL = 3.0
+
+EditFunc = Callable[[int, Optional[str]], Awaitable[None]]
+ProgressFunc = Callable[["BulkProgress"], Awaitable[None]]
+
+
+@dataclass
+class BulkProgress:
+    total: int
+    done: int = 0
+    failed: int = 0
+
+    @property
+    def succeeded(self) -> int:
+        return self.done - self.failed
+
+
+class BulkMemberEditor:
+    """Runs a checkpointed bulk job through a shared per-route rate limiter."""
+
+    def __init__(self, db, limiter: RouteLimiter, concurrency: int = BULK_CONCURRENCY,
+                 checkpoint_every: int = BULK_CHECKPOINT_EVERY, progress_interval: float = BULK_PROGRESS_INTERVAL):
+        self._db = db
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.checkpoint_every = checkpoint_every
+        self.progress_interval = progress_interval
+
+    async def run(self, job_id: int, route: Hashable, items: Sequence[Tuple[int, Optional[str]]],
+                  edit: EditFunc, on_progress: Optional[ProgressFunc] = None,
+                  progress: Optional[BulkProgress] = None) -> BulkProgress:
+        """Apply ``edit(user_id, nick)`` to every item and mark the job done.
+
+        Pass ``progress`` to watch the counters while the job runs.
+        """
+        if progress is None:
+            progress = BulkProgress(total=len(items))
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+        finished: List[Tuple[int, Optional[str]]] = []
+        last_report = time.monotonic()
+
+        async def checkpoint():
+            batch = finished[:]
+            finished.clear()
+            if batch:
+                await self._db.run(self._db.mark_bulk_items_done, job_id, batch)
+
+        async def worker():
+            nonlocal last_report
+            while True:
+                try:
+                    user_id, nick = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await self.limiter.acquire(route)
+                error = None
+                try:
+                    await edit(user_id, nick)
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                    progress.failed += 1
+                progress.done += 1
+                finished.append((user_id, error))
+
+                if len(finished) >= self.checkpoint_every:
+                    await checkpoint()
+                if on_progress and time.monotonic() - last_report >= self.progress_interval:
+                    last_report = time.monotonic()
+                    try:
+                        await on_progress(progress)
+                    except Exception as e:
+                        print(f"批次作業 {job_id} 進度更新失敗: {e}")
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(items)) or 1)))
+        finally:
+            # Persist whatever finished, even when cancelled, so a rerun resumes here
+            await checkpoint()
+        await self._db.run(self._db.finish_bulk_job, job_id)
+        return progress
@@ -0,0 +1,132 @@
+"""
+Kairo 問答競賽
+
+限時競賽期間，每題的解題者集合常駐記憶體，重複解題以 O(1) 判斷並拒絕；
+支援固定分數、首殺加成與隨解題人數遞減的計分方式。解題紀錄採 write-behind，
+以批次交易寫入 qa_solves，重新啟動時由資料庫重建。
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .batching import BatchWriter, utc_timestamp
+
+CONTEST_SCORING = ('fixed', 'first_blood', 'decay')
+# First solver gets this fraction of the points on top
+FIRST_BLOOD_BONUS = 0.5
+# Each later solver gets this factor less, but never below the floor fraction
+DECAY_FACTOR = 0.9
+DECAY_FLOOR = 0.3
+SOLVE_FLUSH_INTERVAL = 0.05
+SOLVE_MAX_BATCH = 500
+
+SolveRow = Tuple[int, int, int, int, str]  # (contest_id, question_id, user_id, points, solved_at)
+
+
+def contest_points(scoring: str, base: int, solve_number: int) -> int:
+    """Points for the ``solve_number``-th (1-based) correct answer to a question worth ``base``."""
+    if scoring == 'first_blood' and solve_number == 1:
+        return base + round(base * FIRST_BLOOD_BONUS)
+    if scoring == 'decay':
+        return max(round(base * DECAY_FLOOR), round(base * DECAY_FACTOR ** (solve_number - 1)))
+    return base
+
+
+@dataclass
+class Award:
+    points: int
+    solve_number: int
+
+    @property
+    def first_blood(self) -> bool:
+        return self.solve_number == 1
+
+
+@dataclass
+class Contest:
+    contest_id: int
+    guild_id: int
+    scoring: str
+    starts_at: datetime
+    ends_at: datetime
+    solved: Dict[int, Set[int]] = field(default_factory=dict)
+
+    @classmethod
+    def from_row(cls, row) -> "Contest":
+        return cls(
+            contest_id=row['id'], guild_id=row['guild_id'], scoring=row['scoring'],
+            starts_at=datetime.fromisoformat(row['starts_at']), ends_at=datetime.fromisoformat(row['ends_at']),
+        )
+
+    def is_open(self, now: Optional[datetime] = None) -> bool:
+        now = now or datetime.now()
+        return self.starts_at <= now < self.ends_at
+
+    def has_solved(self, question_id: int, user_id: int) -> bool:
+        return user_id in self.solved.get(question_id, ())
+
+    def award(self, question_id: int, user_id: int, base: int) -> Optional[Award]:
+        """Record a correct answer; None if the user already solved this question."""
+        solvers = self.solved.setdefault(question_id, set())
+        if user_id in solvers:
+            return None
+        solvers.add(user_id)
+        return Award(contest_points(self.scoring, base, len(solvers)), len(solvers))
+
+    def solve_counts(self) -> Dict[int, int]:
+        return {question_id: len(solvers) for question_id, solvers in self.solved.items()}
+
+
+class Contests:
+    """Each guild's open contest."""
+
+    def __init__(self):
+        self._contests: Dict[int, Contest] = {}
+
+    def load(self, rows: Iterable):
+        """Replace the state from TenantDB.get_active_qa_contests rows (one per contest/solve pair)."""
+        self._contests.clear()
+        by_id: Dict[int, Contest] = {}
+        for row in rows:
+            contest = by_id.get(row['id'])
+            if contest is None:
+                contest = by_id[row['id']] = Contest.from_row(row)
+                self._contests[contest.guild_id] = contest
+            if row['question_id'] is not None:
+                contest.solved.setdefault(row['question_id'], set()).add(row['user_id'])
+
+    def add(self, contest: Contest):
+        self._contests[contest.guild_id] = contest
+
+    def get(self, guild_id: int) -> Optional[Contest]:
+        return self._contests.get(guild_id)
+
+    def find(self, contest_id: int) -> Optional[Contest]:
+        return next((contest for contest in self._contests.values() if contest.contest_id == contest_id), None)
+
+    def __iter__(self):
+        return iter(list(self._contests.values()))
+
+    def get_open(self, guild_id: int, now: Optional[datetime] = None) -> Optional[Contest]:
+        contest = self._contests.get(guild_id)
+        return contest if contest and contest.is_open(now) else None
+
+    def remove(self, guild_id: int) -> Optional[Contest]:
+        return self._contests.pop(guild_id, None)
+
+
+class SolveQueue(BatchWriter):
+    """In-memory solve buffer flushed to ``qa_solves`` in batched transactions."""
+
+    label = "解題紀錄"
+
+    def __init__(self, db, flush_interval: float = SOLVE_FLUSH_INTERVAL, max_batch: int = SOLVE_MAX_BATCH):
+        super().__init__(db, flush_interval, max_batch)
+
+    def submit(self, contest_id: int, question_id: int, user_id: int, points: int):
+        self.enqueue((contest_id, question_id, user_id, points, utc_timestamp()))
+
+    async def write(self, rows: List[SolveRow]) -> int:
+        """Returns how many solves were new."""
+        return await self._db.run(self._db.record_qa_solves, rows)
@@ -0,0 +1,68 @@
+"""
+Kairo CTFd HTTP 用戶端
+
+以 aiohttp 非同步呼叫 CTFd API，不再阻塞事件迴圈；每個 CTFd base_url 共用一個
+保持連線 (keep-alive) 的連線池，並分別設定連線與讀取逾時。
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict
+
+import aiohttp
+
+# A CTFd that cannot be reached fails fast; a slow one gets longer to answer
+CTFD_CONNECT_TIMEOUT = float(os.getenv('CTFD_CONNECT_TIMEOUT', '5'))
+CTFD_READ_TIMEOUT = float(os.getenv('CTFD_READ_TIMEOUT', '10'))
+# Open connections kept per CTFd instance
+CTFD_POOL_SIZE = int(os.getenv('CTFD_POOL_SIZE', '10'))
+
+
+@dataclass
+class CTFdResponse:
+    """A fully read response, so the connection is already back in the pool."""
+    status_code: int
+    text: str
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+class CTFdClient:
+    """One pooled aiohttp session per CTFd base_url."""
+
+    def __init__(self, connect_timeout: float = CTFD_CONNECT_TIMEOUT, read_timeout: float = CTFD_READ_TIMEOUT,
+                 pool_size: int = CTFD_POOL_SIZE):
+        # sock_connect covers the TCP/TLS handshake, sock_read each wait for response bytes
+        self.timeout = aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout, sock_read=read_timeout)
+        self.pool_size = pool_size
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+
+    def session(self, base_url: str) -> aiohttp.ClientSession:
+        """The session for ``base_url``, created on first use inside the running loop."""
+        session = self._sessions.get(base_url)
+        if session is None or session.closed:
+            session = self._sessions[base_url] = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self.pool_size),
+                timeout=self.timeout,
+            )
+        return session
+
+    async def request(self, base_url: str, token: str, method: str, endpoint: str, **kwargs) -> CTFdResponse:
+        """Call ``{base_url}/api/v1{endpoint}``; connection errors and timeouts propagate."""
+        headers = {
+            'Authorization': f"Token {token}",
+            'Content-Type': 'application/json'
+        }
+        async with self.session(base_url).request(method, f"{base_url}/api/v1{endpoint}", headers=headers, **kwargs) as response:
+            return CTFdResponse(response.status, await response.text())
+
+    async def close(self):
+        """Close every pool; later requests open new ones."""
+        sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            await session.close()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
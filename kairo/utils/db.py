@@ -0,0 +1,112 @@
+"""
+Kairo SQLite 連線管理
+
+提供長駐、每個執行緒一條的 SQLite 連線，避免每次互動都重新連線與解析 schema；
+並提供專用資料庫執行緒，讓 asyncio 事件迴圈不會被 SQLite I/O 阻塞。
+"""
+
+import asyncio
+import functools
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Sequence, Tuple, TypeVar, Union
+
+T = TypeVar("T")
+
+PragmaValue = Union[str, int]
+
+# Tuned for a single-process bot doing many small reads and short write bursts.
+DEFAULT_PRAGMAS: Sequence[Tuple[str, PragmaValue]] = (
+    ("journal_mode", "WAL"),       # readers never block the writer
+    ("synchronous", "NORMAL"),     # safe with WAL, fsync only at checkpoints
+    ("cache_size", -16000),        # ~16 MB page cache per connection
+    ("mmap_size", 134217728),      # 128 MB memory-mapped I/O
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", 5000),
+)
+
+# Prepared statements kept per connection, keyed by SQL text
+STATEMENT_CACHE_SIZE = 256
+
+
+class ConnectionManager:
+    """Hands out one long-lived connection per thread for a database file."""
+
+    def __init__(self, db_path: str, pragmas: Sequence[Tuple[str, PragmaValue]] = DEFAULT_PRAGMAS):
+        self.db_path = db_path
+        self.pragmas = pragmas
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._generation = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # check_same_thread is disabled only so close_all() can run from any
+        # thread; each connection is otherwise used by the thread that opened it.
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas:
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def get(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.generation != self._generation:
+            conn = self._connect()
+            with self._lock:
+                self._connections.append(conn)
+                self._local.generation = self._generation
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Same semantics as ``with sqlite3.connect(...) as conn``: commit on success, rollback on error."""
+        conn = self.get()
+        with conn:
+            yield conn
+
+    def close_all(self):
+        """Close every connection handed out so far; threads reconnect lazily."""
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+            self._generation += 1
+
+
+class DatabaseExecutor:
+    """Runs blocking database work on dedicated worker thread(s).
+
+    Jobs are queued in submission order. With the default single worker every
+    write is serialised on one connection, so SQLite's writer lock is never
+    contended from inside the bot.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kairo-db")
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        """Finish queued jobs and stop the worker thread(s)."""
+        self._executor.shutdown(wait=wait)
+        # A fresh pool keeps the owner usable after close() (tests, cog reloads)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="kairo-db")
+
+
+def ensure_parent_dir(db_path: str):
+    parent = os.path.dirname(db_path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
@@ -1,11 +1,12 @@
 import openpyxl
 from openpyxl import Workbook
 import os
+import csv
 import shutil
 from filelock import FileLock
 from datetime import datetime
 from typing import List, Dict, Any, Optional
-import sqlite3
+from .tenant import tenant_db
 
 def ensure_excel_file_exists(excel_path: str) -> bool:
     """Ensure Excel file exists with Journal worksheet"""
@@ -187,12 +188,42 @@ def export_journal_csv(excel_path: str) -> Optional[str]:
         print(f"Excel export error: {e}")
         return None
 
+ATTENDANCE_EXPORT_HEADERS = ["Session", "User ID", "Username", "Signed In (UTC)"]
+
+class AttendanceExportWriter:
+    """Writes attendance rows to CSV or a write-only XLSX file as they arrive, never holding them all"""
+
+    def __init__(self, path: str, file_format: str = "csv"):
+        self.path = path
+        self.file_format = file_format
+        self.rows = 0
+        if file_format == "xlsx":
+            self._workbook = Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet("Attendance")
+            self._sheet.append(ATTENDANCE_EXPORT_HEADERS)
+        else:
+            # utf-8-sig so Excel opens Chinese usernames correctly
+            self._file = open(path, "w", newline="", encoding="utf-8-sig")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(ATTENDANCE_EXPORT_HEADERS)
+
+    def write_rows(self, rows) -> None:
+        """Append (session_id, ts, user_id, username) rows"""
+        for session_id, ts, user_id, username in rows:
+            # Excel cannot hold 64-bit Discord ids as numbers without losing precision
+            values = [session_id, str(user_id), username, ts]
+            if self.file_format == "xlsx":
+                self._sheet.append(values)
+            else:
+                self._writer.writerow(values)
+            self.rows += 1
+
+    def close(self) -> None:
+        if self.file_format == "xlsx":
+            self._workbook.save(self.path)
+        else:
+            self._file.close()
+
 def get_guild_excel_path(guild_id: int) -> Optional[str]:
     """Get Excel file path for a guild from configuration"""
-    with sqlite3.connect("data/tenant.db") as conn:
-        cursor = conn.execute(
-            "SELECT excel_path FROM org_configs WHERE guild_id = ?",
-            (guild_id,)
-        )
-        row = cursor.fetchone()
-        return row[0] if row and row[0] else None
\ No newline at end of file
+    return tenant_db.get_excel_path(guild_id)
\ No newline at end of file
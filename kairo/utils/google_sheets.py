@@ -6,7 +6,7 @@ from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import os
-from .tenant import BookkeepingSettings
+from .tenant import BookkeepingSettings, tenant_db
 
 class GoogleSheetsManager:
     def __init__(self, credentials_path: str = None):
@@ -170,17 +170,11 @@ class GoogleSheetsManager:
         pass
 
 def get_guild_google_sheets_url(guild_id: int) -> Optional[str]:
-    import sqlite3
-    with sqlite3.connect("data/tenant.db") as conn:
-        cursor = conn.execute("SELECT excel_path FROM org_configs WHERE guild_id = ?", (guild_id,))
-        row = cursor.fetchone()
-        return row[0] if row and row[0] else None
+    return tenant_db.get_excel_path(guild_id)
 
 def set_guild_google_sheets_url(guild_id: int, url: str) -> bool:
-    import sqlite3
     try:
-        with sqlite3.connect("data/tenant.db") as conn:
-            conn.execute("INSERT OR REPLACE INTO org_configs (guild_id, excel_path) VALUES (?, ?)", (guild_id, url))
+        tenant_db.set_excel_path(guild_id, url)
         return True
     except Exception as e:
         print(f"設置 Google Sheets URL 失敗: {e}")
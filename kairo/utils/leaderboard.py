@@ -0,0 +1,208 @@
+"""
+Kairo 排行榜
+
+每個伺服器在記憶體中維護一份依分數排序的排行榜，啟動時由 scores 表重建，
+每次分數變動即時更新；排序資料分成多個有上限的區塊，並以 Fenwick 樹記錄
+各區塊大小，更新、名次查詢與取前 K 名皆為對數時間，不需每次查詢都排序。
+"""
+
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# (user_id, score, rank); tied scores share the better rank
+Entry = Tuple[int, int, int]
+# Items per bucket after a split; a bucket splits when it doubles
+SORTED_LIST_LOAD = 512
+
+
+class SortedList:
+    """Sorted sequence stored as buckets of at most ``2 * load`` items.
+
+    Inserts and removals shift one bucket, not the whole sequence; a Fenwick
+    tree over bucket sizes turns a global index into (bucket, offset) and back
+    in O(log n). Removal assumes the value is present.
+    """
+
+    def __init__(self, items: Iterable[Any] = (), load: int = SORTED_LIST_LOAD):
+        self._load = load
+        ordered = sorted(items)
+        self._lists: List[List[Any]] = [ordered[i:i + load] for i in range(0, len(ordered), load)]
+        self._maxes: List[Any] = [bucket[-1] for bucket in self._lists]
+        self._len = len(ordered)
+        self._build_index()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self):
+        for bucket in self._lists:
+            yield from bucket
+
+    def _build_index(self):
+        """Rebuild the Fenwick tree; only needed when buckets are split or dropped."""
+        tree = [0] + [len(bucket) for bucket in self._lists]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _update(self, bucket: int, delta: int):
+        i = bucket + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, bucket: int) -> int:
+        """Number of items in buckets before ``bucket``."""
+        total, i = 0, bucket
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """(bucket, offset) of the item at global ``index``."""
+        position, step = 0, 1 << (len(self._lists).bit_length() - 1)
+        while step:
+            if position + step <= len(self._lists) and self._tree[position + step] <= index:
+                position += step
+                index -= self._tree[position]
+            step >>= 1
+        return position, index
+
+    def add(self, value: Any):
+        if not self._lists:
+            self._lists, self._maxes, self._len = [[value]], [value], 1
+            self._build_index()
+            return
+        b = bisect_left(self._maxes, value)
+        if b == len(self._maxes):
+            b -= 1
+            self._lists[b].append(value)
+            self._maxes[b] = value
+        else:
+            insort(self._lists[b], value)
+        self._len += 1
+        bucket = self._lists[b]
+        if len(bucket) > 2 * self._load:
+            half = bucket[self._load:]
+            del bucket[self._load:]
+            self._maxes[b] = bucket[-1]
+            self._lists.insert(b + 1, half)
+            self._maxes.insert(b + 1, half[-1])
+            self._build_index()
+        else:
+            self._update(b, 1)
+
+    def remove(self, value: Any):
+        b = bisect_left(self._maxes, value)
+        bucket = self._lists[b]
+        del bucket[bisect_left(bucket, value)]
+        self._len -= 1
+        if bucket:
+            self._maxes[b] = bucket[-1]
+            self._update(b, -1)
+        else:
+            del self._lists[b]
+            del self._maxes[b]
+            self._build_index()
+
+    def bisect_left(self, value: Any) -> int:
+        b = bisect_left(self._maxes, value)
+        if b == len(self._maxes):
+            return self._len
+        return self._prefix(b) + bisect_left(self._lists[b], value)
+
+    def slice(self, start: int, stop: int) -> List[Any]:
+        start, stop = max(0, start), min(stop, self._len)
+        if start >= stop:
+            return []
+        b, offset = self._locate(start)
+        items: List[Any] = []
+        while len(items) < stop - start:
+            items.extend(self._lists[b][offset:offset + stop - start - len(items)])
+            b, offset = b + 1, 0
+        return items
+
+
+class Leaderboard:
+    """One guild's positive scores kept sorted by (score desc, user_id)."""
+
+    def __init__(self):
+        self._scores: Dict[int, int] = {}
+        self._order = SortedList()  # (-score, user_id)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def load(self, rows: Iterable[Tuple[int, int]]):
+        """Replace the board with (user_id, score) rows."""
+        self._scores = {user_id: score for user_id, score in rows if score > 0}
+        self._order = SortedList((-score, user_id) for user_id, score in self._scores.items())
+
+    def set(self, user_id: int, score: int):
+        """Record a user's new total; scores of 0 or below leave the board."""
+        old = self._scores.pop(user_id, None)
+        if old is not None:
+            self._order.remove((-old, user_id))
+        if score > 0:
+            self._scores[user_id] = score
+            self._order.add((-score, user_id))
+
+    def score(self, user_id: int) -> Optional[int]:
+        return self._scores.get(user_id)
+
+    def rank_of_score(self, score: int) -> int:
+        """1 + the number of users with a strictly higher score."""
+        return self._order.bisect_left((-score,)) + 1
+
+    def rank(self, user_id: int) -> Optional[int]:
+        score = self._scores.get(user_id)
+        return None if score is None else self.rank_of_score(score)
+
+    def position(self, user_id: int) -> Optional[int]:
+        """0-based index of the user in board order."""
+        score = self._scores.get(user_id)
+        return None if score is None else self._order.bisect_left((-score, user_id))
+
+    def slice(self, start: int, stop: int) -> List[Entry]:
+        return [(user_id, -neg, self.rank_of_score(-neg)) for neg, user_id in self._order.slice(start, stop)]
+
+    def top(self, k: int) -> List[Entry]:
+        return self.slice(0, k)
+
+    def around(self, user_id: int, radius: int = 5) -> List[Entry]:
+        """The user plus up to ``radius`` entries above and below; empty if the user has no score."""
+        position = self.position(user_id)
+        if position is None:
+            return []
+        return self.slice(position - radius, position + radius + 1)
+
+
+class Leaderboards:
+    """Per-guild leaderboards."""
+
+    def __init__(self):
+        self._boards: Dict[int, Leaderboard] = {}
+
+    def get(self, guild_id: int) -> Leaderboard:
+        board = self._boards.get(guild_id)
+        if board is None:
+            board = self._boards[guild_id] = Leaderboard()
+        return board
+
+    def load(self, rows: Iterable[Tuple[int, int, int]]):
+        """Rebuild every board from (guild_id, user_id, score) rows."""
+        grouped: Dict[int, List[Tuple[int, int]]] = {}
+        for guild_id, user_id, score in rows:
+            grouped.setdefault(guild_id, []).append((user_id, score))
+        self._boards = {}
+        for guild_id, scores in grouped.items():
+            self.get(guild_id).load(scores)
+
+    def set(self, guild_id: int, user_id: int, score: int):
+        self.get(guild_id).set(user_id, score)
+
+    def reset(self, guild_id: int):
+        self._boards.pop(guild_id, None)
@@ -0,0 +1,264 @@
+"""
+Kairo 資料庫遷移
+
+以 schema_version 表記錄已套用的版本，依序套用遷移；資料回填分批執行，
+每批為獨立的短交易，不會長時間佔用寫入鎖。
+"""
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional, Union
+
+# Processes at most ``batch_size`` rows inside the caller's transaction and
+# returns how many it handled; 0 means the backfill is finished. Backfills must
+# be idempotent (only touch rows not yet backfilled) so they can resume after a crash.
+BackfillStep = Callable[[sqlite3.Connection, int], int]
+
+BACKFILL_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    up: Union[str, Callable[[sqlite3.Connection], None]]
+    backfill: Optional[BackfillStep] = None
+
+
+def ensure_version_table(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            backfilled BOOLEAN DEFAULT 1,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def add_column(conn: sqlite3.Connection, table: str, column: str, definition: str):
+    """ALTER TABLE ... ADD COLUMN that is a no-op when the column already exists."""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in existing:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def apply_migrations(conn: sqlite3.Connection, migrations: Iterable[Migration]) -> List[int]:
+    """Apply pending schema changes, each in its own transaction.
+
+    Backfills are not run here; the migration is recorded with backfilled = 0
+    and picked up by pending_backfills().
+    """
+    ensure_version_table(conn)
+    conn.commit()
+
+    applied = []
+    version = current_version(conn)
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version <= version:
+            continue
+        with conn:
+            _begin(conn)
+            if callable(migration.up):
+                migration.up(conn)
+            else:
+                for statement in _split_statements(migration.up):
+                    conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_version (version, description, backfilled) VALUES (?, ?, ?)",
+                (migration.version, migration.description, migration.backfill is None)
+            )
+        applied.append(migration.version)
+    return applied
+
+
+def pending_backfills(conn: sqlite3.Connection, migrations: Iterable[Migration]) -> List[Migration]:
+    rows = conn.execute("SELECT version FROM schema_version WHERE backfilled = 0").fetchall()
+    pending = {row[0] for row in rows}
+    return sorted((m for m in migrations if m.version in pending and m.backfill), key=lambda m: m.version)
+
+
+def run_backfill_batch(conn: sqlite3.Connection, migration: Migration, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Run one batch in one short transaction; marks the migration done when nothing is left."""
+    with conn:
+        _begin(conn)
+        processed = migration.backfill(conn, batch_size)
+        if processed == 0:
+            conn.execute("UPDATE schema_version SET backfilled = 1 WHERE version = ?", (migration.version,))
+    return processed
+
+
+def _begin(conn: sqlite3.Connection):
+    # sqlite3 does not open a transaction for DDL on its own, so start one
+    # explicitly; IMMEDIATE takes the write lock up front instead of mid-batch.
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+
+
+def _split_statements(script: str) -> List[str]:
+    # executescript() would COMMIT first and escape the surrounding transaction
+    statements, buffer = [], ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip():
+                statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+
+# Closed sessions rolled up per backfill batch; one session is roughly a class worth of rows
+ROLLUP_SESSIONS_PER_BATCH_DIVISOR = 50
+
+
+def rollup_session(conn: sqlite3.Connection, session_id: int) -> bool:
+    """Fold one closed session into the attendance rollups; no-op if it was already rolled up."""
+    inserted = conn.execute("""
+        INSERT OR IGNORE INTO session_headcounts (session_id, guild_id, headcount)
+        SELECT id, guild_id, (SELECT COUNT(*) FROM records WHERE session_id = sessions.id)
+        FROM sessions WHERE id = ?
+    """, (session_id,)).rowcount
+    if not inserted:
+        return False
+    conn.execute("""
+        INSERT INTO attendance_member_stats (guild_id, user_id, attended, last_session_id)
+        SELECT sessions.guild_id, records.user_id, 1, records.session_id
+        FROM records JOIN sessions ON sessions.id = records.session_id
+        WHERE records.session_id = ?
+        ON CONFLICT (guild_id, user_id) DO UPDATE SET
+            attended = attended + 1, last_session_id = excluded.last_session_id
+    """, (session_id,))
+    conn.execute("""
+        INSERT INTO attendance_guild_stats (guild_id, sessions, attendances)
+        SELECT guild_id, 1, headcount FROM session_headcounts WHERE session_id = ?
+        ON CONFLICT (guild_id) DO UPDATE SET
+            sessions = sessions + 1, attendances = attendances + excluded.attendances
+    """, (session_id,))
+    return True
+
+
+def _backfill_attendance_rollups(conn: sqlite3.Connection, batch_size: int) -> int:
+    rows = conn.execute("""
+        SELECT id FROM sessions
+        WHERE active = 0 AND id NOT IN (SELECT session_id FROM session_headcounts)
+        ORDER BY id LIMIT ?
+    """, (max(1, batch_size // ROLLUP_SESSIONS_PER_BATCH_DIVISOR),)).fetchall()
+    for row in rows:
+        rollup_session(conn, row[0])
+    return len(rows)
+
+
+# --- Migrations (append only; never edit one that has shipped) ---
+MIGRATIONS: List[Migration] = [
+    Migration(1, "secondary indexes for hot tenant queries", """
+        CREATE INDEX IF NOT EXISTS idx_sessions_guild_active ON sessions (guild_id, active);
+        CREATE INDEX IF NOT EXISTS idx_sessions_guild ON sessions (guild_id);
+        CREATE INDEX IF NOT EXISTS idx_records_session_ts ON records (session_id, ts, user_id, username);
+        CREATE INDEX IF NOT EXISTS idx_scores_guild_score ON scores (guild_id, score DESC, user_id);
+    """),
+    Migration(2, "partial index over active sessions for the startup load", """
+        CREATE INDEX IF NOT EXISTS idx_sessions_active ON sessions (id) WHERE active = 1;
+    """),
+    Migration(3, "checkpoint tables for resumable bulk member edits", """
+        CREATE TABLE IF NOT EXISTS bulk_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'running',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_bulk_jobs_guild_kind ON bulk_jobs (guild_id, kind, status);
+        CREATE TABLE IF NOT EXISTS bulk_job_items (
+            job_id INTEGER,
+            user_id INTEGER,
+            nick TEXT,
+            done BOOLEAN DEFAULT 0,
+            error TEXT,
+            PRIMARY KEY (job_id, user_id)
+        );
+    """),
+    Migration(4, "attendance rollups maintained at session close", """
+        CREATE TABLE IF NOT EXISTS session_headcounts (
+            session_id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            headcount INTEGER NOT NULL,
+            closed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_session_headcounts_guild ON session_headcounts (guild_id, session_id);
+        CREATE TABLE IF NOT EXISTS attendance_member_stats (
+            guild_id INTEGER,
+            user_id INTEGER,
+            attended INTEGER NOT NULL DEFAULT 0,
+            last_session_id INTEGER,
+            PRIMARY KEY (guild_id, user_id)
+        );
+        CREATE TABLE IF NOT EXISTS attendance_guild_stats (
+            guild_id INTEGER PRIMARY KEY,
+            sessions INTEGER NOT NULL DEFAULT 0,
+            attendances INTEGER NOT NULL DEFAULT 0
+        );
+    """, _backfill_attendance_rollups),
+    Migration(5, "per-guild QA question bank", """
+        CREATE TABLE IF NOT EXISTS qa_questions (
+            guild_id INTEGER NOT NULL,
+            id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            answers TEXT NOT NULL,
+            points INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (guild_id, id)
+        );
+    """),
+    Migration(6, "answer match mode per QA question", lambda conn: add_column(
+        conn, "qa_questions", "match_mode", "TEXT NOT NULL DEFAULT 'exact'"
+    )),
+    Migration(7, "timed QA contests and their solves", """
+        CREATE TABLE IF NOT EXISTS qa_contests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            scoring TEXT NOT NULL,
+            starts_at TIMESTAMP NOT NULL,
+            ends_at TIMESTAMP NOT NULL,
+            active BOOLEAN NOT NULL DEFAULT 1
+        );
+        CREATE INDEX IF NOT EXISTS idx_qa_contests_active ON qa_contests (guild_id) WHERE active = 1;
+        CREATE TABLE IF NOT EXISTS qa_solves (
+            contest_id INTEGER,
+            question_id INTEGER,
+            user_id INTEGER,
+            points INTEGER NOT NULL,
+            solved_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (contest_id, question_id, user_id)
+        );
+    """),
+    Migration(8, "append-only QA answer attempt log", """
+        CREATE TABLE IF NOT EXISTS qa_attempts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            question_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            correct BOOLEAN NOT NULL,
+            attempted_at TIMESTAMP NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_qa_attempts_question ON qa_attempts (guild_id, question_id, user_id, correct);
+    """),
+    # Split out of version 5, which first created it; IF NOT EXISTS keeps databases that ran that version unchanged
+    Migration(9, "partial index of approved guilds for per-module guild lookups", """
+        CREATE INDEX IF NOT EXISTS idx_registration_approved ON registration_status (guild_id) WHERE status = 'approved';
+    """),
+    # Active sessions are served from memory; idx_sessions_active covers the startup load
+    Migration(10, "drop the per-guild active session index nothing queries", """
+        DROP INDEX IF EXISTS idx_sessions_guild_active;
+    """),
+    # Leaderboards are ranked in memory; every score upsert was still maintaining this index
+    Migration(11, "drop the per-guild score ranking index nothing queries", """
+        DROP INDEX IF EXISTS idx_scores_guild_score;
+    """),
+]
@@ -0,0 +1,84 @@
+"""
+Kairo 暱稱規範
+
+將各伺服器的暱稱格式預先編譯為函式並常駐記憶體，並快取已確認符合規範的成員，
+重複簽到的成員不需再讀取設定或重新組合暱稱。
+"""
+
+import itertools
+import string
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Hashable, Optional, Tuple
+
+from .cache import TTLCache
+from .tenant import AttendanceSettings
+
+COMPLIANCE_CACHE_SIZE = 50000
+COMPLIANCE_CACHE_TTL = 6 * 3600
+
+_versions = itertools.count(1)
+
+
+def compile_format(template: str) -> Callable[[str], str]:
+    """Turn a ``{name}`` template into a function; plain templates become string concatenation."""
+    parts = list(string.Formatter().parse(template))
+    if all(field in (None, 'name') and not spec and not conversion for _, field, spec, conversion in parts):
+        literals = [(literal, field is not None) for literal, field, _, _ in parts]
+        return lambda name: ''.join(literal + (name if has_name else '') for literal, has_name in literals)
+    return lambda name: template.format(name=name)
+
+
+@dataclass(frozen=True)
+class NicknamePolicy:
+    guild_id: int
+    enabled: bool
+    staff_role_id: Optional[int]
+    member_format: Callable[[str], str]
+    staff_format: Callable[[str], str]
+    version: int
+
+    @classmethod
+    def from_settings(cls, guild_id: int, settings: AttendanceSettings) -> "NicknamePolicy":
+        return cls(
+            guild_id=guild_id,
+            enabled=settings.rename_enabled,
+            staff_role_id=settings.staff_role_id,
+            member_format=compile_format(settings.rename_format_member),
+            staff_format=compile_format(settings.rename_format_staff),
+            version=next(_versions),
+        )
+
+    def target_for(self, member) -> str:
+        """The nickname ``member`` should have under this policy."""
+        is_staff = self.staff_role_id is not None and any(role.id == self.staff_role_id for role in member.roles)
+        return (self.staff_format if is_staff else self.member_format)(member.name)
+
+    def compliance_key(self, member, display_name: Optional[str] = None) -> Tuple[Hashable, ...]:
+        # The current display name is part of the key so a manual rename is re-checked
+        roles: FrozenSet[int] = frozenset(role.id for role in member.roles)
+        return (self.guild_id, member.id, roles, self.version, display_name or member.display_name)
+
+
+class NicknamePolicies:
+    """Compiled per-guild policies plus the cache of members known to be compliant."""
+
+    def __init__(self):
+        self._policies: Dict[int, NicknamePolicy] = {}
+        self.compliant = TTLCache(maxsize=COMPLIANCE_CACHE_SIZE, ttl=COMPLIANCE_CACHE_TTL)
+
+    def get(self, guild_id: int) -> Optional[NicknamePolicy]:
+        return self._policies.get(guild_id)
+
+    def load(self, guild_id: int, settings: AttendanceSettings) -> NicknamePolicy:
+        policy = self._policies[guild_id] = NicknamePolicy.from_settings(guild_id, settings)
+        return policy
+
+    def invalidate(self, guild_id: int):
+        """Drop the guild's policy; its compliance entries die with the old version."""
+        self._policies.pop(guild_id, None)
+
+    def is_compliant(self, policy: NicknamePolicy, member) -> bool:
+        return self.compliant.get(policy.compliance_key(member), False)
+
+    def mark_compliant(self, policy: NicknamePolicy, member, display_name: Optional[str] = None):
+        self.compliant.set(policy.compliance_key(member, display_name), True)
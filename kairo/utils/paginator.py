@@ -0,0 +1,54 @@
+"""
+Kairo 分頁顯示
+
+將過長的清單拆成多個 embed 頁面，以按鈕切換，取代截斷內容。
+"""
+
+import discord
+from typing import List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+PAGE_SIZE = 40
+
+
+def chunk(items: Sequence[T], size: int = PAGE_SIZE) -> List[Sequence[T]]:
+    return [items[i:i + size] for i in range(0, len(items), size)] or [items[:0]]
+
+
+class EmbedPaginator(discord.ui.View):
+    """Shows one embed at a time with previous/next buttons."""
+
+    def __init__(self, pages: List[discord.Embed], author_id: Optional[int] = None, timeout: float = 300):
+        super().__init__(timeout=timeout)
+        self.pages = pages
+        self.author_id = author_id
+        self.index = 0
+        for number, page in enumerate(pages, start=1):
+            footer = page.footer.text or ""
+            page.set_footer(text=f"{footer} · 第 {number}/{len(pages)} 頁" if footer else f"第 {number}/{len(pages)} 頁")
+        self._sync_buttons()
+
+    @property
+    def current(self) -> discord.Embed:
+        return self.pages[self.index]
+
+    def _sync_buttons(self):
+        self.previous_page.disabled = self.index == 0
+        self.next_page.disabled = self.index >= len(self.pages) - 1
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return self.author_id is None or interaction.user.id == self.author_id
+
+    async def _show(self, interaction: discord.Interaction, index: int):
+        self.index = max(0, min(index, len(self.pages) - 1))
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=self.current, view=self)
+
+    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.index - 1)
+
+    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.index + 1)
@@ -0,0 +1,208 @@
+"""
+Kairo 問答題庫
+
+題目以 (guild_id, id) 為主鍵存放於 qa_questions 資料表；本模組負責將舊版
+全域共用的 data/qa_bank.json 一次性匯入各伺服器，以及題庫的 CSV/JSON/NDJSON
+批次匯入（逐列串流解析、驗證後於單一交易寫入）與串流匯出。
+"""
+
+import csv
+import json
+import os
+from typing import Any, Iterator, List, Sequence, TextIO, Tuple
+
+from .answers import MATCH_MODES, AnswerMatcher
+from .tenant import QAQuestion, TenantDB
+
+# The old bank every guild shared (kairo/data/qa_bank.json); renamed to *.imported once copied
+# into the database. Resolved from the package like tenant.DB_PATH, not the working directory.
+LEGACY_QA_BANK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "qa_bank.json")
+
+QA_FILE_FORMATS = ('csv', 'json', 'ndjson')
+# Attachments above this are refused before download; it also bounds the whole-file JSON load
+QA_IMPORT_MAX_BYTES = 5 * 1024 * 1024
+QA_EXPORT_FIELDS = ['id', 'title', 'answers', 'points', 'match_mode']
+# CSV answers cell separator; a cell starting with '[' is read as a JSON list instead
+CSV_ANSWER_SEPARATOR = ';'
+
+# (row number in the file, error message)
+RowError = Tuple[int, str]
+
+
+def parse_legacy_bank(entries: Sequence[Any]) -> List[QAQuestion]:
+    """Valid questions from the old JSON list; entries without an id get the next free one."""
+    next_id = max((entry['id'] for entry in entries if isinstance(entry, dict) and isinstance(entry.get('id'), int)), default=0) + 1
+    questions, seen = [], set()
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        answers = [str(answer).strip() for answer in entry.get('answers') or [] if str(answer).strip()]
+        title, points = entry.get('title'), entry.get('points')
+        if not isinstance(title, str) or not title or not answers or not isinstance(points, int):
+            continue
+        question_id = entry.get('id')
+        if not isinstance(question_id, int) or question_id in seen:
+            question_id, next_id = next_id, next_id + 1
+        try:
+            question = QAQuestion(id=question_id, title=title, answers=answers, points=points)
+        except ValueError:
+            continue  # An answer that does not compile as a pattern
+        seen.add(question_id)
+        questions.append(question)
+    return questions
+
+
+def import_legacy_bank(db: TenantDB, path: str = LEGACY_QA_BANK) -> int:
+    """Copy the shared JSON bank into every guild using QA, then retire the file.
+
+    Safe to re-run: ids already present in a guild are left alone. Returns the
+    number of questions inserted across all guilds.
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'r', encoding='utf-8') as f:
+        questions = parse_legacy_bank(json.load(f))
+
+    guild_ids = db.get_module_guild_ids('qa')
+    if questions and not guild_ids:
+        return 0  # Keep the file until some guild can receive the questions
+
+    imported = sum(db.import_qa_questions(guild_id, questions) for guild_id in guild_ids)
+    os.replace(path, path + '.imported')
+    return imported
+
+
+def iter_question_records(f: TextIO, file_format: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (row number, record) pairs from an import file.
+
+    CSV and NDJSON are read one line at a time. A JSON file must be a single
+    array and is decoded whole, so its memory use is bounded only by
+    QA_IMPORT_MAX_BYTES; large banks should use NDJSON. A record that cannot
+    be decoded is yielded as a ValueError so the caller can report it and go
+    on. Raises ValueError if the file as a whole is unreadable.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(f)
+        if not reader.fieldnames or 'title' not in reader.fieldnames:
+            raise ValueError("CSV 第一列必須是欄位名稱，且包含 title")
+        try:
+            for record in reader:
+                yield reader.line_num, record
+        except csv.Error as e:
+            raise ValueError(f"CSV 第 {reader.line_num} 列無法解析：{e}") from e
+    elif file_format == 'ndjson':
+        for row_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield row_number, json.loads(line)
+            except ValueError as e:
+                yield row_number, ValueError(f"JSON 格式錯誤：{e}")
+    elif file_format == 'json':
+        # Not streamed: the stdlib has no incremental array parser
+        records = json.load(f)
+        if not isinstance(records, list):
+            raise ValueError("JSON 檔案必須是題目陣列")
+        yield from enumerate(records, 1)
+    else:
+        raise ValueError(f"不支援的檔案格式：{file_format}")
+
+
+def _parse_answers(value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = json.loads(value) if value.lstrip().startswith('[') else value.split(CSV_ANSWER_SEPARATOR)
+    if not isinstance(value, list):
+        raise ValueError("answers 必須是字串或字串陣列")
+    return [str(answer).strip() for answer in value if str(answer).strip()]
+
+
+def parse_question_record(record: Any) -> Tuple[str, List[str], int, str]:
+    """Validate one imported record into (title, answers, points, match_mode); raises ValueError in Chinese."""
+    if isinstance(record, ValueError):
+        raise record
+    if not isinstance(record, dict):
+        raise ValueError("每筆資料必須是物件")
+
+    title = str(record.get('title') or '').strip()
+    if not title:
+        raise ValueError("缺少題目 (title)")
+    try:
+        answers = _parse_answers(record.get('answers') or [])
+    except ValueError:
+        raise ValueError("answers 不是有效的 JSON 陣列") from None
+    if not answers:
+        raise ValueError("至少需要一個答案 (answers)")
+    try:
+        points = int(record.get('points'))
+    except (TypeError, ValueError):
+        raise ValueError("分數 (points) 必須是整數") from None
+    if points < 1:
+        raise ValueError("分數 (points) 必須大於 0")
+    match_mode = str(record.get('match_mode') or 'exact').strip()
+    if match_mode not in MATCH_MODES:
+        raise ValueError(f"比對方式 (match_mode) 必須是 {'、'.join(MATCH_MODES)}")
+    try:
+        AnswerMatcher(answers, match_mode)
+    except ValueError as e:
+        raise ValueError(f"答案中的正規表示式無效：{e}") from None
+    return title, answers, points, match_mode
+
+
+def import_question_file(db: TenantDB, guild_id: int, path: str, file_format: str) -> Tuple[List[int], List[RowError]]:
+    """Stream ``path`` into the guild's bank in one transaction; meant for the DB thread.
+
+    Invalid rows are skipped and reported; valid rows get new ids. If the file
+    itself is unreadable a ValueError is raised and nothing is stored.
+    """
+    errors: List[RowError] = []
+
+    def valid_questions():
+        # utf-8-sig accepts files saved by Excel as well as plain UTF-8
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row_number, record in iter_question_records(f, file_format):
+                try:
+                    yield parse_question_record(record)
+                except ValueError as e:
+                    errors.append((row_number, str(e)))
+
+    return db.add_qa_questions(guild_id, valid_questions()), errors
+
+
+class QAExportWriter:
+    """Writes question rows to CSV, JSON or NDJSON as they arrive, never holding them all"""
+
+    def __init__(self, path: str, file_format: str = 'csv'):
+        self.path = path
+        self.file_format = file_format
+        self.rows = 0
+        # utf-8-sig so Excel opens Chinese titles correctly
+        self._file = open(path, 'w', newline='', encoding='utf-8-sig' if file_format == 'csv' else 'utf-8')
+        if file_format == 'csv':
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(QA_EXPORT_FIELDS)
+        elif file_format == 'json':
+            self._file.write('[')
+
+    def write_rows(self, rows) -> None:
+        """Append qa_questions rows (id, title, answers JSON, points, match_mode)"""
+        for question_id, title, answers, points, match_mode in rows:
+            answers = json.loads(answers)
+            if self.file_format == 'csv':
+                joined = CSV_ANSWER_SEPARATOR.join(answers)
+                # Fall back to a JSON list when joining would not split back into the same answers
+                if any(CSV_ANSWER_SEPARATOR in answer for answer in answers) or joined.lstrip().startswith('['):
+                    joined = json.dumps(answers, ensure_ascii=False)
+                self._writer.writerow([question_id, title, joined, points, match_mode])
+            else:
+                record = json.dumps(dict(zip(QA_EXPORT_FIELDS, (question_id, title, answers, points, match_mode))),
+                                    ensure_ascii=False)
+                if self.file_format == 'json':
+                    self._file.write(('\n' if self.rows == 0 else ',\n') + record)
+                else:
+                    self._file.write(record + '\n')
+            self.rows += 1
+
+    def close(self) -> None:
+        if self.file_format == 'json':
+            self._file.write('\n]\n' if self.rows else ']\n')
+        self._file.close()
@@ -0,0 +1,150 @@
+"""
+Kairo 速率限制
+
+以 token bucket 控制對 Discord API 各路由的請求速率，避免大量操作觸發 429；
+並以滑動視窗限制使用者的嘗試次數（例如輸入錯誤的簽到碼）。
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable
+
+# Discord's member-edit bucket is per guild; stay below it so bulk jobs never see a 429
+MEMBER_EDIT_RATE = float(os.getenv('MEMBER_EDIT_RATE', '1.0'))
+MEMBER_EDIT_BURST = int(os.getenv('MEMBER_EDIT_BURST', '5'))
+# Sign-in renames get their own bucket so a sign-in burst neither queues behind bulk jobs nor starves them;
+# a rename that cannot get a token within the wait is skipped and retried at the member's next sign-in
+SIGNIN_RENAME_RATE = float(os.getenv('SIGNIN_RENAME_RATE', '5.0'))
+SIGNIN_RENAME_BURST = int(os.getenv('SIGNIN_RENAME_BURST', '10'))
+SIGNIN_RENAME_MAX_WAIT = float(os.getenv('SIGNIN_RENAME_MAX_WAIT', '2.0'))
+
+
+class TokenBucket:
+    """Allows ``rate`` operations per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+        self._waiting = 0
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def acquire(self):
+        """Wait until a token is available; waiters are served in arrival order."""
+        self._waiting += 1
+        try:
+            async with self._lock:
+                while not self.try_acquire():
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+        finally:
+            self._waiting -= 1
+
+    def wait_estimate(self) -> float:
+        """Seconds a new caller of acquire() would wait behind the callers already queued."""
+        self._refill()
+        return max(0.0, (self._waiting + 1 - self._tokens) / self.rate)
+
+
+class RouteLimiter:
+    """One token bucket per route key, e.g. ("member_edit", guild_id)."""
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+
+    def bucket(self, route: Hashable) -> TokenBucket:
+        bucket = self._buckets.get(route)
+        if bucket is None:
+            bucket = self._buckets[route] = TokenBucket(self.rate, self.capacity, self._clock)
+        return bucket
+
+    async def acquire(self, route: Hashable):
+        await self.bucket(route).acquire()
+
+    async def acquire_within(self, route: Hashable, timeout: float) -> bool:
+        """Wait at most ``timeout`` seconds for a token; False (and no token taken) if none came in time.
+
+        Gives up at once when the callers already queued would make the wait longer.
+        """
+        bucket = self.bucket(route)
+        if bucket.wait_estimate() > timeout:
+            return False
+        try:
+            await asyncio.wait_for(bucket.acquire(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class SlidingWindowLimiter:
+    """At most ``limit`` events per ``window`` seconds for each key."""
+
+    PRUNE_EVERY = 1024
+
+    def __init__(self, limit: int, window: float, clock: Callable[[], float] = time.monotonic):
+        self.limit = limit
+        self.window = window
+        self._clock = clock
+        self._events: Dict[Hashable, Deque[float]] = {}
+        self._records = 0
+
+    def _trim(self, key: Hashable, now: float) -> Deque[float]:
+        events = self._events.get(key)
+        if events is None:
+            return deque()
+        while events and events[0] <= now - self.window:
+            events.popleft()
+        if not events:
+            del self._events[key]
+        return events
+
+    def is_limited(self, key: Hashable) -> bool:
+        return len(self._trim(key, self._clock())) >= self.limit
+
+    def retry_after(self, key: Hashable) -> float:
+        """Seconds until ``key`` may act again (0 when not limited)."""
+        now = self._clock()
+        events = self._trim(key, now)
+        if len(events) < self.limit:
+            return 0.0
+        return events[-self.limit] + self.window - now
+
+    def record(self, key: Hashable):
+        self._events.setdefault(key, deque()).append(self._clock())
+        self._records += 1
+        if self._records % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def hit(self, key: Hashable) -> bool:
+        """Record an event if allowed; False when the key is over its limit."""
+        if self.is_limited(key):
+            return False
+        self.record(key)
+        return True
+
+    def prune(self):
+        """Drop keys whose events have all left the window."""
+        now = self._clock()
+        for key in list(self._events):
+            self._trim(key, now)
+
+    def __len__(self) -> int:
+        return len(self._events)
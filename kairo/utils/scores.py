@@ -0,0 +1,69 @@
+"""
+Kairo 分數累加
+
+答題加分先在記憶體中依 (伺服器, 使用者) 合併，短暫等待後以單一交易寫入
+scores 表；一波搶答只需每次 flush 一次寫入。
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import List
+
+from .batching import BatchWriter
+
+# Seconds increments wait to be merged; 0 writes every answer straight away
+QA_SCORE_FLUSH_INTERVAL = float(os.getenv('QA_SCORE_FLUSH_INTERVAL', '0'))
+SCORE_MAX_BATCH = 500
+
+
+@dataclass
+class PendingScore:
+    """Merged increment for one (guild_id, user_id) and the adds waiting for its total."""
+    guild_id: int
+    user_id: int
+    points: int
+    waiters: List[asyncio.Future] = field(default_factory=list)
+
+
+class ScoreAccumulator(BatchWriter):
+    """Merges score increments per (guild_id, user_id) and writes them in one transaction per flush."""
+
+    label = "分數"
+    merge_duplicates = True
+
+    def __init__(self, db, flush_interval: float = 0.05, max_batch: int = SCORE_MAX_BATCH):
+        super().__init__(db, flush_interval, max_batch)
+
+    async def add(self, guild_id: int, user_id: int, points: int) -> int:
+        """Queue points and wait for the flush that stores them; returns the new total."""
+        future = asyncio.get_running_loop().create_future()
+        self.enqueue(PendingScore(guild_id, user_id, points, [future]), key=(guild_id, user_id))
+        return await future
+
+    def merge(self, queued: PendingScore, row: PendingScore) -> PendingScore:
+        queued.points += row.points
+        queued.waiters.extend(row.waiters)
+        return queued
+
+    async def write(self, rows: List[PendingScore]) -> int:
+        totals = await self._db.run(self._db.add_scores, [(row.guild_id, row.user_id, row.points) for row in rows])
+        for row, total in zip(rows, totals):
+            for future in row.waiters:
+                if not future.done():
+                    future.set_result(total)
+        return len(rows)
+
+    async def discard(self, guild_id: int) -> int:
+        """Drop the guild's unwritten increments; their waiters get a total of 0.
+
+        Waits for a flush in progress, so nothing for the guild is written after
+        this returns. Returns how many users had increments dropped.
+        """
+        async with self._flush_lock:
+            keys = [key for key in self._pending if key[0] == guild_id]
+            for key in keys:
+                for future in self._pending.pop(key).waiters:
+                    if not future.done():
+                        future.set_result(0)
+            return len(keys)
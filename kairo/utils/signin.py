@@ -0,0 +1,239 @@
+"""
+Kairo 簽到處理
+
+簽到寫入採 write-behind：點擊後立即回覆使用者，紀錄先進入記憶體佇列，
+再以批次交易寫入資料庫；關閉時會將佇列完整寫出。進行中的場次與已簽到名單
+常駐記憶體，簽到時不需查詢資料庫；到期場次由單一排程任務依最小堆積關閉。
+"""
+
+import asyncio
+import heapq
+import secrets
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .batching import BatchWriter, utc_timestamp
+
+SIGNIN_FLUSH_INTERVAL = 0.005
+SIGNIN_MAX_BATCH = 1000
+SIGNIN_CODE_DIGITS = 4
+
+
+
+@dataclass
+class ActiveSession:
+    session_id: int
+    guild_id: int
+    channel_id: int
+    code: str
+    expire_at: datetime
+    canva_url: Optional[str] = None
+    outline: Optional[str] = None
+    signed_in: Set[int] = field(default_factory=set)
+
+    @classmethod
+    def from_row(cls, row) -> "ActiveSession":
+        return cls(
+            session_id=row['id'], guild_id=row['guild_id'], channel_id=row['channel_id'], code=row['code'],
+            expire_at=datetime.fromisoformat(row['expire_at']), canva_url=row['canva_url'], outline=row['outline'],
+        )
+
+
+class ActiveSessions:
+    """Open sign-in sessions, their codes and who has signed in, kept in memory for O(1) checks."""
+
+    def __init__(self):
+        self._sessions: Dict[int, ActiveSession] = {}
+        self._by_guild: Dict[int, Set[int]] = {}
+        # A code maps to None while reserved by new_code() for a session still being created
+        self._by_code: Dict[Tuple[int, str], Optional[int]] = {}
+
+    def load(self, rows: Iterable):
+        """Replace the state from TenantDB.get_active_sessions rows (one per session/sign-in pair)."""
+        self._sessions.clear()
+        self._by_guild.clear()
+        self._by_code.clear()
+        for row in rows:
+            session = self._sessions.get(row['id'])
+            if session is None:
+                session = ActiveSession.from_row(row)
+                self.add(session)
+            if row['user_id'] is not None:
+                session.signed_in.add(row['user_id'])
+
+    def add(self, session: ActiveSession):
+        self._sessions[session.session_id] = session
+        self._by_guild.setdefault(session.guild_id, set()).add(session.session_id)
+        # Codes from new_code() are unique and reserved until now; a clash can only come
+        # from legacy rows, in which case the older session keeps the code and stays reachable by button
+        key = (session.guild_id, session.code)
+        if self._by_code.get(key) is None:
+            self._by_code[key] = session.session_id
+
+    def remove(self, session_id: int) -> Optional[ActiveSession]:
+        session = self._sessions.pop(session_id, None)
+        if session:
+            if self._by_code.get((session.guild_id, session.code)) == session_id:
+                del self._by_code[(session.guild_id, session.code)]
+            guild_sessions = self._by_guild.get(session.guild_id)
+            guild_sessions.discard(session_id)
+            if not guild_sessions:
+                del self._by_guild[session.guild_id]
+        return session
+
+    def get(self, session_id: int, guild_id: Optional[int] = None) -> Optional[ActiveSession]:
+        session = self._sessions.get(session_id)
+        if session and guild_id is not None and session.guild_id != guild_id:
+            return None
+        return session
+
+    def by_code(self, guild_id: int, code: str) -> Optional[ActiveSession]:
+        session_id = self._by_code.get((guild_id, code))
+        return self._sessions.get(session_id) if session_id is not None else None
+
+    def new_code(self, guild_id: int, digits: int = SIGNIN_CODE_DIGITS) -> str:
+        """Reserve a random numeric code not used by any open session in the guild.
+
+        The reservation holds until ``add`` claims it for the new session or
+        ``release_code`` gives it back.
+        """
+        code = self._pick_code(guild_id, digits)
+        self._by_code[(guild_id, code)] = None
+        return code
+
+    def _pick_code(self, guild_id: int, digits: int) -> str:
+        for _ in range(32):
+            code = ''.join(secrets.choice('0123456789') for _ in range(digits))
+            if (guild_id, code) not in self._by_code:
+                return code
+        # Nearly every code is taken; pick among the free ones directly
+        free = [f"{n:0{digits}d}" for n in range(10 ** digits) if (guild_id, f"{n:0{digits}d}") not in self._by_code]
+        if not free:
+            raise RuntimeError(f"no free {digits}-digit sign-in code in guild {guild_id}")
+        return secrets.choice(free)
+
+    def release_code(self, guild_id: int, code: str):
+        """Give back a code reserved by ``new_code`` whose session was never added."""
+        key = (guild_id, code)
+        if key in self._by_code and self._by_code[key] is None:
+            del self._by_code[key]
+
+    def latest_for_guild(self, guild_id: int) -> Optional[ActiveSession]:
+        session_ids = self._by_guild.get(guild_id)
+        return self._sessions[max(session_ids)] if session_ids else None
+
+    def mark_signed_in(self, session_id: int, user_id: int) -> bool:
+        """Record the sign-in; False if the session is closed or the user already signed in."""
+        session = self._sessions.get(session_id)
+        if session is None or user_id in session.signed_in:
+            return False
+        session.signed_in.add(user_id)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __iter__(self):
+        return iter(list(self._sessions.values()))
+
+
+def split_attendance(member_ids: Iterable[int], signed_in: Set[int]) -> Tuple[List[int], List[int]]:
+    """Partition member ids into (signed in, not signed in) in a single pass."""
+    present, absent = [], []
+    for user_id in member_ids:
+        (present if user_id in signed_in else absent).append(user_id)
+    return present, absent
+
+
+class SigninQueue(BatchWriter):
+    """In-memory sign-in buffer flushed to ``records`` in batched transactions."""
+
+    label = "簽到紀錄"
+
+    def __init__(self, db, flush_interval: float = SIGNIN_FLUSH_INTERVAL, max_batch: int = SIGNIN_MAX_BATCH):
+        super().__init__(db, flush_interval, max_batch)
+
+    def submit(self, session_id: int, user_id: int, username: str) -> bool:
+        """Queue a sign-in; False if the same user is already queued for the session."""
+        return self.enqueue((session_id, user_id, username, utc_timestamp()), key=(session_id, user_id))
+
+    def is_pending(self, session_id: int, user_id: int) -> bool:
+        return self.is_queued((session_id, user_id))
+
+    async def write(self, rows) -> int:
+        return await self._db.run(self._db.record_signins, rows)
+
+
+class ExpiryScheduler:
+    """Fires ``on_expire(session_id)`` at each session's expire_at.
+
+    A single task sleeps until the earliest deadline in a min-heap and is woken
+    early only when a sooner deadline is scheduled. Cancelled or rescheduled
+    entries are skipped lazily when they reach the top of the heap.
+    """
+
+    def __init__(self, on_expire: Callable[[int], Awaitable[None]], clock: Callable[[], datetime] = datetime.now):
+        self._on_expire = on_expire
+        self._clock = clock
+        self._heap: List[Tuple[datetime, int]] = []
+        self._deadlines: Dict[int, datetime] = {}
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self, session_id: int, expire_at: datetime):
+        self._deadlines[session_id] = expire_at
+        heapq.heappush(self._heap, (expire_at, session_id))
+        if self._heap[0] == (expire_at, session_id):
+            self._changed.set()
+
+    def cancel(self, session_id: int):
+        self._deadlines.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _next_deadline(self) -> Optional[Tuple[datetime, int]]:
+        while self._heap:
+            expire_at, session_id = self._heap[0]
+            if self._deadlines.get(session_id) == expire_at:
+                return expire_at, session_id
+            heapq.heappop(self._heap)  # cancelled or rescheduled
+        return None
+
+    async def _run(self):
+        while True:
+            self._changed.clear()
+            head = self._next_deadline()
+            if head is None:
+                await self._changed.wait()
+                continue
+
+            expire_at, session_id = head
+            delay = (expire_at - self._clock()).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            del self._deadlines[session_id]
+            try:
+                await self._on_expire(session_id)
+            except Exception as e:
+                print(f"關閉逾時簽到場次 {session_id} 失敗: {e}")
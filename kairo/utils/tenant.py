@@ -1,12 +1,57 @@
 import sqlite3
 import os
-from typing import Optional, Dict, Any, List, Tuple
-from dataclasses import dataclass, asdict
+import asyncio
+import logging
+from contextlib import closing, contextmanager
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+from typing import Optional, Dict, Any, List, Set, Tuple, Callable, Iterable, Sequence
+from dataclasses import dataclass, field, asdict
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives import padding
 import base64
 import secrets
 import json
+from .db import ConnectionManager, DatabaseExecutor, ensure_parent_dir
+from .cache import TTLCache
+from .answers import AnswerMatcher
+from .migrations import (
+    MIGRATIONS, BACKFILL_BATCH_SIZE, Migration, apply_migrations, current_version,
+    pending_backfills, rollup_session, run_backfill_batch,
+)
+
+# The one database file every module reads and writes. Resolved once so the
+# working directory the bot is started from cannot split data across files.
+DB_PATH = os.path.abspath(
+    os.getenv('TENANT_DB_PATH') or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'tenant.db')
+)
+
+# Files earlier versions wrote to, relative to whatever directory the bot was started from
+LEGACY_DB_PATHS = (os.path.join('data', 'tenant.db'), os.path.join('kairo', 'data', 'tenant.db'))
+
+logger = logging.getLogger(__name__)
+
+MODULES = ['attendance', 'plans', 'qa', 'crypto', 'bookkeeping', 'ctfd', 'routing']
+
+# Per-guild config cache; setters invalidate immediately, the TTL only bounds
+# staleness from writes made outside this process.
+CONFIG_CACHE_SIZE = int(os.getenv('CONFIG_CACHE_SIZE', '2048'))
+CONFIG_CACHE_TTL = float(os.getenv('CONFIG_CACHE_TTL', '300'))
+
+# Questions are read on every qa_ask and answer; adds invalidate their own key
+QA_CACHE_SIZE = int(os.getenv('QA_CACHE_SIZE', '4096'))
+
+# Cache entries derived from an org_configs row, dropped together on any config write
+_ORG_CONFIG_KINDS = ('attendance', 'bookkeeping', 'ctfd', 'excel')
+
+ORG_CONFIG_FIELDS = [
+    'ctfd_base_url', 'ciphertext_ctfd_token', 'ctfd_push_mode', 'ctfd_award_name', 'ctfd_award_category',
+    'excel_path', 'aes_key_b64', 'default_signin_ttl', 'canva_visible_after_signin',
+    'attendance_rename_enabled', 'attendance_staff_role_id',
+    'attendance_rename_format_member', 'attendance_rename_format_staff',
+    'bookkeeping_layout', 'google_sheets_url',
+]
 
 @dataclass
 class AttendanceSettings:
@@ -15,6 +60,26 @@ class AttendanceSettings:
     rename_format_member: str = '{name}'
     rename_format_staff: str = '幹部 | {name}'
 
+@dataclass
+class QAQuestion:
+    id: int
+    title: str
+    answers: List[str]
+    points: int
+    match_mode: str = 'exact'
+    # Compiled once here; the question cache then keeps it for every later answer
+    matcher: AnswerMatcher = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.matcher = AnswerMatcher(self.answers, self.match_mode)
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "QAQuestion":
+        return cls(
+            id=row['id'], title=row['title'], answers=json.loads(row['answers']),
+            points=row['points'], match_mode=row['match_mode']
+        )
+
 @dataclass
 class BookkeepingSettings:
     start_row: int = 2
@@ -24,14 +89,85 @@ class BookkeepingSettings:
     memo_col: str = 'D'
     user_col: str = 'E'
 
+def _tables_with_rows(conn: sqlite3.Connection) -> List[str]:
+    """Names of the user tables in ``conn`` holding at least one row."""
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND name != 'schema_version'"
+    )]
+    return [table for table in tables if conn.execute(f'SELECT EXISTS (SELECT 1 FROM "{table}")').fetchone()[0]]
+
 class TenantDB:
-    def __init__(self, db_path: str = "kairo/data/tenant.db"):
+    def __init__(self, db_path: str = DB_PATH):
+        self._connections: Optional[ConnectionManager] = None
+        self._executor = DatabaseExecutor()
+        self.config_cache = TTLCache(maxsize=CONFIG_CACHE_SIZE, ttl=CONFIG_CACHE_TTL)
+        self.question_cache = TTLCache(maxsize=QA_CACHE_SIZE, ttl=CONFIG_CACHE_TTL)
         self.db_path = db_path
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
         self.init_db()
 
+    @property
+    def db_path(self) -> str:
+        return self._db_path
+
+    @db_path.setter
+    def db_path(self, value: str):
+        # Re-pointing the database (e.g. in tests) drops the old pooled connections
+        if self._connections:
+            self._connections.close_all()
+        self._db_path = value
+        self.config_cache.clear()
+        self.question_cache.clear()
+        ensure_parent_dir(value)
+        self._connections = ConnectionManager(value)
+
+    @contextmanager
+    def connection(self):
+        """Shared long-lived connection for the calling thread; commits on exit."""
+        with self._connections.connection() as conn:
+            yield conn
+
+    def close(self):
+        self._executor.shutdown()
+        self._connections.close_all()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return {'config': self.config_cache.stats(), 'qa': self.question_cache.stats()}
+
+    def _invalidate_org_config(self, guild_id: int):
+        self.config_cache.invalidate(*((kind, guild_id) for kind in _ORG_CONFIG_KINDS))
+
+    # --- Async access (runs on the dedicated DB thread, never on the event loop) ---
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking callable, e.g. a TenantDB method, on the DB thread."""
+        return await self._executor.run(func, *args, **kwargs)
+
+    async def fetchone(self, sql: str, params: Sequence[Any] = ()) -> Optional[sqlite3.Row]:
+        return await self.run(self._fetchone, sql, params)
+
+    async def fetchall(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        return await self.run(self._fetchall, sql, params)
+
+    async def execute(self, sql: str, params: Sequence[Any] = ()) -> int:
+        """Execute one statement in its own transaction and return lastrowid."""
+        return await self.run(self._execute, sql, params)
+
+    def _fetchone(self, sql: str, params: Sequence[Any]) -> Optional[sqlite3.Row]:
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql: str, params: Sequence[Any]) -> List[sqlite3.Row]:
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _execute(self, sql: str, params: Sequence[Any]) -> int:
+        with self.connection() as conn:
+            return conn.execute(sql, params).lastrowid
+
+    # --- Schema & repository ---
+    # Every statement is written exactly once below so that the per-connection
+    # prepared-statement cache is hit on every call, whichever cog issues it.
     def init_db(self):
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             cursor.executescript("""
                 CREATE TABLE IF NOT EXISTS orgs (
@@ -138,9 +274,74 @@ class TenantDB:
                     PRIMARY KEY (guild_id, discord_user_id)
                 );
             """)
+        # Baseline tables above; every later schema change is a versioned migration
+        with self.connection() as conn:
+            apply_migrations(conn, MIGRATIONS)
+
+    def adopt_legacy_database(self, candidates: Sequence[str] = LEGACY_DB_PATHS) -> Optional[str]:
+        """Pick up data left in a database file used before DB_PATH was fixed.
+
+        A legacy file with rows is copied in when the active database has none
+        yet, migrated, and renamed to *.migrated. If both hold data nothing is
+        merged; a warning names both paths instead. Returns the adopted path.
+        """
+        active = os.path.abspath(self.db_path)
+        for candidate in candidates:
+            path = os.path.abspath(candidate)
+            if path == active or not os.path.isfile(path):
+                continue
+            with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as legacy:
+                legacy_tables = _tables_with_rows(legacy)
+                if not legacy_tables:
+                    continue
+                with self.connection() as conn:
+                    if _tables_with_rows(conn):
+                        logger.warning(
+                            "舊版資料庫 %s 仍有資料（%s），但目前使用的資料庫 %s 也已有資料，不會自動合併；"
+                            "請手動搬移，或將 TENANT_DB_PATH 指向要使用的檔案。",
+                            path, ", ".join(legacy_tables), active
+                        )
+                        continue
+                    legacy.backup(conn)
+            os.replace(path, path + '.migrated')
+            self.config_cache.clear()
+            self.question_cache.clear()
+            self.init_db()
+            logger.warning("已將舊版資料庫 %s 的資料搬移至 %s（原檔已更名為 .migrated）", path, active)
+            return path
+        return None
+
+    def schema_version(self) -> int:
+        with self.connection() as conn:
+            return current_version(conn)
+
+    async def run_backfills(self, batch_size: int = BACKFILL_BATCH_SIZE, pause: float = 0.0) -> int:
+        """Run pending migration backfills online, one short transaction per DB-thread job.
+
+        Other queued queries interleave between batches, so the write lock is
+        only ever held for a single batch.
+        """
+        total = 0
+        migrations = await self.run(self._pending_backfills)
+        for migration in migrations:
+            while True:
+                processed = await self.run(self._run_backfill_batch, migration, batch_size)
+                total += processed
+                if not processed:
+                    break
+                if pause:
+                    await asyncio.sleep(pause)
+        return total
+
+    def _pending_backfills(self) -> List[Migration]:
+        with self.connection() as conn:
+            return pending_backfills(conn, MIGRATIONS)
+
+    def _run_backfill_batch(self, migration: Migration, batch_size: int) -> int:
+        return run_backfill_batch(self._connections.get(), migration, batch_size)
 
     def register_org(self, guild_id: int, name: str) -> bool:
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             try:
                 conn.execute("INSERT OR REPLACE INTO orgs (guild_id, name) VALUES (?, ?)", (guild_id, name))
                 return True
@@ -148,35 +349,36 @@ class TenantDB:
                 return False
 
     def get_org(self, guild_id: int) -> Optional[Dict[str, Any]]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self.connection() as conn:
             cursor = conn.execute("SELECT * FROM orgs WHERE guild_id = ?", (guild_id,))
             row = cursor.fetchone()
             return dict(row) if row else None
 
     def is_module_enabled(self, guild_id: int, module: str) -> bool:
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.execute("SELECT enabled FROM org_modules WHERE guild_id = ? AND module = ?", (guild_id, module))
             row = cursor.fetchone()
             return bool(row[0]) if row else True  # Default to enabled
 
     def set_module_enabled(self, guild_id: int, module: str, enabled: bool):
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             conn.execute("""
                 INSERT OR REPLACE INTO org_modules (guild_id, module, enabled)
                 VALUES (?, ?, ?)
             """, (guild_id, module, enabled))
 
     def enable_module(self, guild_id: int, module: str):
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             conn.execute("""
                 INSERT OR REPLACE INTO org_modules (guild_id, module, enabled)
                 VALUES (?, ?, 1)
             """, (guild_id, module))
 
     def get_attendance_settings(self, guild_id: int) -> AttendanceSettings:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        return self.config_cache.get_or_load(('attendance', guild_id), lambda: self._load_attendance_settings(guild_id))
+
+    def _load_attendance_settings(self, guild_id: int) -> AttendanceSettings:
+        with self.connection() as conn:
             cursor = conn.execute("SELECT * FROM org_configs WHERE guild_id = ?", (guild_id,))
             row = cursor.fetchone()
             if row:
@@ -198,12 +400,16 @@ class TenantDB:
         if key not in valid_keys:
             raise ValueError(f"Invalid setting key: {key}")
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             conn.execute("INSERT OR IGNORE INTO org_configs (guild_id) VALUES (?)", (guild_id,))
             conn.execute(f"UPDATE org_configs SET {key} = ? WHERE guild_id = ?", (value, guild_id))
+        self.config_cache.invalidate(('attendance', guild_id))
 
     def get_bookkeeping_settings(self, guild_id: int) -> BookkeepingSettings:
-        with sqlite3.connect(self.db_path) as conn:
+        return self.config_cache.get_or_load(('bookkeeping', guild_id), lambda: self._load_bookkeeping_settings(guild_id))
+
+    def _load_bookkeeping_settings(self, guild_id: int) -> BookkeepingSettings:
+        with self.connection() as conn:
             cursor = conn.execute("SELECT bookkeeping_layout FROM org_configs WHERE guild_id = ?", (guild_id,))
             row = cursor.fetchone()
             if row and row[0]:
@@ -216,9 +422,488 @@ class TenantDB:
 
     def set_bookkeeping_settings(self, guild_id: int, settings: BookkeepingSettings):
         settings_json = json.dumps(asdict(settings))
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             conn.execute("INSERT OR IGNORE INTO org_configs (guild_id) VALUES (?)", (guild_id,))
             conn.execute("UPDATE org_configs SET bookkeeping_layout = ? WHERE guild_id = ?", (settings_json, guild_id))
+        self.config_cache.invalidate(('bookkeeping', guild_id))
+
+    def set_org_config(self, guild_id: int, **fields: Any):
+        """Update arbitrary org_configs columns (org_config_set)."""
+        invalid = set(fields) - set(ORG_CONFIG_FIELDS)
+        if invalid:
+            raise ValueError(f"Invalid config key: {', '.join(sorted(invalid))}")
+        if not fields:
+            return
+
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self.connection() as conn:
+            conn.execute("INSERT OR IGNORE INTO org_configs (guild_id) VALUES (?)", (guild_id,))
+            conn.execute(
+                f"UPDATE org_configs SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE guild_id = ?",
+                (*fields.values(), guild_id)
+            )
+        self._invalidate_org_config(guild_id)
+
+    def get_excel_path(self, guild_id: int) -> Optional[str]:
+        return self.config_cache.get_or_load(('excel', guild_id), lambda: self._load_excel_path(guild_id))
+
+    def _load_excel_path(self, guild_id: int) -> Optional[str]:
+        with self.connection() as conn:
+            row = conn.execute("SELECT excel_path FROM org_configs WHERE guild_id = ?", (guild_id,)).fetchone()
+            return row[0] if row and row[0] else None
+
+    def set_excel_path(self, guild_id: int, path_or_url: str):
+        self.set_org_config(guild_id, excel_path=path_or_url)
+
+    def get_ctfd_config(self, guild_id: int) -> Optional[Dict[str, Any]]:
+        """Raw CTFd columns of org_configs; the token is still encrypted."""
+        config = self.config_cache.get_or_load(('ctfd', guild_id), lambda: self._load_ctfd_config(guild_id))
+        return dict(config) if config else None
+
+    def _load_ctfd_config(self, guild_id: int) -> Optional[Dict[str, Any]]:
+        with self.connection() as conn:
+            row = conn.execute("""
+                SELECT ctfd_base_url, ciphertext_ctfd_token, ctfd_push_mode,
+                       ctfd_award_name, ctfd_award_category
+                FROM org_configs WHERE guild_id = ?
+            """, (guild_id,)).fetchone()
+            return dict(row) if row else None
+
+    # --- Registration ---
+    def get_registration_status(self, guild_id: int) -> Optional[Dict[str, Any]]:
+        with self.connection() as conn:
+            row = conn.execute("SELECT * FROM registration_status WHERE guild_id = ?", (guild_id,)).fetchone()
+            return dict(row) if row else None
+
+    def save_registration(self, guild_id: int, school: str, club_name: str, responsible_person: str,
+                          responsible_discord_id: int, club_type: str):
+        with self.connection() as conn:
+            conn.execute("""
+                INSERT INTO registration_status
+                    (guild_id, status, school, club_name, responsible_person, responsible_discord_id, club_type, reason)
+                VALUES (?, 'pending', ?, ?, ?, ?, ?, NULL)
+                ON CONFLICT(guild_id) DO UPDATE SET
+                    status = 'pending', school = excluded.school, club_name = excluded.club_name,
+                    responsible_person = excluded.responsible_person,
+                    responsible_discord_id = excluded.responsible_discord_id,
+                    club_type = excluded.club_type, reason = NULL,
+                    applied_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+            """, (guild_id, school, club_name, responsible_person, responsible_discord_id, club_type))
+
+    def set_registration_status(self, guild_id: int, status: str, reason: Optional[str] = None):
+        with self.connection() as conn:
+            conn.execute("""
+                INSERT INTO registration_status (guild_id, status, reason) VALUES (?, ?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET
+                    status = excluded.status, reason = excluded.reason, updated_at = CURRENT_TIMESTAMP
+            """, (guild_id, status, reason))
+
+    def list_registrations(self) -> List[sqlite3.Row]:
+        with self.connection() as conn:
+            return conn.execute("""
+                SELECT guild_id, status, school, club_name, responsible_person,
+                       responsible_discord_id, club_type, applied_at, reason
+                FROM registration_status
+                ORDER BY applied_at DESC
+            """).fetchall()
+
+    def get_module_guild_ids(self, module: str) -> List[int]:
+        """Approved guilds that have not disabled ``module``."""
+        with self.connection() as conn:
+            rows = conn.execute("""
+                SELECT r.guild_id FROM registration_status r INDEXED BY idx_registration_approved
+                WHERE r.status = 'approved' AND NOT EXISTS (
+                    SELECT 1 FROM org_modules m WHERE m.guild_id = r.guild_id AND m.module = ? AND m.enabled = 0
+                )
+                ORDER BY r.guild_id
+            """, (module,)).fetchall()
+            return [row[0] for row in rows]
+
+    def get_enabled_modules(self, guild_id: int) -> List[str]:
+        with self.connection() as conn:
+            rows = conn.execute("SELECT module, enabled FROM org_modules WHERE guild_id = ?", (guild_id,)).fetchall()
+        states = {row['module']: bool(row['enabled']) for row in rows}
+        return [module for module in MODULES if states.get(module, True)]  # Default to enabled
+
+    def enable_default_modules(self, guild_id: int):
+        with self.connection() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO org_modules (guild_id, module, enabled)
+                VALUES (?, ?, 1)
+            """, [(guild_id, module) for module in MODULES])
+
+    # --- Routing ---
+    def get_routing(self, guild_id: int, key: str) -> Optional[int]:
+        return self._get_routes(guild_id).get(key)
+
+    def get_all_routing(self, guild_id: int) -> Dict[str, int]:
+        return dict(self._get_routes(guild_id))
+
+    def _get_routes(self, guild_id: int) -> Dict[str, int]:
+        # The whole (small) route table of a guild is cached as one entry
+        return self.config_cache.get_or_load(('routing', guild_id), lambda: self._load_routes(guild_id))
+
+    def _load_routes(self, guild_id: int) -> Dict[str, int]:
+        with self.connection() as conn:
+            rows = conn.execute("SELECT key, channel_id FROM routing WHERE guild_id = ?", (guild_id,)).fetchall()
+            return {row['key']: row['channel_id'] for row in rows}
+
+    def set_routing(self, guild_id: int, key: str, channel_id: int):
+        with self.connection() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO routing (guild_id, key, channel_id)
+                VALUES (?, ?, ?)
+            """, (guild_id, key, channel_id))
+        self.config_cache.invalidate(('routing', guild_id))
+
+    def delete_routing(self, guild_id: int, key: str) -> bool:
+        with self.connection() as conn:
+            cursor = conn.execute("DELETE FROM routing WHERE guild_id = ? AND key = ?", (guild_id, key))
+        self.config_cache.invalidate(('routing', guild_id))
+        return cursor.rowcount > 0
+
+    # --- Plans ---
+    def get_plan(self, guild_id: int, week: str, group: str) -> Optional[str]:
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT content FROM plans WHERE guild_id = ? AND week_key = ? AND group_name = ?",
+                (guild_id, week, group)
+            ).fetchone()
+            return row[0] if row else None
+
+    def set_plan(self, guild_id: int, week: str, group: str, content: str):
+        with self.connection() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO plans (guild_id, week_key, group_name, content)
+                VALUES (?, ?, ?, ?)
+            """, (guild_id, week, group, content))
+
+    def get_plan_group(self, guild_id: int, user_id: int) -> Optional[str]:
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT group_name FROM plan_groups WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id)
+            ).fetchone()
+            return row[0] if row else None
+
+    def set_plan_group(self, guild_id: int, user_id: int, group: str):
+        with self.connection() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO plan_groups (guild_id, user_id, group_name)
+                VALUES (?, ?, ?)
+            """, (guild_id, user_id, group))
+
+    # --- Attendance ---
+    def create_session(self, guild_id: int, channel_id: int, code: str, expire_at: datetime,
+                       canva_url: Optional[str] = None, outline: Optional[str] = None) -> int:
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO sessions (guild_id, channel_id, code, expire_at, canva_url, outline) VALUES (?, ?, ?, ?, ?, ?)",
+                (guild_id, channel_id, code, expire_at.isoformat(sep=' '), canva_url, outline)
+            )
+            return cursor.lastrowid
+
+    def get_active_sessions(self) -> List[sqlite3.Row]:
+        """Every open session with its sign-ins (user_id NULL when none), in one query."""
+        with self.connection() as conn:
+            return conn.execute("""
+                SELECT sessions.id, sessions.guild_id, sessions.channel_id, sessions.code, sessions.expire_at,
+                       sessions.canva_url, sessions.outline, records.user_id
+                FROM sessions INDEXED BY idx_sessions_active
+                LEFT JOIN records ON records.session_id = sessions.id
+                WHERE sessions.active = 1
+            """).fetchall()
+
+    def get_latest_session_id(self, guild_id: int) -> Optional[int]:
+        with self.connection() as conn:
+            row = conn.execute("SELECT id FROM sessions WHERE guild_id = ? ORDER BY id DESC LIMIT 1", (guild_id,)).fetchone()
+            return row[0] if row else None
+
+    def end_session(self, session_id: int) -> int:
+        """Close a session, fold it into the attendance rollups and return its final headcount."""
+        with self.connection() as conn:
+            if conn.execute("UPDATE sessions SET active = 0 WHERE id = ? AND active = 1", (session_id,)).rowcount:
+                rollup_session(conn, session_id)
+            return conn.execute("SELECT COUNT(*) FROM records WHERE session_id = ?", (session_id,)).fetchone()[0]
+
+    def record_signins(self, rows: Sequence[Tuple[int, int, str, str]]) -> int:
+        """Insert a batch of (session_id, user_id, username, ts) in one transaction.
+
+        Duplicates are ignored; returns how many rows were new.
+        """
+        with self.connection() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO records (session_id, user_id, username, ts) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            return conn.total_changes - before
+
+    def get_session_records(self, session_id: int) -> List[sqlite3.Row]:
+        with self.connection() as conn:
+            return conn.execute(
+                "SELECT user_id, username, ts FROM records WHERE session_id = ? ORDER BY ts",
+                (session_id,)
+            ).fetchall()
+
+    def get_signed_in_user_ids(self, session_id: int) -> Set[int]:
+        with self.connection() as conn:
+            rows = conn.execute("SELECT user_id FROM records WHERE session_id = ?", (session_id,)).fetchall()
+            return {row[0] for row in rows}
+
+    def get_guild_session_ids(self, guild_id: int, session_id: Optional[int] = None) -> List[int]:
+        """All of a guild's session ids in order, or just ``session_id`` if it belongs to the guild."""
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT id FROM sessions WHERE guild_id = ? AND (? IS NULL OR id = ?) ORDER BY id",
+                (guild_id, session_id, session_id)
+            ).fetchall()
+            return [row[0] for row in rows]
+
+    def get_records_page(self, session_id: int, after: Tuple[str, int] = ('', 0), limit: int = 500,
+                         start: str = '', end: str = '9999-12-31') -> List[sqlite3.Row]:
+        """One keyset page of a session's records with start <= ts < end, ordered after ``after`` (ts, user_id)."""
+        with self.connection() as conn:
+            return conn.execute("""
+                SELECT session_id, ts, user_id, username FROM records
+                WHERE session_id = ? AND ts >= ? AND ts < ? AND (ts, user_id) > (?, ?)
+                ORDER BY ts, user_id LIMIT ?
+            """, (session_id, start, end, after[0], after[1], limit)).fetchall()
+
+    # --- Attendance rollups (maintained by end_session) ---
+    def get_guild_attendance_stats(self, guild_id: int) -> Tuple[int, int]:
+        """(closed sessions, total attendances) for the guild."""
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT sessions, attendances FROM attendance_guild_stats WHERE guild_id = ?", (guild_id,)
+            ).fetchone()
+            return (row[0], row[1]) if row else (0, 0)
+
+    def get_member_attendance(self, guild_id: int, user_id: int) -> int:
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT attended FROM attendance_member_stats WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)
+            ).fetchone()
+            return row[0] if row else 0
+
+    def get_guild_member_attendance(self, guild_id: int) -> Dict[int, int]:
+        """user_id -> sessions attended, for every member who attended at least once."""
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT user_id, attended FROM attendance_member_stats WHERE guild_id = ?", (guild_id,)
+            ).fetchall()
+            return {row[0]: row[1] for row in rows}
+
+    def get_recent_headcounts(self, guild_id: int, limit: int = 10) -> List[sqlite3.Row]:
+        with self.connection() as conn:
+            return conn.execute("""
+                SELECT session_id, headcount FROM session_headcounts
+                WHERE guild_id = ? ORDER BY session_id DESC LIMIT ?
+            """, (guild_id, limit)).fetchall()
+
+    # --- Bulk member edits (checkpoints for resumable jobs) ---
+    def create_bulk_job(self, guild_id: int, kind: str, items: Sequence[Tuple[int, Optional[str]]]) -> int:
+        """Store a job and its (user_id, nick) targets; returns the job id."""
+        with self.connection() as conn:
+            job_id = conn.execute("INSERT INTO bulk_jobs (guild_id, kind) VALUES (?, ?)", (guild_id, kind)).lastrowid
+            conn.executemany(
+                "INSERT OR IGNORE INTO bulk_job_items (job_id, user_id, nick) VALUES (?, ?, ?)",
+                [(job_id, user_id, nick) for user_id, nick in items]
+            )
+            return job_id
+
+    def get_open_bulk_job(self, guild_id: int, kind: str) -> Optional[int]:
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT id FROM bulk_jobs WHERE guild_id = ? AND kind = ? AND status = 'running'",
+                (guild_id, kind)
+            ).fetchone()
+            return row[0] if row else None
+
+    def get_pending_bulk_items(self, job_id: int) -> List[sqlite3.Row]:
+        with self.connection() as conn:
+            return conn.execute(
+                "SELECT user_id, nick FROM bulk_job_items WHERE job_id = ? AND done = 0", (job_id,)
+            ).fetchall()
+
+    def mark_bulk_items_done(self, job_id: int, results: Sequence[Tuple[int, Optional[str]]]):
+        """Checkpoint finished (user_id, error) pairs; error is None on success."""
+        with self.connection() as conn:
+            conn.executemany(
+                "UPDATE bulk_job_items SET done = 1, error = ? WHERE job_id = ? AND user_id = ?",
+                [(error, job_id, user_id) for user_id, error in results]
+            )
+
+    def finish_bulk_job(self, job_id: int, status: str = 'done'):
+        with self.connection() as conn:
+            conn.execute("UPDATE bulk_jobs SET status = ? WHERE id = ?", (status, job_id))
+
+    # --- QA questions ---
+    def add_qa_question(self, guild_id: int, title: str, answers: Sequence[str], points: int,
+                        match_mode: str = 'exact') -> int:
+        """Store a question under the guild's next id and return that id."""
+        return self.add_qa_questions(guild_id, [(title, answers, points, match_mode)])[0]
+
+    def add_qa_questions(self, guild_id: int, questions: Iterable[Tuple[str, Sequence[str], int, str]]) -> List[int]:
+        """Store (title, answers, points, match_mode) questions in one transaction, consuming ``questions`` lazily.
+
+        Returns the new ids in order; nothing is stored if ``questions`` raises.
+        """
+        question_ids = []
+        with self.connection() as conn:
+            for title, answers, points, match_mode in questions:
+                question_ids.append(conn.execute("""
+                    INSERT INTO qa_questions (guild_id, id, title, answers, points, match_mode)
+                    SELECT ?, COALESCE(MAX(id), 0) + 1, ?, ?, ?, ? FROM qa_questions WHERE guild_id = ?
+                    RETURNING id
+                """, (guild_id, title, json.dumps(list(answers), ensure_ascii=False), points, match_mode, guild_id)).fetchone()[0])
+        self.question_cache.invalidate(*(('qa', guild_id, question_id) for question_id in question_ids))
+        return question_ids
+
+    def get_qa_question(self, guild_id: int, question_id: int) -> Optional[QAQuestion]:
+        return self.question_cache.get_or_load(
+            ('qa', guild_id, question_id), lambda: self._load_qa_question(guild_id, question_id)
+        )
+
+    def _load_qa_question(self, guild_id: int, question_id: int) -> Optional[QAQuestion]:
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT id, title, answers, points, match_mode FROM qa_questions WHERE guild_id = ? AND id = ?",
+                (guild_id, question_id)
+            ).fetchone()
+            return QAQuestion.from_row(row) if row else None
+
+    def get_qa_questions_page(self, guild_id: int, after_id: int = 0, limit: int = 500) -> List[sqlite3.Row]:
+        """One keyset page of the guild's questions with id > ``after_id``, in id order."""
+        with self.connection() as conn:
+            return conn.execute("""
+                SELECT id, title, answers, points, match_mode FROM qa_questions
+                WHERE guild_id = ? AND id > ? ORDER BY id LIMIT ?
+            """, (guild_id, after_id, limit)).fetchall()
+
+    def import_qa_questions(self, guild_id: int, questions: Sequence[QAQuestion]) -> int:
+        """Insert questions keeping their ids in one transaction; existing ids are left alone.
+
+        Returns how many questions were new.
+        """
+        with self.connection() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO qa_questions (guild_id, id, title, answers, points, match_mode) VALUES (?, ?, ?, ?, ?, ?)",
+                [(guild_id, q.id, q.title, json.dumps(q.answers, ensure_ascii=False), q.points, q.match_mode)
+                 for q in questions]
+            )
+            inserted = conn.total_changes - before
+        self.question_cache.invalidate(*(('qa', guild_id, q.id) for q in questions))
+        return inserted
+
+    # --- QA contests ---
+    def create_qa_contest(self, guild_id: int, scoring: str, starts_at: datetime, ends_at: datetime) -> int:
+        """Open a contest, closing any contest the guild still has open."""
+        with self.connection() as conn:
+            conn.execute("UPDATE qa_contests SET active = 0 WHERE guild_id = ? AND active = 1", (guild_id,))
+            return conn.execute(
+                "INSERT INTO qa_contests (guild_id, scoring, starts_at, ends_at) VALUES (?, ?, ?, ?)",
+                (guild_id, scoring, starts_at.isoformat(sep=' '), ends_at.isoformat(sep=' '))
+            ).lastrowid
+
+    def end_qa_contest(self, contest_id: int) -> bool:
+        with self.connection() as conn:
+            return conn.execute("UPDATE qa_contests SET active = 0 WHERE id = ? AND active = 1", (contest_id,)).rowcount == 1
+
+    def get_active_qa_contests(self) -> List[sqlite3.Row]:
+        """Every open contest with its solves (question_id NULL when none), in one query."""
+        with self.connection() as conn:
+            return conn.execute("""
+                SELECT qa_contests.id, qa_contests.guild_id, qa_contests.scoring, qa_contests.starts_at,
+                       qa_contests.ends_at, qa_solves.question_id, qa_solves.user_id
+                FROM qa_contests INDEXED BY idx_qa_contests_active
+                LEFT JOIN qa_solves ON qa_solves.contest_id = qa_contests.id
+                WHERE qa_contests.active = 1
+            """).fetchall()
+
+    def record_qa_solves(self, rows: Sequence[Tuple[int, int, int, int, str]]) -> int:
+        """Insert a batch of (contest_id, question_id, user_id, points, solved_at); returns how many were new."""
+        with self.connection() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO qa_solves (contest_id, question_id, user_id, points, solved_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            return conn.total_changes - before
+
+    # --- QA attempts ---
+    def record_qa_attempts(self, rows: Sequence[Tuple[int, int, int, bool, str]]) -> int:
+        """Append a batch of (guild_id, question_id, user_id, correct, attempted_at); returns the row count."""
+        with self.connection() as conn:
+            conn.executemany(
+                "INSERT INTO qa_attempts (guild_id, question_id, user_id, correct, attempted_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def get_qa_attempt_stats(self, guild_id: int) -> List[Tuple[int, int, int, int]]:
+        """(question_id, attempts, attempters, solvers) for every attempted question, in id order.
+
+        The per-user grouping walks the covering index in order; folding those
+        rows per question here avoids a temp B-tree for a second GROUP BY.
+        """
+        with self.connection() as conn:
+            rows = conn.execute("""
+                SELECT question_id, COUNT(*) AS tries, MAX(correct) AS solved FROM qa_attempts
+                WHERE guild_id = ? GROUP BY question_id, user_id ORDER BY question_id, user_id
+            """, (guild_id,))
+            stats = []
+            for question_id, per_user in groupby(rows, key=itemgetter(0)):
+                attempts = attempters = solvers = 0
+                for _, tries, solved in per_user:
+                    attempts += tries
+                    attempters += 1
+                    solvers += solved
+                stats.append((question_id, attempts, attempters, solvers))
+            return stats
+
+    # --- QA scores ---
+    def add_score(self, guild_id: int, user_id: int, points: int) -> int:
+        """Add points and return the user's new total."""
+        return self.add_scores([(guild_id, user_id, points)])[0]
+
+    def add_scores(self, increments: Sequence[Tuple[int, int, int]]) -> List[int]:
+        """Apply (guild_id, user_id, points) increments in one transaction; returns each new total in order."""
+        with self.connection() as conn:
+            return [
+                conn.execute("""
+                    INSERT INTO scores (guild_id, user_id, score) VALUES (?, ?, ?)
+                    ON CONFLICT (guild_id, user_id) DO UPDATE SET score = score + excluded.score
+                    RETURNING score
+                """, increment).fetchone()[0]
+                for increment in increments
+            ]
+
+    def get_all_scores(self) -> List[sqlite3.Row]:
+        """(guild_id, user_id, score) for every positive score, for rebuilding leaderboards."""
+        with self.connection() as conn:
+            return conn.execute("SELECT guild_id, user_id, score FROM scores WHERE score > 0").fetchall()
+
+    def reset_scores(self, guild_id: int):
+        with self.connection() as conn:
+            conn.execute("DELETE FROM scores WHERE guild_id = ?", (guild_id,))
+
+    # --- CTFd links ---
+    def get_ctfd_link(self, guild_id: int, user_id: int) -> Optional[int]:
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT ctfd_user_id FROM ctfd_links WHERE guild_id = ? AND discord_user_id = ?",
+                (guild_id, user_id)
+            ).fetchone()
+            return row[0] if row else None
+
+    def set_ctfd_link(self, guild_id: int, user_id: int, email: str, ctfd_user_id: Optional[int]):
+        with self.connection() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO ctfd_links (guild_id, discord_user_id, email, ctfd_user_id)
+                VALUES (?, ?, ?, ?)
+            """, (guild_id, user_id, email, ctfd_user_id))
 
 class CryptoManager:
     def __init__(self, master_key_b64: str):
@@ -28,7 +28,8 @@ def get_visible_commands_for_guild(guild_id: int) -> List[str]:
         if 'attendance' in enabled_modules:
             commands.extend([
                 'signin_start', 'signin_in', 'signin_end',
-                'signin_report', 'signin_summary'
+                'signin_report', 'signin_summary', 'signin_export', 'signin_stats',
+                'nickname_normalize'
             ])
 
         if 'plans' in enabled_modules:
@@ -38,7 +39,8 @@ def get_visible_commands_for_guild(guild_id: int) -> List[str]:
 
         if 'qa' in enabled_modules:
             commands.extend([
-                'qa_add', 'qa_ask', 'qa_scoreboard', 'qa_reset'
+                'qa_add', 'qa_ask', 'qa_scoreboard', 'qa_reset',
+                'qa_contest_start', 'qa_contest_end', 'qa_import', 'qa_export', 'qa_stats'
             ])
 
         if 'ctfd' in enabled_modules:
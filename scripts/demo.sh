@@ -11,6 +11,11 @@ echo "Testing ping command:"
 echo -n "ping" | nc -w1 127.0.0.1 9000
 echo
 
+# Test cache statistics
+echo "Testing stats command:"
+echo -n "stats" | nc -w1 127.0.0.1 9000
+echo
+
 # Test other command
 echo "Testing other command:"
 echo -n "hello" | nc -w1 127.0.0.1 9000